@@ -42,12 +42,12 @@ def _off_people(cfg: AppConfig, last: Optional[PeopleStable]) -> PeopleStable:
 
 def _off_tags(cfg: AppConfig, last: Optional[TagsStable], inject: Set[str], off_mode: OffMode) -> TagsStable:
     if off_mode == OffMode.EMPTY:
-        return TagsStable(tags=set())
+        return TagsStable()
     if off_mode == OffMode.HOLD_LAST and last is not None:
         return last
     if off_mode == OffMode.INJECT:
-        return TagsStable(tags=set(inject))
-    return TagsStable(tags=set())
+        return TagsStable.from_tags(inject)
+    return TagsStable()
 
 
 def parse_args() -> argparse.Namespace:
@@ -46,7 +46,6 @@ def main(args: Optional[argparse.Namespace] = None) -> None:
     win.resize(1280, 720)
     win.show()
 
-    worker.frame_ready.connect(win.on_frame)
     worker.start()
 
     def on_exit() -> None:
@@ -33,6 +33,11 @@ def _build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--half", action="store_true", help="Enable FP16 inference when supported")
     parser.add_argument("--allow-network", dest="allow_network", action="store_true")
     parser.add_argument("--no-network", dest="allow_network", action="store_false")
+    parser.add_argument("--people-tracker", choices=("ultralytics", "builtin"), default=None, help="People tracker: ultralytics model.track or the built-in NumPy ByteTrack-style tracker")
+    parser.add_argument("--run-jsonl", action="store_true", help="Also convert the run log to JSONL")
+    parser.add_argument("--coarse-fps", type=float, default=0.0, help="Coarse-to-fine export: sparse first pass at this rate, full rate only around changes (0 = off)")
+    parser.add_argument("--dense-margin-s", type=float, default=2.0, help="Full-rate window half-width around coarse changes and session boundaries")
+    parser.add_argument("--validate-full", action="store_true", help="With --coarse-fps, also run a full-rate pass and write validate_<stem>.json")
     ReportConfig.add_cli_args(parser)
     parser.set_defaults(allow_network=False)
     return parser
@@ -56,6 +61,7 @@ def _ensure_runtime_defaults(args: argparse.Namespace) -> None:
         "c_conf_close": None,
         "c_conf_sampling": None,
         "c_max_det": None,
+        "people_tracker": None,
     }
     for key, value in defaults.items():
         if not hasattr(args, key):
@@ -105,6 +111,7 @@ def _build_report_config(args: argparse.Namespace) -> ReportConfig:
         "device_mode": getattr(args, "device_mode", "auto"),
         "cuda_available": getattr(args, "cuda_available", None),
         "cuda_reason": getattr(args, "cuda_reason", ""),
+        "people_tracker": getattr(args, "people_tracker", None),
     }
     return ReportConfig(
         outdir=args.outdir,
@@ -116,6 +123,10 @@ def _build_report_config(args: argparse.Namespace) -> ReportConfig:
         device_mode=getattr(args, "device_mode", "auto"),
         half=bool(args.half),
         allow_network=bool(args.allow_network),
+        run_jsonl=bool(getattr(args, "run_jsonl", False)),
+        coarse_fps=float(getattr(args, "coarse_fps", 0.0) or 0.0),
+        dense_margin_s=float(getattr(args, "dense_margin_s", 2.0)),
+        validate_full=bool(getattr(args, "validate_full", False)),
         overrides=overrides,
     )
 
@@ -129,6 +140,7 @@ def _result_to_info(result: ReportExportResult) -> dict:
         "docx": result.docx_path,
         "mp4": result.overlay_path,
         "jsonl": result.run_jsonl,
+        "run_log": result.run_log,
         "json": result.report_json,
         "pdf": result.pdf_path,
         "last_fps": result.last_fps,
@@ -143,7 +155,8 @@ def _result_summary(result: ReportExportResult, source: Optional[str] = None) ->
         f"reports_dir={result.reports_dir}",
         f"report_dir={result.report_dir}",
         f"json={result.report_json}",
-        f"jsonl={result.run_jsonl}",
+        f"run_log={result.run_log or '-'}",
+        f"jsonl={result.run_jsonl or '-'}",
     ]
     if result.docx_path:
         parts.append(f"docx={result.docx_path}")
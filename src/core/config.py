@@ -21,6 +21,11 @@ class PeopleSmootherConfig:
     min_stable: int = 3
     hold: int = 5
     min_track_hits: int = 3
+    vote_window: int = 25
+    vote_accept_expected: float = 0.60
+    vote_accept_other: float = 0.80
+    vote_hold_out: int = 20
+    vote_hold_back: int = 8
 
 
 @dataclass
@@ -49,6 +54,18 @@ class DetectorConfig:
     max_det: int = 100
 
 
+@dataclass
+class TrackerConfig:
+    backend: str = "ultralytics"
+    track_high_thresh: float = 0.25
+    track_low_thresh: float = 0.1
+    new_track_thresh: float = 0.25
+    track_buffer: int = 30
+    match_thresh: float = 0.8
+    low_match_thresh: float = 0.5
+    fuse_score: bool = True
+
+
 @dataclass
 class SamplingCloseConfig:
     model_path: str
@@ -59,6 +76,19 @@ class SamplingCloseConfig:
     max_det: int = 10
 
 
+@dataclass
+class PropagatorConfig:
+    enabled: bool = False
+    flow_side: int = 320
+    grid: int = 5
+    win_size: int = 15
+    max_fb_error: float = 1.0
+    decay: float = 0.97
+    min_quality: float = 0.5
+    min_confidence: float = 0.5
+    max_age: int = 0
+
+
 @dataclass
 class ReplayConfig:
     pass
@@ -96,6 +126,7 @@ class AppConfig:
             iou=0.45,
         )
     )
+    people_tracker: TrackerConfig = field(default_factory=TrackerConfig)
     sampling_close_detector: DetectorConfig = field(
         default_factory=lambda: DetectorConfig(
             model_path=r"D:\23_detector-main\best\2_sampling_close\best.pt",
@@ -141,5 +172,6 @@ class AppConfig:
     )
 
     state_engine: StateEngineConfig = field(default_factory=lambda: StateEngineConfig(debounce_k=1))
+    propagator: PropagatorConfig = field(default_factory=PropagatorConfig)
     replay: ReplayConfig = field(default_factory=ReplayConfig)
     test: TestConfig = field(default_factory=TestConfig)
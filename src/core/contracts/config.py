@@ -13,11 +13,16 @@ class RealtimeConfig:
     target_ratio: float = 1.0
     no_overlay: bool = False
     dynamic_skip: bool = False
+    policy: str = "ratio"
+    transition_aware: bool = False
     perf_log: bool = False
     max_fps: float = 0.0
     infer_every: int = 1
+    propagate: bool = False
     allow_network: bool = False
     debug: bool = False
+    infer_process: bool = False
+    degrade: bool = False
 
     def apply_to_args(self, args: Any) -> None:
         for key, value in self.__dict__.items():
@@ -39,6 +44,10 @@ class ReportConfig:
     device_mode: str = "auto"
     half: bool = False
     allow_network: bool = False
+    run_jsonl: bool = False
+    coarse_fps: float = 0.0
+    dense_margin_s: float = 2.0
+    validate_full: bool = False
     use_tqdm: Optional[bool] = None
     log_fn: Optional[Callable[[str], None]] = None
     run_id: Optional[str] = None
@@ -54,5 +63,9 @@ class ReportConfig:
         args.device_mode = self.device_mode
         args.half = self.half
         args.allow_network = self.allow_network
+        args.run_jsonl = self.run_jsonl
+        args.coarse_fps = self.coarse_fps
+        args.dense_margin_s = self.dense_margin_s
+        args.validate_full = self.validate_full
         for key, value in self.overrides.items():
             setattr(args, key, value)
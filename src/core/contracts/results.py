@@ -10,7 +10,7 @@ class ReportExportResult:
     reports_dir: str
     report_dir: str
     report_json: str
-    run_jsonl: str
+    run_jsonl: Optional[str]
     run_id: Optional[str] = None
     docx_path: Optional[str] = None
     overlay_path: Optional[str] = None
@@ -18,3 +18,4 @@ class ReportExportResult:
     export_log: Optional[str] = None
     frames_meta_path: Optional[str] = None
     last_fps: Optional[float] = None
+    run_log: Optional[str] = None
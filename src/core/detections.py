@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+NO_TRACK = -1
+
+LabelTable = Tuple[str, ...]
+
+
+@dataclass
+class Box:
+    label: str
+    conf: float
+    xyxy: Tuple[float, float, float, float]
+    track_id: Optional[int] = None
+
+
+def label_table(names: Union[Mapping[int, str], Sequence[str]]) -> LabelTable:
+    if isinstance(names, Mapping):
+        if not names:
+            return ()
+        size = max(int(k) for k in names) + 1
+        return tuple(str(names.get(i, i)) for i in range(size))
+    return tuple(str(name) for name in names)
+
+
+def _to_numpy(values: Any) -> Optional[np.ndarray]:
+    if values is None:
+        return None
+    if hasattr(values, "cpu"):
+        values = values.cpu()
+    if hasattr(values, "numpy"):
+        values = values.numpy()
+    return np.asarray(values)
+
+
+class Detections:
+    __slots__ = ("xyxy", "conf", "class_id", "track_id", "labels")
+
+    def __init__(
+        self,
+        xyxy: np.ndarray,
+        conf: np.ndarray,
+        class_id: np.ndarray,
+        track_id: Optional[np.ndarray] = None,
+        labels: LabelTable = (),
+    ) -> None:
+        n = int(conf.shape[0])
+        self.xyxy = np.ascontiguousarray(xyxy, dtype=np.float32).reshape(n, 4)
+        self.conf = np.ascontiguousarray(conf, dtype=np.float32)
+        self.class_id = np.ascontiguousarray(class_id, dtype=np.int32)
+        if track_id is None:
+            self.track_id = np.full(n, NO_TRACK, dtype=np.int64)
+        else:
+            self.track_id = np.ascontiguousarray(track_id, dtype=np.int64)
+        self.labels = labels
+
+    @classmethod
+    def empty(cls, labels: LabelTable = ()) -> "Detections":
+        return cls(
+            np.zeros((0, 4), dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int32),
+            labels=labels,
+        )
+
+    @classmethod
+    def from_yolo(cls, boxes: Any, labels: LabelTable, *, with_tracks: bool = False) -> "Detections":
+        if boxes is None or getattr(boxes, "cls", None) is None:
+            return cls.empty(labels)
+        conf = _to_numpy(boxes.conf)
+        track_id = None
+        if with_tracks:
+            ids = _to_numpy(getattr(boxes, "id", None))
+            track_id = ids.astype(np.int64) if ids is not None else None
+        return cls(_to_numpy(boxes.xyxy), conf, _to_numpy(boxes.cls).astype(np.int32), track_id, labels)
+
+    @classmethod
+    def from_boxes(cls, boxes: Iterable[Box], labels: Optional[LabelTable] = None) -> "Detections":
+        boxes = list(boxes)
+        table = list(labels) if labels is not None else []
+        index = {name: i for i, name in enumerate(table)}
+        class_id = []
+        for box in boxes:
+            idx = index.get(box.label)
+            if idx is None:
+                idx = index[box.label] = len(table)
+                table.append(box.label)
+            class_id.append(idx)
+        n = len(boxes)
+        return cls(
+            np.asarray([box.xyxy for box in boxes], dtype=np.float32).reshape(n, 4),
+            np.asarray([box.conf for box in boxes], dtype=np.float32),
+            np.asarray(class_id, dtype=np.int32),
+            np.asarray([NO_TRACK if box.track_id is None else box.track_id for box in boxes], dtype=np.int64),
+            tuple(table),
+        )
+
+    def __len__(self) -> int:
+        return int(self.conf.shape[0])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[Box]:
+        return iter(self.to_boxes())
+
+    def __getitem__(self, index: int) -> Box:
+        return self.to_boxes()[index]
+
+    def __repr__(self) -> str:
+        return f"Detections(n={len(self)}, labels={self.labels!r})"
+
+    def select(self, keep: np.ndarray) -> "Detections":
+        return Detections(self.xyxy[keep], self.conf[keep], self.class_id[keep], self.track_id[keep], self.labels)
+
+    def scaled(self, sx: float, sy: float) -> "Detections":
+        if sx == 1.0 and sy == 1.0:
+            return self
+        factors = np.asarray((sx, sy, sx, sy), dtype=np.float32)
+        return Detections(self.xyxy * factors, self.conf, self.class_id, self.track_id, self.labels)
+
+    def label_names(self) -> List[str]:
+        table = self.labels
+        size = len(table)
+        return [table[i] if 0 <= i < size else str(i) for i in self.class_id.tolist()]
+
+    def max_conf_by_label(self) -> Dict[str, float]:
+        if not len(self):
+            return {}
+        classes, inverse = np.unique(self.class_id, return_inverse=True)
+        best = np.zeros(classes.shape[0], dtype=np.float32)
+        np.maximum.at(best, inverse, self.conf)
+        table = self.labels
+        return {
+            (table[c] if 0 <= c < len(table) else str(c)): float(v) for c, v in zip(classes.tolist(), best.tolist())
+        }
+
+    def class_mask(self, bit_table: np.ndarray) -> int:
+        if not len(self):
+            return 0
+        return int(np.bitwise_or.reduce(bit_table[self.class_id]))
+
+    def valid_track_ids(self) -> np.ndarray:
+        return self.track_id[self.track_id != NO_TRACK]
+
+    def to_boxes(self) -> List[Box]:
+        tracks = [None if t == NO_TRACK else t for t in self.track_id.tolist()]
+        return [
+            Box(label=label, conf=conf, xyxy=tuple(xyxy), track_id=track)
+            for label, conf, xyxy, track in zip(self.label_names(), self.conf.tolist(), self.xyxy.tolist(), tracks)
+        ]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        tracks = [None if t == NO_TRACK else t for t in self.track_id.tolist()]
+        return [
+            {"label": label, "conf": conf, "x1": x1, "y1": y1, "x2": x2, "y2": y2, "track_id": track}
+            for label, conf, (x1, y1, x2, y2), track in zip(
+                self.label_names(), self.conf.tolist(), self.xyxy.tolist(), tracks
+            )
+        ]
+
+    def to_payload(self) -> List[Dict[str, Any]]:
+        tracks = [None if t == NO_TRACK else t for t in self.track_id.tolist()]
+        return [
+            {"label": label, "conf": conf, "xyxy": xyxy, "track_id": track}
+            for label, conf, xyxy, track in zip(self.label_names(), self.conf.tolist(), self.xyxy.tolist(), tracks)
+        ]
+
+
+def as_detections(value: Any) -> Detections:
+    if isinstance(value, Detections):
+        return value
+    if not value:
+        return Detections.empty()
+    return Detections.from_boxes(value)
+
+
+def detections_payload(detections: Mapping[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    return {key: as_detections(value).to_payload() for key, value in detections.items()}
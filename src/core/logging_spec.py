@@ -6,10 +6,15 @@ LOG_ORDER = (
     "next_idx",
     "dropped",
     "t_read_ms",
+    "t_decode_ms",
+    "prefetch_fill",
     "t_drop_ms",
     "t_infer_ms",
     "t_emit_ms",
     "fps_est",
+    "pred_ms",
+    "cost_ms",
+    "lag_ms",
     "dt_ms",
     "dt_smooth_ms",
     "throughput_fps",
@@ -20,3 +20,7 @@ def get_outputs_root() -> str:
 
 def get_best_dir() -> str:
     return str(get_base_dir() / "best")
+
+
+def get_cache_dir() -> str:
+    return str(get_base_dir() / "cache")
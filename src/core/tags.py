@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+TAG_METRIC_KEYS = ("tags_c", "tags_d")
+
+
+class TagRegistry:
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self._lock = threading.Lock()
+        self._bits: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._decoded: Dict[int, Tuple[str, ...]] = {}
+        for name in names:
+            self.bit(name)
+
+    def bit(self, name: str) -> int:
+        bit = self._bits.get(name)
+        if bit is not None:
+            return bit
+        with self._lock:
+            bit = self._bits.get(name)
+            if bit is None:
+                bit = 1 << len(self._names)
+                self._names.append(name)
+                self._bits[name] = bit
+        return bit
+
+    def mask(self, names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def names(self, mask: int) -> Tuple[str, ...]:
+        decoded = self._decoded.get(mask)
+        if decoded is None:
+            decoded = tuple(sorted(name for name, bit in self._bits.items() if mask & bit))
+            self._decoded[mask] = decoded
+        return decoded
+
+    def class_bits(self, labels: Sequence[str]) -> np.ndarray:
+        return np.asarray([self.bit(name) for name in labels], dtype=np.int64)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._bits
+
+
+TAGS = TagRegistry(("close", "sampling", "blocking", "no_blocking"))
+
+CLOSE = TAGS.bit("close")
+SAMPLING = TAGS.bit("sampling")
+BLOCKING = TAGS.bit("blocking")
+NO_BLOCKING = TAGS.bit("no_blocking")
+
+
+def tag_mask(names: Iterable[str]) -> int:
+    return TAGS.mask(names)
+
+
+def tag_names(mask: int) -> Tuple[str, ...]:
+    return TAGS.names(mask)
+
+
+def metric_tag_mask(metrics: Mapping[str, Any], key: str) -> int:
+    mask = metrics.get(f"{key}_mask")
+    if mask is not None:
+        return int(mask)
+    return TAGS.mask(metrics.get(key) or ())
+
+
+def decode_tag_metrics(metrics: Mapping[str, Any]) -> Dict[str, Any]:
+    decoded = {k: v for k, v in metrics.items() if not (k.endswith("_mask") and k[:-5] in TAG_METRIC_KEYS)}
+    for key in TAG_METRIC_KEYS:
+        if f"{key}_mask" in metrics or key in metrics:
+            decoded[key] = list(tag_names(metric_tag_mask(metrics, key)))
+    return decoded
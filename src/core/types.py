@@ -1,32 +1,35 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
-
-@dataclass
-class Box:
-    label: str
-    conf: float
-    xyxy: Tuple[float, float, float, float]
-    track_id: Optional[int] = None
+from src.core.detections import Box, Detections
+from src.core.tags import tag_mask, tag_names
 
 
 @dataclass
 class PeopleRaw:
     active_ids: Set[int]
     count_raw: int
-    boxes: List[Box] = field(default_factory=list)
+    boxes: Detections = field(default_factory=Detections.empty)
     yolo_result: Optional[Any] = None
 
 
 @dataclass
 class TagsRaw:
-    tags: Set[str]
+    mask: int = 0
     conf_by_tag: Dict[str, float] = field(default_factory=dict)
-    boxes: List[Box] = field(default_factory=list)
+    boxes: Detections = field(default_factory=Detections.empty)
     yolo_result: Optional[Any] = None
 
+    @property
+    def tags(self) -> FrozenSet[str]:
+        return frozenset(tag_names(self.mask))
+
+    @classmethod
+    def from_tags(cls, tags: Iterable[str], **kwargs: Any) -> "TagsRaw":
+        return cls(mask=tag_mask(tags), **kwargs)
+
 
 @dataclass
 class PeopleStable:
@@ -36,7 +39,15 @@ class PeopleStable:
 
 @dataclass
 class TagsStable:
-    tags: Set[str]
+    mask: int = 0
+
+    @property
+    def tags(self) -> FrozenSet[str]:
+        return frozenset(tag_names(self.mask))
+
+    @classmethod
+    def from_tags(cls, tags: Iterable[str]) -> "TagsStable":
+        return cls(mask=tag_mask(tags))
 
 
 @dataclass
@@ -48,13 +59,76 @@ class StateResult:
     pause_video_t: Optional[float] = None
 
 
-@dataclass
+class FrameHandle:
+    __slots__ = ("_frame", "_on_release")
+
+    def __init__(self, frame: Any, on_release: Optional[Callable[[Any], None]] = None) -> None:
+        self._frame = frame
+        self._on_release = on_release
+
+    def get(self) -> Any:
+        return self._frame
+
+    def release(self) -> None:
+        frame = self._frame
+        self._frame = None
+        if frame is not None and self._on_release is not None:
+            self._on_release(frame)
+
+    @property
+    def released(self) -> bool:
+        return self._frame is None
+
+
 class FrameOutput:
-    frame_index: int
-    timestamp_ms: float
-    frame_bgr: Any
-    fps: Optional[float] = None
-    detections: Dict[str, List[Box]] = field(default_factory=dict)
-    state: str = "N/A"
-    state_duration_sec: Optional[float] = None
-    metrics: Dict[str, Any] = field(default_factory=dict)
+    __slots__ = (
+        "frame_index",
+        "timestamp_ms",
+        "frame",
+        "fps",
+        "detections",
+        "state",
+        "state_duration_sec",
+        "metrics",
+    )
+
+    def __init__(
+        self,
+        frame_index: int,
+        timestamp_ms: float,
+        frame_bgr: Any = None,
+        fps: Optional[float] = None,
+        detections: Optional[Dict[str, Detections]] = None,
+        state: str = "N/A",
+        state_duration_sec: Optional[float] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        *,
+        frame: Optional[FrameHandle] = None,
+    ) -> None:
+        self.frame_index = frame_index
+        self.timestamp_ms = timestamp_ms
+        self.frame = frame if frame is not None or frame_bgr is None else FrameHandle(frame_bgr)
+        self.fps = fps
+        self.detections = detections if detections is not None else {}
+        self.state = state
+        self.state_duration_sec = state_duration_sec
+        self.metrics = metrics if metrics is not None else {}
+
+    @property
+    def frame_bgr(self) -> Any:
+        return self.frame.get() if self.frame is not None else None
+
+    def release_frame(self) -> None:
+        if self.frame is not None:
+            self.frame.release()
+
+    def detach_frame(self) -> Optional[FrameHandle]:
+        handle = self.frame
+        self.frame = None
+        return handle
+
+    def __repr__(self) -> str:
+        return (
+            f"FrameOutput(frame_index={self.frame_index!r}, timestamp_ms={self.timestamp_ms!r}, "
+            f"state={self.state!r}, has_frame={self.frame is not None})"
+        )
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from src.core.config import TrackerConfig
+from src.core.detections import Detections
+
+_VEL_ALPHA = 0.5
+
+
+@dataclass
+class TrackerState:
+    ids: np.ndarray
+    boxes: np.ndarray
+    vel: np.ndarray
+    lost: np.ndarray
+    next_id: int
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(rb - lt, 0.0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def greedy_match(score: np.ndarray, min_score: float) -> Tuple[np.ndarray, np.ndarray]:
+    rows, cols = np.nonzero(score > min_score)
+    if not rows.size:
+        return rows, cols
+    order = np.argsort(-score[rows, cols], kind="stable")
+    used_rows = np.zeros(score.shape[0], dtype=bool)
+    used_cols = np.zeros(score.shape[1], dtype=bool)
+    keep_rows = []
+    keep_cols = []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if used_rows[r] or used_cols[c]:
+            continue
+        used_rows[r] = used_cols[c] = True
+        keep_rows.append(r)
+        keep_cols.append(c)
+    return np.asarray(keep_rows, dtype=np.int64), np.asarray(keep_cols, dtype=np.int64)
+
+
+class ByteTrackLite:
+    def __init__(self, cfg: TrackerConfig) -> None:
+        self.cfg = cfg
+        self.reset()
+
+    def reset(self) -> None:
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._boxes = np.zeros((0, 4), dtype=np.float32)
+        self._vel = np.zeros((0, 4), dtype=np.float32)
+        self._lost = np.zeros(0, dtype=np.int64)
+        self._next_id = 1
+
+    def snapshot(self) -> TrackerState:
+        return TrackerState(self._ids.copy(), self._boxes.copy(), self._vel.copy(), self._lost.copy(), self._next_id)
+
+    def restore(self, state: TrackerState) -> None:
+        self._ids = state.ids.copy()
+        self._boxes = state.boxes.copy()
+        self._vel = state.vel.copy()
+        self._lost = state.lost.copy()
+        self._next_id = state.next_id
+
+    def __len__(self) -> int:
+        return int(self._ids.shape[0])
+
+    def update(self, dets: Detections) -> Detections:
+        cfg = self.cfg
+        lost_before = self._lost > 0
+        if lost_before.any():
+            centre = 0.5 * (self._vel[lost_before, :2] + self._vel[lost_before, 2:])
+            self._vel[lost_before] = np.concatenate((centre, centre), axis=1)
+        pred = self._boxes + self._vel * (self._lost + 1).astype(np.float32)[:, None]
+        conf = dets.conf
+        xyxy = dets.xyxy
+        high = np.flatnonzero(conf >= cfg.track_high_thresh)
+        low = np.flatnonzero((conf >= cfg.track_low_thresh) & (conf < cfg.track_high_thresh))
+        track_of_det = np.full(len(dets), -1, dtype=np.int64)
+
+        score = iou_matrix(pred, xyxy[high])
+        if cfg.fuse_score:
+            score = score * conf[high][None, :]
+        rows, cols = greedy_match(score, 1.0 - cfg.match_thresh)
+        track_of_det[high[cols]] = rows
+
+        matched = np.zeros(len(self), dtype=bool)
+        matched[rows] = True
+        if low.size:
+            remaining = np.flatnonzero(~matched & ~lost_before)
+            rows, cols = greedy_match(iou_matrix(pred[remaining], xyxy[low]), 1.0 - cfg.low_match_thresh)
+            track_of_det[low[cols]] = remaining[rows]
+            matched[remaining[rows]] = True
+
+        det_idx = np.flatnonzero(track_of_det >= 0)
+        tracks = track_of_det[det_idx]
+        delta = xyxy[det_idx] - self._boxes[tracks]
+        steps = (self._lost[tracks] + 1).astype(np.float32)[:, None]
+        self._vel[tracks] = _VEL_ALPHA * (delta / steps) + (1.0 - _VEL_ALPHA) * self._vel[tracks]
+        self._boxes[tracks] = xyxy[det_idx]
+        self._lost[tracks] = 0
+        self._lost[~matched] += 1
+
+        out_ids = np.full(len(dets), -1, dtype=np.int64)
+        out_ids[det_idx] = self._ids[tracks]
+        alive = self._lost <= cfg.track_buffer
+        self._drop(~alive)
+
+        unmatched = high[track_of_det[high] < 0]
+        fresh = unmatched[conf[unmatched] >= cfg.new_track_thresh]
+        if fresh.size:
+            new_ids = np.arange(self._next_id, self._next_id + fresh.size, dtype=np.int64)
+            self._next_id += int(fresh.size)
+            self._ids = np.concatenate((self._ids, new_ids))
+            self._boxes = np.concatenate((self._boxes, xyxy[fresh]))
+            self._vel = np.concatenate((self._vel, np.zeros((fresh.size, 4), dtype=np.float32)))
+            self._lost = np.concatenate((self._lost, np.zeros(fresh.size, dtype=np.int64)))
+            out_ids[fresh] = new_ids
+
+        keep = out_ids >= 0
+        return Detections(xyxy[keep], conf[keep], dets.class_id[keep], out_ids[keep], dets.labels)
+
+    def _drop(self, mask: np.ndarray) -> None:
+        if not mask.any():
+            return
+        keep = ~mask
+        self._ids = self._ids[keep]
+        self._boxes = self._boxes[keep]
+        self._vel = self._vel[keep]
+        self._lost = self._lost[keep]
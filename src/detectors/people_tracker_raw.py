@@ -1,43 +1,73 @@
 from __future__ import annotations
 
-from typing import Optional, Set
+import copy
+from typing import Any, Optional
 
 from ultralytics import YOLO
 
-from src.core.config import DetectorConfig
-from src.core.types import Box, PeopleRaw
+from src.core.config import DetectorConfig, TrackerConfig
+from src.core.detections import Detections
+from src.core.types import PeopleRaw
+from src.detectors.byte_tracker import ByteTrackLite
+
+_PERSON_LABELS = ("person",)
 
 
 class PeopleTrackerRaw:
-    def __init__(self, cfg: DetectorConfig) -> None:
+    def __init__(self, cfg: DetectorConfig, tracker_cfg: Optional[TrackerConfig] = None) -> None:
         self.cfg = cfg
         self.model = YOLO(cfg.model_path)
+        backend = tracker_cfg.backend if tracker_cfg is not None else "ultralytics"
+        self.tracker = ByteTrackLite(tracker_cfg) if backend == "builtin" else None
+
+    def reset(self) -> None:
+        if self.tracker is not None:
+            self.tracker.reset()
+            return
+        predictor = getattr(self.model, "predictor", None)
+        for tracker in getattr(predictor, "trackers", None) or []:
+            tracker.reset()
+
+    def snapshot(self) -> Optional[Any]:
+        if self.tracker is not None:
+            return self.tracker.snapshot()
+        predictor = getattr(self.model, "predictor", None)
+        trackers = getattr(predictor, "trackers", None)
+        return copy.deepcopy(trackers) if trackers else None
+
+    def restore(self, trackers: Optional[Any]) -> None:
+        if self.tracker is not None:
+            if trackers is None:
+                self.tracker.reset()
+            else:
+                self.tracker.restore(trackers)
+            return
+        predictor = getattr(self.model, "predictor", None)
+        if trackers is None or predictor is None or not getattr(predictor, "trackers", None):
+            self.reset()
+            return
+        predictor.trackers = copy.deepcopy(trackers)
+
+    def replay(self, dets: Detections) -> None:
+        if self.tracker is not None:
+            self.tracker.update(dets)
+
+    def track(self, dets: Detections, yolo_result: Optional[Any] = None) -> PeopleRaw:
+        if self.tracker is not None:
+            dets = self.tracker.update(dets)
+        active_ids = set(dets.valid_track_ids().tolist())
+        return PeopleRaw(active_ids=active_ids, count_raw=len(active_ids), boxes=dets, yolo_result=yolo_result)
 
     def process(self, frame) -> PeopleRaw:
-        results = self.model.track(
-            frame,
-            persist=True,
-            conf=self.cfg.conf,
-            iou=self.cfg.iou,
-            imgsz=self.cfg.imgsz,
-            classes=[0],
-            verbose=False,
-        )
-        active_ids: Set[int] = set()
-        boxes_out: list[Box] = []
+        kwargs = dict(conf=self.cfg.conf, iou=self.cfg.iou, imgsz=self.cfg.imgsz, classes=[0], verbose=False)
+        if self.tracker is not None:
+            results = self.model.predict(frame, **kwargs)
+        else:
+            results = self.model.track(frame, persist=True, **kwargs)
         yolo_result = results[0] if results else None
-        if yolo_result is not None:
-            boxes = yolo_result.boxes
-            if boxes is not None:
-                ids = boxes.id.tolist() if boxes.id is not None else []
-                xyxy_list = boxes.xyxy.tolist() if boxes.xyxy is not None else []
-                conf_list = boxes.conf.tolist() if boxes.conf is not None else []
-                for i, xyxy in enumerate(xyxy_list):
-                    track_id = int(ids[i]) if i < len(ids) and ids[i] is not None else None
-                    if track_id is not None:
-                        active_ids.add(track_id)
-                    conf = float(conf_list[i]) if i < len(conf_list) else 0.0
-                    boxes_out.append(
-                        Box(label="person", conf=conf, xyxy=tuple(map(float, xyxy)), track_id=track_id)
-                    )
-        return PeopleRaw(active_ids=active_ids, count_raw=len(active_ids), boxes=boxes_out, yolo_result=yolo_result)
+        dets = Detections.from_yolo(
+            yolo_result.boxes if yolo_result is not None else None,
+            _PERSON_LABELS,
+            with_tracks=self.tracker is None,
+        )
+        return self.track(dets, yolo_result)
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Dict, Set
-
+import numpy as np
 from ultralytics import YOLO
 
 from src.core.config import SamplingCloseConfig
-from src.core.types import Box, TagsRaw
+from src.core.detections import Detections, label_table
+from src.core.tags import TAGS
+from src.core.types import TagsRaw
 
 
 class SamplingCloseRaw:
@@ -13,6 +14,10 @@ class SamplingCloseRaw:
         self.cfg = cfg
         self.model = YOLO(cfg.model_path)
         self.names = self.model.names
+        self._labels = label_table(self.names)
+        self._class_bits = TAGS.class_bits(self._labels)
+        min_conf = {"close": cfg.conf_close, "sampling": cfg.conf_sampling}
+        self._min_conf = np.asarray([min_conf.get(name, np.inf) for name in self._labels], dtype=np.float64)
 
     def process(self, frame) -> TagsRaw:
         results = self.model.predict(
@@ -23,23 +28,12 @@ class SamplingCloseRaw:
             max_det=self.cfg.max_det,
             verbose=False,
         )
-        tags: Set[str] = set()
-        conf_by_tag: Dict[str, float] = {}
-        boxes_out: list[Box] = []
         yolo_result = results[0] if results else None
-        if yolo_result is not None:
-            boxes = yolo_result.boxes
-            if boxes is not None and boxes.cls is not None:
-                for cls_id, conf, xyxy in zip(boxes.cls.tolist(), boxes.conf.tolist(), boxes.xyxy.tolist()):
-                    name = self.names.get(int(cls_id), str(int(cls_id)))
-                    if name not in ("close", "sampling"):
-                        continue
-                    conf_val = float(conf)
-                    if name == "close" and conf_val < self.cfg.conf_close:
-                        continue
-                    if name == "sampling" and conf_val < self.cfg.conf_sampling:
-                        continue
-                    tags.add(name)
-                    conf_by_tag[name] = max(conf_by_tag.get(name, 0.0), conf_val)
-                    boxes_out.append(Box(label=name, conf=conf_val, xyxy=tuple(map(float, xyxy))))
-        return TagsRaw(tags=tags, conf_by_tag=conf_by_tag, boxes=boxes_out, yolo_result=yolo_result)
+        dets = Detections.from_yolo(yolo_result.boxes if yolo_result is not None else None, self._labels)
+        dets = dets.select(dets.conf >= self._min_conf[dets.class_id])
+        return TagsRaw(
+            mask=dets.class_mask(self._class_bits),
+            conf_by_tag=dets.max_conf_by_label(),
+            boxes=dets,
+            yolo_result=yolo_result,
+        )
@@ -1,38 +1,123 @@
 from __future__ import annotations
 
-from typing import Optional, Set
+from typing import Iterable, Mapping, Optional, Tuple, Union
+
+import numpy as np
 
 from src.core.config import StateEngineConfig
+from src.core.tags import BLOCKING, CLOSE, NO_BLOCKING, SAMPLING, TAGS
 from src.core.types import StateResult
 
 
 class StateEngine5:
+    STATES = (
+        "CLOSE",
+        "OPEN_DANGER",
+        "OPEN_VIOLATION",
+        "OPEN_NORMAL_SAMPLING",
+        "OPEN_NORMAL_IDLE",
+        "OPEN_UNKNOWN",
+    )
+    REASONS = (
+        "close",
+        "no_blocking+sampling",
+        "no_blocking+no_sampling",
+        "blocking+sampling",
+        "blocking+no_sampling",
+        "open_missing_blocking",
+    )
+
     def __init__(self, cfg: StateEngineConfig) -> None:
         self.cfg = cfg
         self._stable: Optional[str] = None
         self._pending: Optional[str] = None
         self._pending_count = 0
 
-    def compute(self, tags: Set[str]) -> StateResult:
-        state_raw, reason = self._classify(tags)
+    def compute(self, tags: Union[int, Iterable[str]]) -> StateResult:
+        mask = tags if isinstance(tags, int) else TAGS.mask(tags)
+        state_raw, reason = self._classify(mask)
         state_5class = self._debounce(state_raw)
         return StateResult(state_raw=state_raw, state_5class=state_5class, reason=reason)
 
-    def _classify(self, tags: Set[str]) -> tuple[str, str]:
-        if "blocking" in tags and "no_blocking" in tags:
-            tags = set(tags)
-            tags.discard("blocking")
+    def update_many(self, tags: Union[np.ndarray, Mapping[str, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        state_raw = self._classify_many(tags)
+        return state_raw, self._debounce_many(state_raw)
+
+    def _classify_many(self, tags: Union[np.ndarray, Mapping[str, np.ndarray]]) -> np.ndarray:
+        if isinstance(tags, np.ndarray):
+            masks = tags.astype(np.int64, copy=False)
+            tags = {
+                "close": (masks & CLOSE) != 0,
+                "sampling": (masks & SAMPLING) != 0,
+                "blocking": (masks & BLOCKING) != 0,
+                "no_blocking": (masks & NO_BLOCKING) != 0,
+            }
+        n = 0
+        for values in tags.values():
+            n = len(values)
+            break
+        empty = np.zeros(n, dtype=bool)
+        close = np.asarray(tags.get("close", empty), dtype=bool)
+        sampling = np.asarray(tags.get("sampling", empty), dtype=bool)
+        no_blocking = np.asarray(tags.get("no_blocking", empty), dtype=bool)
+        blocking = np.asarray(tags.get("blocking", empty), dtype=bool) & ~no_blocking
+        return np.select(
+            [close, no_blocking & sampling, no_blocking, blocking & sampling, blocking],
+            [0, 1, 2, 3, 4],
+            5,
+        ).astype(np.int8)
+
+    def _debounce_many(self, state_raw: np.ndarray) -> np.ndarray:
+        n = state_raw.shape[0]
+        if n == 0:
+            return state_raw.copy()
+        if self.cfg.debounce_k <= 1:
+            self._stable = self.STATES[int(state_raw[-1])]
+            return state_raw.copy()
+
+        index = {name: code for code, name in enumerate(self.STATES)}
+        stable = index.get(self._stable, -1) if self._stable is not None else -1
+        pending = index.get(self._pending, -1) if self._pending is not None else -1
+        pending_count = self._pending_count
+        out = np.empty(n, dtype=np.int8)
+        starts = np.concatenate(([0], np.flatnonzero(state_raw[1:] != state_raw[:-1]) + 1))
+        ends = np.append(starts[1:], n)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            value = int(state_raw[start])
+            if stable < 0 or value == stable:
+                stable = value
+                pending = -1
+                pending_count = 0
+                out[start:end] = value
+                continue
+            base = pending_count if pending == value else 0
+            switch_at = start + self.cfg.debounce_k - base - 1
+            if switch_at < end:
+                out[start:switch_at] = stable
+                out[switch_at:end] = value
+                stable = value
+                pending = -1
+                pending_count = 0
+            else:
+                out[start:end] = stable
+                pending = value
+                pending_count = base + (end - start)
+        self._stable = self.STATES[stable]
+        self._pending = self.STATES[pending] if pending >= 0 else None
+        self._pending_count = pending_count
+        return out
 
-        if "close" in tags:
+    def _classify(self, mask: int) -> Tuple[str, str]:
+        if mask & CLOSE:
             return "CLOSE", "close"
 
-        if "no_blocking" in tags:
-            if "sampling" in tags:
+        if mask & NO_BLOCKING:
+            if mask & SAMPLING:
                 return "OPEN_DANGER", "no_blocking+sampling"
             return "OPEN_VIOLATION", "no_blocking+no_sampling"
 
-        if "blocking" in tags:
-            if "sampling" in tags:
+        if mask & BLOCKING:
+            if mask & SAMPLING:
                 return "OPEN_NORMAL_SAMPLING", "blocking+sampling"
             return "OPEN_NORMAL_IDLE", "blocking+no_sampling"
 
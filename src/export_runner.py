@@ -122,6 +122,9 @@ class ExportRunner(QThread):
             device_mode=device_mode,
             half=bool(self._args.half),
             allow_network=bool(self._args.allow_network),
+            coarse_fps=float(getattr(self._args, "coarse_fps", 0.0) or 0.0),
+            dense_margin_s=float(getattr(self._args, "dense_margin_s", 2.0)),
+            validate_full=bool(getattr(self._args, "validate_full", False)),
             use_tqdm=False,
             log_fn=self._log,
             run_id=self._run_id,
@@ -144,6 +147,7 @@ class ExportRunner(QThread):
             "docx": result.docx_path,
             "mp4": result.overlay_path,
             "jsonl": result.run_jsonl,
+            "run_log": result.run_log,
             "json": result.report_json,
             "pdf": result.pdf_path,
             "last_fps": result.last_fps,
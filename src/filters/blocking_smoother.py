@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Set
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
 
 from src.core.config import TagsSmootherConfig
+from src.core.tags import BLOCKING, NO_BLOCKING, TAGS
 from src.core.types import TagsRaw, TagsStable
+from src.filters.hysteresis import batch_len, hysteresis_update
 
 
 @dataclass
@@ -20,28 +24,26 @@ class BlockingSmoother:
         self._state: Dict[str, _TagState] = {
             tag: _TagState() for tag in cfg.thresholds.keys()
         }
-        self._last_active: Set[str] = set()
-        self._last_debug = {
-            "blocking_raw": False,
-            "no_blocking_raw": False,
-            "blocking_on": 0,
-            "blocking_off": 0,
-            "no_blocking_on": 0,
-            "no_blocking_off": 0,
-            "blocking_conf": 0.0,
-            "no_blocking_conf": 0.0,
-        }
+        self._slots = [
+            (TAGS.bit(tag), thresholds, self._state[tag]) for tag, thresholds in cfg.thresholds.items()
+        ]
+        self._force_mask = TAGS.mask(cfg.force_one_of or ())
+        self._last_active = 0
+        self._last_raw = 0
+        self._last_conf: Dict[str, float] = {}
+
+    @property
+    def tag_names(self) -> Tuple[str, ...]:
+        return tuple(self.cfg.thresholds.keys())
 
     def update(self, raw: TagsRaw) -> TagsStable:
-        observed = set(raw.tags)
-        raw_blocking = "blocking" in raw.tags
-        raw_no_blocking = "no_blocking" in raw.tags
-        if "blocking" in observed and "no_blocking" in observed:
-            observed.discard("blocking")
+        observed = raw.mask
+        if observed & BLOCKING and observed & NO_BLOCKING:
+            observed &= ~BLOCKING
 
-        for tag, thresholds in self.cfg.thresholds.items():
-            state = self._state[tag]
-            if tag in observed:
+        mask = 0
+        for bit, thresholds, state in self._slots:
+            if observed & bit:
                 state.on_count += 1
                 state.off_count = 0
             else:
@@ -52,23 +54,84 @@ class BlockingSmoother:
                 state.active = True
             if state.active and state.off_count >= thresholds.off_count:
                 state.active = False
+            if state.active:
+                mask |= bit
+
+        if self.cfg.force_one_of and not (mask & self._force_mask):
+            mask = self._last_active
+        if mask:
+            self._last_active = mask
+        self._last_raw = raw.mask
+        self._last_conf = raw.conf_by_tag
+        return TagsStable(mask=mask)
+
+    def update_many(
+        self,
+        observed: Mapping[str, np.ndarray],
+        conf: Optional[Mapping[str, np.ndarray]] = None,
+    ) -> Dict[str, np.ndarray]:
+        n = batch_len(observed)
+        if n == 0:
+            return {tag: np.zeros(0, dtype=bool) for tag in self.cfg.thresholds}
+        raw = {
+            tag: np.asarray(values, dtype=bool) for tag, values in observed.items() if values is not None
+        }
+        effective = dict(raw)
+        if "blocking" in raw and "no_blocking" in raw:
+            effective["blocking"] = raw["blocking"] & ~raw["no_blocking"]
+
+        active: Dict[str, np.ndarray] = {}
+        for tag, thresholds in self.cfg.thresholds.items():
+            obs = effective.get(tag)
+            if obs is None:
+                obs = np.zeros(n, dtype=bool)
+            active[tag] = hysteresis_update(self._state[tag], obs, thresholds)
 
-        tags = {tag for tag, state in self._state.items() if state.active}
-        if self.cfg.force_one_of and not (tags & self.cfg.force_one_of):
-            tags = set(self._last_active)
-        if tags:
-            self._last_active = set(tags)
-        self._last_debug = {
-            "blocking_raw": raw_blocking,
-            "no_blocking_raw": raw_no_blocking,
+        idx = np.arange(n, dtype=np.int64)
+        kept = np.zeros(n, dtype=bool)
+        keep_tags = self.cfg.force_one_of or active.keys()
+        for tag in keep_tags:
+            if tag in active:
+                kept |= active[tag]
+        last_kept = np.maximum.accumulate(np.where(kept, idx, -1))
+
+        out = active
+        if self.cfg.force_one_of:
+            prev_kept = np.empty(n, dtype=np.int64)
+            prev_kept[0] = -1
+            prev_kept[1:] = last_kept[:-1]
+            held = prev_kept >= 0
+            safe_prev = np.maximum(prev_kept, 0)
+            out = {}
+            for tag, values in active.items():
+                fallback = np.where(held, values[safe_prev], bool(self._last_active & TAGS.bit(tag)))
+                out[tag] = np.where(kept, values, fallback)
+
+        if last_kept[-1] >= 0:
+            row = int(last_kept[-1])
+            self._last_active = TAGS.mask(tag for tag, values in active.items() if values[row])
+        self._last_raw = TAGS.mask(tag for tag, values in raw.items() if values[-1])
+        self._last_conf = {tag: float(values[-1]) for tag, values in (conf or {}).items() if values is not None}
+        return out
+
+    def transition_pressure(self) -> float:
+        pressure = 0.0
+        for _bit, thresholds, state in self._slots:
+            if state.active:
+                progress = state.off_count / max(1, thresholds.off_count)
+            else:
+                progress = state.on_count / max(1, thresholds.on_count)
+            pressure = max(pressure, progress)
+        return min(1.0, pressure)
+
+    def debug_info(self) -> Dict[str, float]:
+        return {
+            "blocking_raw": bool(self._last_raw & BLOCKING),
+            "no_blocking_raw": bool(self._last_raw & NO_BLOCKING),
             "blocking_on": self._state["blocking"].on_count,
             "blocking_off": self._state["blocking"].off_count,
             "no_blocking_on": self._state["no_blocking"].on_count,
             "no_blocking_off": self._state["no_blocking"].off_count,
-            "blocking_conf": raw.conf_by_tag.get("blocking", 0.0),
-            "no_blocking_conf": raw.conf_by_tag.get("no_blocking", 0.0),
+            "blocking_conf": self._last_conf.get("blocking", 0.0),
+            "no_blocking_conf": self._last_conf.get("no_blocking", 0.0),
         }
-        return TagsStable(tags=tags)
-
-    def debug_info(self) -> Dict[str, float]:
-        return dict(self._last_debug)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.core.config import PropagatorConfig
+from src.core.detections import NO_TRACK, Detections
+from src.core.types import PeopleRaw, TagsRaw
+
+RawDetections = Tuple[Optional[PeopleRaw], Optional[TagsRaw], Optional[TagsRaw]]
+
+_STD_POS = 1.0 / 20.0
+_STD_VEL = 1.0 / 160.0
+_MAX_PREDICT_STEPS = 30
+
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8)
+
+
+def _cxcywh(box: np.ndarray) -> np.ndarray:
+    x1, y1, x2, y2 = (float(v) for v in box)
+    return np.array([(x1 + x2) * 0.5, (y1 + y2) * 0.5, x2 - x1, y2 - y1])
+
+
+class _BoxKalman:
+    __slots__ = ("x", "p")
+
+    def __init__(self, box: np.ndarray) -> None:
+        self.x = np.concatenate((_cxcywh(box), np.zeros(4)))
+        size = max(self.x[3], 1.0)
+        std = np.array([2 * _STD_POS] * 4 + [10 * _STD_VEL] * 4) * size
+        self.p = np.diag(std**2)
+
+    def predict(self, steps: int = 1) -> None:
+        for _ in range(min(max(steps, 0), _MAX_PREDICT_STEPS)):
+            size = max(self.x[3], 1.0)
+            q = np.diag((np.array([_STD_POS] * 4 + [_STD_VEL] * 4) * size) ** 2)
+            self.x = _F @ self.x
+            self.p = _F @ self.p @ _F.T + q
+
+    def update(self, box: np.ndarray, noise: float = 1.0) -> None:
+        size = max(self.x[3], 1.0)
+        r = np.eye(4) * (_STD_POS * noise * size) ** 2
+        s = _H @ self.p @ _H.T + r
+        k = self.p @ _H.T @ np.linalg.inv(s)
+        self.x = self.x + k @ (_cxcywh(box) - _H @ self.x)
+        self.p = (np.eye(8) - k @ _H) @ self.p
+
+    def box(self) -> np.ndarray:
+        cx, cy, w, h = self.x[:4]
+        w, h = max(w, 1.0), max(h, 1.0)
+        return np.array([cx - w * 0.5, cy - h * 0.5, cx + w * 0.5, cy + h * 0.5], dtype=np.float32)
+
+
+def _grid_points(boxes: np.ndarray, side: int) -> np.ndarray:
+    t = ((np.arange(side) + 0.5) / side) * 0.8 + 0.1
+    gx, gy = np.meshgrid(t, t)
+    x = boxes[:, 0:1] + (boxes[:, 2:3] - boxes[:, 0:1]) * gx.ravel()
+    y = boxes[:, 1:2] + (boxes[:, 3:4] - boxes[:, 1:2]) * gy.ravel()
+    return np.stack((x, y), axis=-1).reshape(-1, 1, 2).astype(np.float32)
+
+
+class BoxPropagator:
+    def __init__(self, cfg: PropagatorConfig) -> None:
+        self.cfg = cfg
+        self.reset()
+
+    def reset(self) -> None:
+        self._prev_gray: Optional[np.ndarray] = None
+        self._scale = (1.0, 1.0)
+        self._raw: RawDetections = (None, None, None)
+        self._boxes: List[Optional[np.ndarray]] = [None, None, None]
+        self._weights: List[Optional[np.ndarray]] = [None, None, None]
+        self._tracks: Dict[int, _BoxKalman] = {}
+        self._frame_index = 0
+        self.confidence = 0.0
+        self.age = 0
+
+    @property
+    def active(self) -> bool:
+        return self._prev_gray is not None
+
+    def needs_detection(self) -> bool:
+        cfg = self.cfg
+        if self._prev_gray is None or self.confidence < cfg.min_confidence:
+            return True
+        return cfg.max_age > 0 and self.age >= cfg.max_age
+
+    def _gray(self, frame: Any, box_scale: Tuple[float, float]) -> Tuple[np.ndarray, Tuple[float, float]]:
+        height, width = frame.shape[:2]
+        side = self.cfg.flow_side
+        factor = min(1.0, side / max(height, width)) if side else 1.0
+        if factor < 1.0:
+            size = (max(1, int(round(width * factor))), max(1, int(round(height * factor))))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return gray, (box_scale[0] * width / gray.shape[1], box_scale[1] * height / gray.shape[0])
+
+    def observe(
+        self, frame: Any, frame_index: int, raw: RawDetections, box_scale: Tuple[float, float] = (1.0, 1.0)
+    ) -> None:
+        self._prev_gray, self._scale = self._gray(frame, box_scale)
+        self._raw = tuple(  # type: ignore[assignment]
+            replace(item, yolo_result=None) if item is not None and item.yolo_result is not None else item
+            for item in raw
+        )
+        self._boxes = [item.boxes.xyxy.copy() if item is not None else None for item in self._raw]
+        self._weights = [np.ones(len(item.boxes), dtype=np.float32) if item is not None else None for item in self._raw]
+        steps = frame_index - self._frame_index
+        tracks: Dict[int, _BoxKalman] = {}
+        people = self._raw[0]
+        if people is not None:
+            for box, track_id in zip(people.boxes.xyxy, people.boxes.track_id.tolist()):
+                if track_id == NO_TRACK:
+                    continue
+                track = self._tracks.get(track_id)
+                if track is None:
+                    track = _BoxKalman(box)
+                else:
+                    track.predict(steps)
+                    track.update(box)
+                tracks[track_id] = track
+        self._tracks = tracks
+        self._frame_index = frame_index
+        self.confidence = 1.0
+        self.age = 0
+
+    def _flow(self, gray: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cfg = self.cfg
+        side = max(1, int(cfg.grid))
+        scale = np.asarray(self._scale * 2, dtype=np.float32)
+        points = _grid_points(boxes / scale, side)
+        params = dict(winSize=(cfg.win_size, cfg.win_size), maxLevel=2)
+        moved, status, _err = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None, **params)
+        back, back_status, _err = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, moved, None, **params)
+        fb_error = np.linalg.norm((back - points).reshape(-1, 2), axis=1)
+        ok = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < cfg.max_fb_error)
+        ok = ok.reshape(len(boxes), side * side)
+        delta = (moved - points).reshape(len(boxes), side * side, 2)
+        count = ok.sum(axis=1)
+        ranked = np.sort(np.where(ok[..., None], delta, np.nan), axis=1)
+        lo = np.maximum(count - 1, 0)[:, None, None] // 2
+        hi = (count // 2)[:, None, None]
+        shift = 0.5 * (np.take_along_axis(ranked, lo, axis=1) + np.take_along_axis(ranked, hi, axis=1))[:, 0]
+        shift = np.where(count[:, None] > 0, shift, 0.0) * scale[:2]
+        quality = count / float(side * side)
+        return np.concatenate((shift, shift), axis=1), quality
+
+    def propagate(
+        self, frame: Any, frame_index: int, box_scale: Tuple[float, float] = (1.0, 1.0)
+    ) -> RawDetections:
+        cfg = self.cfg
+        if self._prev_gray is None:
+            return self._raw
+        steps = frame_index - self._frame_index
+        self._frame_index = frame_index
+        self.age += max(steps, 1)
+        counts = [len(boxes) if boxes is not None else 0 for boxes in self._boxes]
+        if not sum(counts):
+            self.confidence *= cfg.decay ** max(steps, 1)
+            return self._raw
+        gray, scale = self._gray(frame, box_scale)
+        if gray.shape != self._prev_gray.shape or scale != self._scale:
+            self.confidence = 0.0
+            return self._raw
+        boxes = np.concatenate([b for b in self._boxes if b is not None and len(b)])
+        shift, quality = self._flow(gray, boxes)
+        self._prev_gray = gray
+        factor = (cfg.decay ** max(steps, 1)) * np.minimum(1.0, quality / max(cfg.min_quality, 1e-6))
+        outputs: List[Any] = []
+        offset = 0
+        for slot, item in enumerate(self._raw):
+            if item is None:
+                outputs.append(None)
+                continue
+            n = counts[slot]
+            moved = self._boxes[slot] + shift[offset : offset + n]
+            weights = self._weights[slot] * factor[offset : offset + n]
+            if slot == 0:
+                for i, track_id in enumerate(item.boxes.track_id.tolist()):
+                    track = self._tracks.get(track_id)
+                    if track is None:
+                        continue
+                    track.predict(steps)
+                    q = quality[offset + i]
+                    if q >= cfg.min_quality:
+                        track.update(moved[i], noise=1.0 + 4.0 * (1.0 - q))
+                    moved[i] = track.box()
+            self._boxes[slot] = moved
+            self._weights[slot] = weights
+            dets = item.boxes
+            outputs.append(
+                replace(item, boxes=Detections(moved, dets.conf * weights, dets.class_id, dets.track_id, dets.labels))
+            )
+            offset += n
+        self.confidence = float(min(w.min() for w in self._weights if w is not None and len(w)))
+        return tuple(outputs)  # type: ignore[return-value]
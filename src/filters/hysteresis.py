@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, Tuple
+
+import numpy as np
+
+from src.core.config import TagHysteresis
+
+
+def run_lengths(observed: np.ndarray, on0: int, off0: int) -> Tuple[np.ndarray, np.ndarray]:
+    observed = np.asarray(observed, dtype=bool)
+    n = observed.shape[0]
+    if n == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    idx = np.arange(n, dtype=np.int64)
+    change = np.empty(n, dtype=bool)
+    change[0] = True
+    np.not_equal(observed[1:], observed[:-1], out=change[1:])
+    start = np.maximum.accumulate(np.where(change, idx, 0))
+    length = idx - start + 1
+    carry = on0 if observed[0] else off0
+    if carry:
+        length[start == 0] += carry
+    on_count = np.where(observed, length, 0)
+    off_count = np.where(observed, 0, length)
+    return on_count, off_count
+
+
+def latch(set_mask: np.ndarray, reset_mask: np.ndarray, initial: bool) -> np.ndarray:
+    n = set_mask.shape[0]
+    event = set_mask | reset_mask
+    last = np.maximum.accumulate(np.where(event, np.arange(n, dtype=np.int64), -1))
+    value = set_mask & ~reset_mask
+    return np.where(last >= 0, value[np.maximum(last, 0)], initial)
+
+
+def hysteresis_many(
+    observed: np.ndarray,
+    *,
+    active: bool,
+    on_count: int,
+    off_count: int,
+    on_threshold: int,
+    off_threshold: int,
+) -> Tuple[np.ndarray, int, int]:
+    on_counts, off_counts = run_lengths(observed, on_count, off_count)
+    if on_counts.shape[0] == 0:
+        return np.zeros(0, dtype=bool), on_count, off_count
+    turn_off = off_counts >= off_threshold
+    turn_on = (on_counts >= on_threshold) & ~turn_off
+    out = latch(turn_on, turn_off, active)
+    return out, int(on_counts[-1]), int(off_counts[-1])
+
+
+def hysteresis_update(state: Any, observed: np.ndarray, thresholds: TagHysteresis) -> np.ndarray:
+    out, state.on_count, state.off_count = hysteresis_many(
+        observed,
+        active=state.active,
+        on_count=state.on_count,
+        off_count=state.off_count,
+        on_threshold=thresholds.on_count,
+        off_threshold=thresholds.off_count,
+    )
+    if out.shape[0]:
+        state.active = bool(out[-1])
+    return out
+
+
+def batch_len(observed: Mapping[str, np.ndarray]) -> int:
+    for values in observed.values():
+        if values is not None:
+            return len(values)
+    return 0
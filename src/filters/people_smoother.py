@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from collections import Counter, deque
-from typing import Deque, Dict, Set
+from typing import Deque, Dict, Iterable, List, Set, Tuple
+
+import numpy as np
 
 from src.core.config import PeopleSmootherConfig
 from src.core.types import PeopleRaw, PeopleStable
@@ -12,57 +14,169 @@ class PeopleSmoother:
         self.cfg = cfg
         self._last_seen: Dict[int, int] = {}
         self._hits: Dict[int, int] = {}
+        self._seen_at: Dict[int, Set[int]] = {}
+        self._counted: Set[int] = set()
+        self._expired: List[int] = []
         self._history: Deque[int] = deque(maxlen=cfg.window_size)
-        self._vote_window: Deque[int] = deque(maxlen=25)
+        self._history_counts: Counter = Counter()
+        self._vote_window: Deque[int] = deque(maxlen=cfg.vote_window)
+        self._vote_counts: Counter = Counter()
         self._frame_index = 0
         self._stable_count = 0
         self._candidate_count = None
         self._candidate_hits = 0
-        self._last_debug: Dict[int, Dict[str, int]] = {}
-        self._last_active_ids: Set[int] = set()
         self._p2 = 0.0
         self._p_other = 0.0
         self._out_counter = 0
         self._back_counter = 0
 
     def update(self, raw: PeopleRaw) -> PeopleStable:
-        self._frame_index += 1
-        for tid in raw.active_ids:
-            self._last_seen[tid] = self._frame_index
-            self._hits[tid] = self._hits.get(tid, 0) + 1
-
-        active_ids: Set[int] = set()
-        active_ids_for_count: Set[int] = set()
-        self._last_debug = {}
-        for tid, last_seen in list(self._last_seen.items()):
-            age = self._frame_index - last_seen
-            hits = self._hits.get(tid, 0)
-            if age <= self.cfg.max_id_age:
-                active_ids.add(tid)
-                is_counted = age <= self.cfg.active_id_age and hits >= self.cfg.min_track_hits
-                if is_counted:
-                    active_ids_for_count.add(tid)
-            else:
-                del self._last_seen[tid]
-                self._hits.pop(tid, None)
-                age = self.cfg.max_id_age + 1
-                hits = 0
-                is_counted = False
-            self._last_debug[tid] = {"age": age, "hits": hits, "counted": int(is_counted)}
-
-        self._last_active_ids = set(active_ids_for_count)
-        count_raw = len(active_ids_for_count)
-        self._history.append(count_raw)
+        count_raw = self._observe(raw.active_ids)
+        _push_counted(self._history, self._history_counts, count_raw)
         stable = self._apply_visual_vote(count_raw)
         people_ok = stable == self.cfg.expected_people
         return PeopleStable(people_count_stable=stable, people_ok=people_ok)
 
+    def update_many(self, track_ids: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        bounds = np.asarray(offsets, dtype=np.int64)
+        n = max(0, len(bounds) - 1)
+        if self._frame_index:
+            ids = np.asarray(track_ids).tolist()
+            counts = np.empty(n, dtype=np.int64)
+            for i in range(n):
+                counts[i] = self._observe(ids[bounds[i]:bounds[i + 1]])
+        else:
+            counts = self._observe_many(np.asarray(track_ids, dtype=np.int64), bounds, n)
+        for value in counts[-self.cfg.window_size:].tolist():
+            _push_counted(self._history, self._history_counts, value)
+        stable = self._vote_many(counts)
+        return stable, stable == self.cfg.expected_people
+
+    def _observe_many(self, ids: np.ndarray, bounds: np.ndarray, n: int) -> np.ndarray:
+        cfg = self.cfg
+        self._frame_index = n
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        frames = np.repeat(np.arange(1, n + 1, dtype=np.int64), np.diff(bounds))
+        ids = ids[bounds[0]:bounds[-1]]
+        order = np.lexsort((frames, ids))
+        ids, frames = ids[order], frames[order]
+        if ids.size:
+            unique = np.ones(ids.size, dtype=bool)
+            unique[1:] = (ids[1:] != ids[:-1]) | (frames[1:] != frames[:-1])
+            ids, frames = ids[unique], frames[unique]
+        same = np.zeros(ids.size, dtype=bool)
+        same[1:] = ids[1:] == ids[:-1]
+        gaps = np.zeros(ids.size, dtype=np.int64)
+        gaps[1:] = frames[1:] - frames[:-1]
+        starts = np.flatnonzero(~same | (gaps >= cfg.max_id_age + 2))
+        segment = np.cumsum(~same | (gaps >= cfg.max_id_age + 2)) - 1
+        hits = np.arange(ids.size) - starts[segment] + 1 if ids.size else np.zeros(0, dtype=np.int64)
+        last = np.ones(ids.size, dtype=bool)
+        last[:-1] = ~same[1:]
+
+        window = min(cfg.active_id_age, cfg.max_id_age)
+        counts = np.zeros(n + 2, dtype=np.int64)
+        if window >= 0:
+            following = np.where(last, n + 1, np.roll(frames, -1))
+            end = np.minimum(np.minimum(frames + window, following - 1), n)
+            active = hits >= cfg.min_track_hits
+            np.add.at(counts, frames[active], 1)
+            np.add.at(counts, end[active] + 1, -1)
+        counts = np.cumsum(counts)[1 : n + 1]
+
+        alive = last & (frames >= n - cfg.max_id_age)
+        self._last_seen = dict(zip(ids[alive].tolist(), frames[alive].tolist()))
+        self._hits = dict(zip(ids[alive].tolist(), hits[alive].tolist()))
+        self._seen_at = {}
+        for tid, frame in self._last_seen.items():
+            self._seen_at.setdefault(frame, set()).add(tid)
+        counted = alive & (hits >= cfg.min_track_hits) & (frames >= n - window)
+        self._counted = set(ids[counted].tolist()) if window >= 0 else set()
+        self._expired = ids[last & (frames == n - cfg.max_id_age - 1)].tolist()
+        return counts
+
+    def _vote_many(self, counts: np.ndarray) -> np.ndarray:
+        cfg = self.cfg
+        expected = cfg.expected_people
+        window = list(self._vote_window)
+        values = np.concatenate((np.asarray(window, dtype=np.int64), counts))
+        n, size = counts.shape[0], max(1, cfg.vote_window)
+        stable = np.empty(n, dtype=np.int64)
+        if n == 0:
+            return stable
+        width = int(values.max()) + 1 if values.size else 1
+        cumulative = np.zeros((values.shape[0] + 1, width), dtype=np.int64)
+        np.cumsum(np.eye(width, dtype=np.int64)[values], axis=0, out=cumulative[1:])
+        end = np.arange(len(window) + 1, values.shape[0] + 1)
+        begin = np.maximum(end - size, 0)
+        freq = cumulative[end] - cumulative[begin]
+        total = end - begin
+        count_expected = freq[:, expected].copy() if expected < width else np.zeros(n, dtype=np.int64)
+        if expected < width:
+            freq[:, expected] = 0
+        best = width - 1 - np.argmax(freq[:, ::-1], axis=1)
+        has_other = freq[np.arange(n), best] > 0
+
+        obs_list = counts.tolist()
+        expected_list = count_expected.tolist()
+        total_list = total.tolist()
+        best_list = best.tolist()
+        other_list = has_other.tolist()
+        for i in range(n):
+            p2 = expected_list[i] / total_list[i]
+            candidate = self._stable_count or obs_list[i]
+            if p2 >= cfg.vote_accept_expected:
+                candidate = expected
+            elif 1.0 - p2 >= cfg.vote_accept_other and other_list[i]:
+                candidate = best_list[i]
+            stable[i] = self._settle(candidate)
+        self._p2 = expected_list[-1] / total_list[-1]
+        self._p_other = 1.0 - self._p2
+        for value in counts[-size:].tolist():
+            _push_counted(self._vote_window, self._vote_counts, value)
+        return stable
+
+    def _observe(self, active_ids: Iterable[int]) -> int:
+        self._frame_index += 1
+        frame = self._frame_index
+        window = min(self.cfg.active_id_age, self.cfg.max_id_age)
+        min_hits = self.cfg.min_track_hits
+        seen_now = self._seen_at.get(frame)
+        for tid in active_ids:
+            prev = self._last_seen.get(tid)
+            if prev == frame:
+                continue
+            if prev is not None:
+                self._seen_at[prev].discard(tid)
+            if seen_now is None:
+                seen_now = self._seen_at[frame] = set()
+            seen_now.add(tid)
+            self._last_seen[tid] = frame
+            hits = self._hits.get(tid, 0) + 1
+            self._hits[tid] = hits
+            if hits >= min_hits and window >= 0:
+                self._counted.add(tid)
+
+        expired = self._seen_at.pop(frame - self.cfg.max_id_age - 1, None)
+        if expired:
+            for tid in expired:
+                del self._last_seen[tid]
+                self._hits.pop(tid, None)
+                self._counted.discard(tid)
+            self._expired = list(expired)
+        elif self._expired:
+            self._expired = []
+        if window < self.cfg.max_id_age:
+            for tid in self._seen_at.get(frame - window - 1, ()):
+                self._counted.discard(tid)
+        return len(self._counted)
+
     def _mode_with_recent_tiebreak(self) -> int:
         if not self._history:
             return 0
-        counter = Counter(self._history)
-        max_freq = max(counter.values())
-        candidates = {val for val, freq in counter.items() if freq == max_freq}
+        max_freq = max(self._history_counts.values())
+        candidates = {val for val, freq in self._history_counts.items() if freq == max_freq}
         for val in reversed(self._history):
             if val in candidates:
                 return val
@@ -95,31 +209,29 @@ class PeopleSmoother:
         return self._stable_count
 
     def _apply_visual_vote(self, obs_count: int) -> int:
-        vote_window_n = 25
-        p_accept_2 = 0.60
-        p_accept_other = 0.80
-        hold_out = 20
-        hold_back = 8
-
-        self._vote_window.append(obs_count)
-        if not self._vote_window:
-            return self._stable_count or obs_count
-
-        counter = Counter(self._vote_window)
+        cfg = self.cfg
+        _push_counted(self._vote_window, self._vote_counts, obs_count)
+        counter = self._vote_counts
         total = len(self._vote_window)
         count_2 = counter.get(self.cfg.expected_people, 0)
         self._p2 = count_2 / total
         self._p_other = 1.0 - self._p2
 
         candidate = self._stable_count or obs_count
-        if self._p2 >= p_accept_2:
+        if self._p2 >= cfg.vote_accept_expected:
             candidate = self.cfg.expected_people
-        elif self._p_other >= p_accept_other:
-            non2 = {k: v for k, v in counter.items() if k != self.cfg.expected_people}
-            if non2:
-                candidate = max(non2.items(), key=lambda kv: (kv[1], kv[0]))[0]
-        self._candidate_count = candidate
+        elif self._p_other >= cfg.vote_accept_other:
+            best = None
+            for value, freq in counter.items():
+                if value != self.cfg.expected_people and (best is None or (freq, value) > best):
+                    best = (freq, value)
+            if best is not None:
+                candidate = best[1]
+        return self._settle(candidate)
 
+    def _settle(self, candidate: int) -> int:
+        cfg = self.cfg
+        self._candidate_count = candidate
         if self._stable_count == 0:
             self._stable_count = candidate
             return self._stable_count
@@ -132,7 +244,7 @@ class PeopleSmoother:
         if self._stable_count == self.cfg.expected_people and candidate != self.cfg.expected_people:
             self._out_counter += 1
             self._back_counter = 0
-            if self._out_counter >= hold_out:
+            if self._out_counter >= cfg.vote_hold_out:
                 self._stable_count = candidate
                 self._out_counter = 0
             return self._stable_count
@@ -140,7 +252,7 @@ class PeopleSmoother:
         if self._stable_count != self.cfg.expected_people and candidate == self.cfg.expected_people:
             self._back_counter += 1
             self._out_counter = 0
-            if self._back_counter >= hold_back:
+            if self._back_counter >= cfg.vote_hold_back:
                 self._stable_count = candidate
                 self._back_counter = 0
             return self._stable_count
@@ -150,17 +262,40 @@ class PeopleSmoother:
         self._stable_count = candidate
         return self._stable_count
 
+    def _debug_entries(self) -> Dict[int, Dict[str, int]]:
+        entries: Dict[int, Dict[str, int]] = {}
+        for tid, last_seen in self._last_seen.items():
+            entries[tid] = {
+                "age": self._frame_index - last_seen,
+                "hits": self._hits.get(tid, 0),
+                "counted": int(tid in self._counted),
+            }
+        for tid in self._expired:
+            entries[tid] = {"age": self.cfg.max_id_age + 1, "hits": 0, "counted": 0}
+        return entries
+
     def debug_string(self, max_ids: int = 8) -> str:
+        entries = self._debug_entries()
         info = f"p2={self._p2:.2f} p_other={self._p_other:.2f} cand={self._candidate_count} stable={self._stable_count} out={self._out_counter} back={self._back_counter}"
-        if not self._last_debug:
+        if not entries:
             return f"{info} | IDs: none"
         parts = []
-        for tid in sorted(self._last_debug.keys())[:max_ids]:
-            info = self._last_debug[tid]
+        for tid in sorted(entries.keys())[:max_ids]:
+            info = entries[tid]
             mark = "*" if info["counted"] else ""
             parts.append(f"{tid}({info['age']}/{info['hits']}){mark}")
-        more = " ..." if len(self._last_debug) > max_ids else ""
+        more = " ..." if len(entries) > max_ids else ""
         return f"{info} | IDs: {', '.join(parts)}{more}"
 
     def active_ids(self) -> Set[int]:
-        return set(self._last_active_ids)
+        return set(self._counted)
+
+
+def _push_counted(window: Deque[int], counts: Counter, value: int) -> None:
+    if window.maxlen is not None and len(window) == window.maxlen:
+        old = window[0]
+        counts[old] -= 1
+        if counts[old] <= 0:
+            del counts[old]
+    window.append(value)
+    counts[value] += 1
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Set
+from typing import Dict, Mapping, Optional, Tuple
 
-from src.core.config import TagHysteresis, TagsSmootherConfig
+import numpy as np
+
+from src.core.config import TagsSmootherConfig
+from src.core.tags import CLOSE, SAMPLING, TAGS
 from src.core.types import TagsRaw, TagsStable
+from src.filters.hysteresis import batch_len, hysteresis_update
 
 
 @dataclass
@@ -21,22 +25,20 @@ class SamplingCloseSmoother:
         self._state: Dict[str, _TagState] = {
             tag: _TagState() for tag in cfg.thresholds.keys()
         }
-        self._last_debug = {
-            "close_raw": False,
-            "sampling_raw": False,
-            "close_on": 0,
-            "close_off": 0,
-            "sampling_on": 0,
-            "sampling_off": 0,
-            "close_conf": 0.0,
-            "sampling_conf": 0.0,
-        }
+        self._slots = [
+            (tag, TAGS.bit(tag), thresholds, self._state[tag]) for tag, thresholds in cfg.thresholds.items()
+        ]
+        self._last_observed = 0
+
+    @property
+    def tag_names(self) -> Tuple[str, ...]:
+        return tuple(self.cfg.thresholds.keys())
 
     def update(self, raw: TagsRaw) -> TagsStable:
-        observed = raw.tags
-        for tag, thresholds in self.cfg.thresholds.items():
-            state = self._state[tag]
-            if tag in observed:
+        observed = raw.mask
+        mask = 0
+        for tag, bit, thresholds, state in self._slots:
+            if observed & bit:
                 state.on_count += 1
                 state.off_count = 0
             else:
@@ -48,22 +50,43 @@ class SamplingCloseSmoother:
                 state.active = True
             if state.active and state.off_count >= thresholds.off_count:
                 state.active = False
+            if state.active:
+                mask |= bit
 
-        tags = {tag for tag, state in self._state.items() if state.active}
-        self._last_debug = {
-            "close_raw": "close" in observed,
-            "sampling_raw": "sampling" in observed,
-            "close_on": self._state["close"].on_count,
-            "close_off": self._state["close"].off_count,
-            "sampling_on": self._state["sampling"].on_count,
-            "sampling_off": self._state["sampling"].off_count,
-            "close_conf": self._state["close"].conf_max,
-            "sampling_conf": self._state["sampling"].conf_max,
-        }
-        return TagsStable(tags=tags)
+        self._last_observed = observed
+        return TagsStable(mask=mask)
+
+    def update_many(
+        self,
+        observed: Mapping[str, np.ndarray],
+        conf: Optional[Mapping[str, np.ndarray]] = None,
+    ) -> Dict[str, np.ndarray]:
+        n = batch_len(observed)
+        out: Dict[str, np.ndarray] = {}
+        for tag, thresholds in self.cfg.thresholds.items():
+            state = self._state[tag]
+            obs = observed.get(tag)
+            obs = np.zeros(n, dtype=bool) if obs is None else np.asarray(obs, dtype=bool)
+            out[tag] = hysteresis_update(state, obs, thresholds)
+            if n:
+                tag_conf = conf.get(tag) if conf is not None else None
+                state.conf_max = float(tag_conf[-1]) if tag_conf is not None else 0.0
+        if n:
+            self._last_observed = TAGS.mask(tag for tag, obs in observed.items() if obs is not None and obs[-1])
+        return out
+
+    def transition_pressure(self) -> float:
+        pressure = 0.0
+        for _tag, _bit, thresholds, state in self._slots:
+            if state.active:
+                progress = state.off_count / max(1, thresholds.off_count)
+            else:
+                progress = state.on_count / max(1, thresholds.on_count)
+            pressure = max(pressure, progress)
+        return min(1.0, pressure)
 
     def debug_string(self) -> str:
-        d = self._last_debug
+        d = self.debug_info()
         return (
             "C raw(close/sampling)="
             f"{int(d['close_raw'])}/{int(d['sampling_raw'])} "
@@ -73,4 +96,16 @@ class SamplingCloseSmoother:
         )
 
     def debug_info(self) -> Dict[str, float]:
-        return dict(self._last_debug)
+        close = self._state["close"]
+        sampling = self._state["sampling"]
+        return {
+            "close_raw": bool(self._last_observed & CLOSE),
+            "sampling_raw": bool(self._last_observed & SAMPLING),
+            "close_on": close.on_count,
+            "close_off": close.off_count,
+            "sampling_on": sampling.on_count,
+            "sampling_off": sampling.off_count,
+            "close_conf": close.conf_max,
+            "sampling_conf": sampling.conf_max,
+        }
+
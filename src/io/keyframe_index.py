@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+import cv2
+import numpy as np
+
+from src.core.paths import get_cache_dir
+from src.io.source_info import SourceKey, source_key
+
+INDEX_VERSION = 1
+
+_cache: Dict[SourceKey, "KeyframeIndex"] = {}
+_building: Set[SourceKey] = set()
+_lock = threading.Lock()
+
+
+@dataclass
+class KeyframeIndex:
+    keyframes: np.ndarray
+    timestamps_ms: np.ndarray
+
+    @property
+    def frame_count(self) -> int:
+        return int(self.timestamps_ms.shape[0])
+
+    def keyframe_before(self, frame_index: int) -> int:
+        if not self.keyframes.size:
+            return 0
+        pos = int(np.searchsorted(self.keyframes, frame_index, side="right")) - 1
+        return int(self.keyframes[pos]) if pos >= 0 else 0
+
+    def timestamp_ms(self, frame_index: int) -> Optional[float]:
+        if 0 <= frame_index < self.timestamps_ms.shape[0]:
+            return float(self.timestamps_ms[frame_index])
+        return None
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            version=np.int64(INDEX_VERSION),
+            keyframes=self.keyframes,
+            timestamps_ms=self.timestamps_ms,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["KeyframeIndex"]:
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return None
+                return cls(
+                    keyframes=data["keyframes"].astype(np.int64),
+                    timestamps_ms=data["timestamps_ms"].astype(np.float64),
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def build_keyframe_index(path: str) -> Optional[KeyframeIndex]:
+    if not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+        return None
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            return None
+        keyframes: List[int] = []
+        timestamps: List[float] = []
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(len(timestamps))
+            timestamps.append(float(cap.get(cv2.CAP_PROP_POS_MSEC)))
+    finally:
+        cap.release()
+    if not timestamps:
+        return None
+    return KeyframeIndex(
+        keyframes=np.asarray(keyframes or [0], dtype=np.int64),
+        timestamps_ms=np.sort(np.asarray(timestamps, dtype=np.float64)),
+    )
+
+
+def index_path(key: SourceKey) -> str:
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_dir(), "keyframes", f"{digest}.npz")
+
+
+def _build_in_background(path: str, key: SourceKey) -> None:
+    try:
+        index = build_keyframe_index(path)
+        if index is None:
+            return
+        try:
+            index.save(index_path(key))
+        except OSError:
+            pass
+        with _lock:
+            _cache[key] = index
+    finally:
+        with _lock:
+            _building.discard(key)
+
+
+def keyframe_index(path: str, *, build: bool = False) -> Optional[KeyframeIndex]:
+    key = source_key(path)
+    if key is None:
+        return None
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+    index = KeyframeIndex.load(index_path(key))
+    if index is not None:
+        with _lock:
+            _cache[key] = index
+        return index
+    if build:
+        with _lock:
+            if key in _building:
+                return None
+            _building.add(key)
+        thread = threading.Thread(
+            target=_build_in_background, args=(path, key), name="KeyframeIndex", daemon=True
+        )
+        thread.start()
+    return None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+KEYFRAME_SCAN_PACKETS = 300
+
+SourceKey = Tuple[str, float, int]
+
+_cache: Dict[SourceKey, "SourceInfo"] = {}
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class SourceInfo:
+    path: str
+    opened: bool
+    fps: Optional[float] = None
+    frame_count: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    codec: Optional[str] = None
+    keyframe_interval: Optional[int] = None
+
+    @property
+    def size(self) -> Optional[Tuple[int, int]]:
+        if not self.width or not self.height:
+            return None
+        return self.width, self.height
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        if not self.fps or not self.frame_count:
+            return None
+        return self.frame_count / self.fps
+
+    def fps_or(self, default: float) -> float:
+        return self.fps if self.fps else default
+
+
+def source_key(path: str) -> Optional[SourceKey]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), stat.st_mtime, stat.st_size
+
+
+def _fourcc(value: float) -> Optional[str]:
+    code = int(value or 0)
+    if code <= 0:
+        return None
+    text = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+    return text.strip("\x00 ") or None
+
+
+def _keyframe_interval(cap: cv2.VideoCapture, max_packets: int) -> Optional[int]:
+    if max_packets <= 0 or not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+        return None
+    if not cap.set(cv2.CAP_PROP_FORMAT, -1):
+        return None
+    keyframes: List[int] = []
+    for index in range(max_packets):
+        if not cap.grab():
+            break
+        if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            keyframes.append(index)
+    if len(keyframes) < 2:
+        return None
+    gaps = sorted(b - a for a, b in zip(keyframes, keyframes[1:]))
+    return gaps[len(gaps) // 2]
+
+
+def _probe(path: str, keyframe_packets: int) -> SourceInfo:
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return SourceInfo(path=path, opened=False)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+        codec = _fourcc(cap.get(cv2.CAP_PROP_FOURCC))
+        return SourceInfo(
+            path=path,
+            opened=True,
+            fps=float(fps) if fps and fps > 0 else None,
+            frame_count=int(total) if total and total > 0 else None,
+            width=width or None,
+            height=height or None,
+            codec=codec,
+            keyframe_interval=_keyframe_interval(cap, keyframe_packets),
+        )
+    finally:
+        cap.release()
+
+
+def probe_source(path: str, *, keyframe_packets: int = KEYFRAME_SCAN_PACKETS) -> SourceInfo:
+    key = source_key(path)
+    if key is not None:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached is not None:
+            return cached
+    info = _probe(path, keyframe_packets)
+    if key is not None and info.opened:
+        with _cache_lock:
+            _cache[key] = info
+    return info
+
+
+def clear_source_info_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
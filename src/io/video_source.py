@@ -1,10 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import math
-from typing import Iterator, Optional, Tuple
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import cv2
+import numpy as np
+
+from src.io.keyframe_index import KeyframeIndex
+
+FrameTuple = Tuple[int, float, Optional[float], Optional[np.ndarray]]
+FramePredicate = Callable[[int], bool]
+
+_END = object()
+
 
 def get_video_time_s(frame_index: int, cap: cv2.VideoCapture) -> Optional[float]:
     _ = frame_index
@@ -14,23 +26,195 @@ def get_video_time_s(frame_index: int, cap: cv2.VideoCapture) -> Optional[float]
     return float(msec) / 1000.0
 
 
+def working_size(shape: Tuple[int, ...], max_side: Optional[int]) -> Optional[Tuple[int, int]]:
+    if not max_side or max_side <= 0:
+        return None
+    height, width = shape[:2]
+    long_side = max(height, width)
+    if long_side <= max_side:
+        return None
+    scale = max_side / long_side
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+class FrameRing:
+    def __init__(self, size: int) -> None:
+        self.size = max(0, int(size))
+        self._lock = threading.Lock()
+        self._free: List[np.ndarray] = []
+        self._owned: Dict[int, np.ndarray] = {}
+        self._shape: Optional[Tuple[int, ...]] = None
+        self.allocs = 0
+
+    @property
+    def free(self) -> int:
+        with self._lock:
+            return len(self._free)
+
+    def acquire(self, shape: Optional[Tuple[int, ...]]) -> Optional[np.ndarray]:
+        if shape is None or self.size == 0:
+            return None
+        with self._lock:
+            if shape != self._shape:
+                self._shape = shape
+                self._free = [np.empty(shape, dtype=np.uint8) for _ in range(self.size)]
+                self._owned = {id(buf): buf for buf in self._free}
+            if self._free:
+                return self._free.pop()
+        self.allocs += 1
+        return None
+
+    def release(self, frame: Any) -> None:
+        if frame is None:
+            return
+        with self._lock:
+            buf = self._owned.get(id(frame))
+            if buf is not frame or any(b is buf for b in self._free):
+                return
+            self._free.append(buf)
+
+
 @dataclass
 class VideoSource:
     path: str
+    start_frame: int = 0
+    prefetch: int = 0
+    ring_size: Optional[int] = None
+    want: Optional[FramePredicate] = None
+    index: Optional[KeyframeIndex] = None
+    last_decode_ms: float = field(default=0.0, init=False)
+    last_queue_fill: int = field(default=0, init=False)
+    grabbed: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        size = self.ring_size
+        if size is None:
+            size = self.prefetch + 2 if self.prefetch > 0 else 0
+        self._ring = FrameRing(size)
+
+    def release(self, frame: Any) -> None:
+        self._ring.release(frame)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "decode_ms": self.last_decode_ms,
+            "queue_fill": self.last_queue_fill,
+            "prefetch": self.prefetch,
+            "ring_free": self._ring.free,
+            "ring_allocs": self._ring.allocs,
+            "grab_only": self.grabbed,
+        }
 
-    def __iter__(self) -> Iterator[Tuple[int, float, Optional[float], "cv2.Mat"]]:
+    def _open(self) -> Tuple[cv2.VideoCapture, int]:
         cap = cv2.VideoCapture(self.path)
         if not cap.isOpened():
             raise RuntimeError(f"Failed to open video: {self.path}")
-        idx = 0
+        idx = max(0, int(self.start_frame))
+        if idx and self.index is not None:
+            keyframe = self.index.keyframe_before(idx)
+            if keyframe:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            for _ in range(idx - keyframe):
+                if not cap.grab():
+                    break
+        elif idx:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        return cap, idx
+
+    def _timestamp(self, cap: cv2.VideoCapture, index: int) -> Tuple[float, Optional[float]]:
+        exact = self.index.timestamp_ms(index) if self.index is not None else None
+        if exact is None:
+            return float(cap.get(cv2.CAP_PROP_POS_MSEC)), get_video_time_s(index, cap)
+        return exact, exact / 1000.0 if exact > 0 else None
+
+    def _decode(
+        self, cap: cv2.VideoCapture, index: int, shape: Optional[Tuple[int, ...]]
+    ) -> Tuple[bool, Any, float]:
+        if self.want is not None and not self.want(index):
+            t0 = time.perf_counter()
+            ok = cap.grab()
+            if ok:
+                self.grabbed += 1
+            return ok, None, (time.perf_counter() - t0) * 1000.0
+        buf = self._ring.acquire(shape)
+        t0 = time.perf_counter()
+        ok, frame = cap.read(buf) if buf is not None else cap.read()
+        decode_ms = (time.perf_counter() - t0) * 1000.0
+        if not ok and buf is not None:
+            self._ring.release(buf)
+        return ok, frame, decode_ms
+
+    def __iter__(self) -> Iterator[FrameTuple]:
+        if self.prefetch > 0:
+            return self._iter_prefetch()
+        return self._iter_direct()
+
+    def _iter_direct(self) -> Iterator[FrameTuple]:
+        cap, idx = self._open()
+        shape: Optional[Tuple[int, ...]] = None
         try:
             while True:
-                ok, frame = cap.read()
+                ok, frame, self.last_decode_ms = self._decode(cap, idx, shape)
                 if not ok:
                     break
-                timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
-                video_t_s = get_video_time_s(idx, cap)
-                yield idx, float(timestamp_ms), video_t_s, frame
+                if frame is not None:
+                    shape = frame.shape
+                timestamp_ms, video_t_s = self._timestamp(cap, idx)
+                yield idx, timestamp_ms, video_t_s, frame
                 idx += 1
         finally:
             cap.release()
+
+    def _iter_prefetch(self) -> Iterator[FrameTuple]:
+        cap, idx = self._open()
+        frames: "queue.Queue[Any]" = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def _put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _reader() -> None:
+            index = idx
+            shape: Optional[Tuple[int, ...]] = None
+            try:
+                while not stop.is_set():
+                    ok, frame, decode_ms = self._decode(cap, index, shape)
+                    if not ok:
+                        break
+                    if frame is not None:
+                        shape = frame.shape
+                    timestamp_ms, video_t_s = self._timestamp(cap, index)
+                    if not _put((index, timestamp_ms, video_t_s, frame, decode_ms)):
+                        return
+                    index += 1
+                _put(_END)
+            except BaseException as exc:
+                _put(exc)
+
+        reader = threading.Thread(target=_reader, name="VideoSourcePrefetch", daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = frames.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                self.last_queue_fill = frames.qsize()
+                frame_index, timestamp_ms, video_t_s, frame, self.last_decode_ms = item
+                yield frame_index, timestamp_ms, video_t_s, frame
+        finally:
+            stop.set()
+            while True:
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    break
+            reader.join(timeout=2.0)
+            cap.release()
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Iterable, List, Optional
 
+from src.core.tags import BLOCKING, CLOSE, NO_BLOCKING, SAMPLING, metric_tag_mask
 from src.core.types import FrameOutput
 
 from .config import ReportConfig
@@ -44,17 +45,17 @@ def _frame_to_signal(output: FrameOutput, fps_assume: float) -> _FrameSignal:
     else:
         ts_s = float(video_t_s)
 
-    tags_c = metrics.get("tags_c") or []
-    tags_d = metrics.get("tags_d") or []
+    tags_c = metric_tag_mask(metrics, "tags_c")
+    tags_d = metric_tag_mask(metrics, "tags_d")
     people_count = metrics.get("people_count")
     if people_count is None:
         people_count = 0
 
-    open_state = "close" not in tags_c
-    sampling_present = "sampling" in tags_c
-    if "blocking" in tags_d:
+    open_state = not tags_c & CLOSE
+    sampling_present = bool(tags_c & SAMPLING)
+    if tags_d & BLOCKING:
         blocking_state = "blocking"
-    elif "no_blocking" in tags_d:
+    elif tags_d & NO_BLOCKING:
         blocking_state = "no_blocking"
     else:
         blocking_state = "unknown"
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import copy
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.core.config import AppConfig
+from src.runtime.replay import RecordedRun, load_recorded_run, replay_outputs, state_timeline
+from src.runtime.summary import finalize_summary
+
+from .builder import build_report
+from .config import ReportConfig
+
+REPLAY_GROUPS = ("tags_c", "tags_d", "people", "engine")
+SCORE_GROUPS = ("test", "report")
+
+_RUN: Optional[RecordedRun] = None
+
+
+@dataclass
+class SweepCandidate:
+    candidate_id: int
+    params: Dict[str, Any]
+
+
+@dataclass
+class SweepResult:
+    candidate_id: int
+    params: Dict[str, Any]
+    summary: Dict[str, Any]
+    overall_result: str
+    alarm_counts: Dict[str, int]
+    session_count: int
+    segments: List[Tuple[str, float, float]] = field(default_factory=list)
+
+
+def parse_values(spec: str) -> List[Any]:
+    spec = spec.strip()
+    if ":" in spec:
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Range must be start:stop:step, got {spec!r}")
+        start, stop, step = (_parse_scalar(p) for p in parts)
+        if step <= 0:
+            raise ValueError(f"Range step must be > 0, got {spec!r}")
+        values = []
+        value = start
+        while value <= stop + 1e-9:
+            values.append(value)
+            value = value + step
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return values
+        return [round(float(v), 6) for v in values]
+    return [_parse_scalar(item) for item in spec.split(",") if item.strip()]
+
+
+def _parse_scalar(text: str) -> Any:
+    text = text.strip()
+    if text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_param_specs(specs: Sequence[str]) -> Dict[str, List[Any]]:
+    space: Dict[str, List[Any]] = {}
+    for spec in specs:
+        if "=" not in spec:
+            raise ValueError(f"Param must be name=values, got {spec!r}")
+        name, values = spec.split("=", 1)
+        name = name.strip()
+        _check_param_name(name)
+        space[name] = parse_values(values)
+    return space
+
+
+def _check_param_name(name: str) -> None:
+    group = name.split(".", 1)[0]
+    if group not in REPLAY_GROUPS + SCORE_GROUPS:
+        raise ValueError(f"Unknown param group {group!r} in {name!r}")
+    apply_params(AppConfig(), ReportConfig(), {name: None}, validate_only=True)
+
+
+def iter_candidates(
+    space: Dict[str, List[Any]],
+    *,
+    mode: str = "grid",
+    samples: int = 100,
+    seed: Optional[int] = None,
+) -> Iterator[SweepCandidate]:
+    names = sorted(space.keys())
+    if mode == "grid":
+        combos = itertools.product(*(space[name] for name in names))
+    elif mode == "random":
+        rng = random.Random(seed)
+        combos = (tuple(rng.choice(space[name]) for name in names) for _ in range(samples))
+    else:
+        raise ValueError(f"Unknown sweep mode: {mode}")
+    seen = set()
+    candidate_id = 0
+    for combo in combos:
+        if combo in seen:
+            continue
+        seen.add(combo)
+        yield SweepCandidate(candidate_id=candidate_id, params=dict(zip(names, combo)))
+        candidate_id += 1
+
+
+def _set_field(obj: Any, name: str, value: Any, validate_only: bool) -> None:
+    if name not in {f.name for f in fields(obj)}:
+        raise ValueError(f"Unknown field {name!r} on {type(obj).__name__}")
+    if not validate_only:
+        setattr(obj, name, value)
+
+
+def apply_params(
+    cfg: AppConfig,
+    report_cfg: ReportConfig,
+    params: Dict[str, Any],
+    *,
+    validate_only: bool = False,
+) -> Tuple[AppConfig, ReportConfig]:
+    if not validate_only:
+        cfg = copy.deepcopy(cfg)
+        report_cfg = copy.deepcopy(report_cfg)
+    for name, value in params.items():
+        parts = name.split(".")
+        group = parts[0]
+        if group in ("tags_c", "tags_d"):
+            if len(parts) != 3 or parts[2] not in ("on", "off"):
+                raise ValueError(f"Tag param must be {group}.<tag>.on|off, got {name!r}")
+            smoother = cfg.tags_c_smoother if group == "tags_c" else cfg.tags_d_smoother
+            hysteresis = smoother.thresholds.get(parts[1])
+            if hysteresis is None:
+                raise ValueError(f"Unknown tag {parts[1]!r} for {group}")
+            if not validate_only:
+                setattr(hysteresis, "on_count" if parts[2] == "on" else "off_count", int(value))
+            continue
+        if len(parts) != 2:
+            raise ValueError(f"Param must be <group>.<field>, got {name!r}")
+        target = {
+            "people": cfg.people_smoother,
+            "engine": cfg.state_engine,
+            "test": cfg.test,
+            "report": report_cfg,
+        }.get(group)
+        if target is None:
+            raise ValueError(f"Unknown param group {group!r} in {name!r}")
+        _set_field(target, parts[1], value, validate_only)
+    return cfg, report_cfg
+
+
+def _replay_key(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted((k, v) for k, v in params.items() if k.split(".", 1)[0] in REPLAY_GROUPS))
+
+
+def group_candidates(candidates: Sequence[SweepCandidate]) -> List[List[SweepCandidate]]:
+    groups: Dict[Tuple[Tuple[str, Any], ...], List[SweepCandidate]] = {}
+    for candidate in candidates:
+        groups.setdefault(_replay_key(candidate.params), []).append(candidate)
+    return list(groups.values())
+
+
+def evaluate_group(
+    run: RecordedRun,
+    base_cfg: AppConfig,
+    base_report_cfg: ReportConfig,
+    candidates: Sequence[SweepCandidate],
+    source_path: str = "",
+) -> List[SweepResult]:
+    if not candidates:
+        return []
+    replay_cfg, _ = apply_params(base_cfg, base_report_cfg, dict(_replay_key(candidates[0].params)))
+    outputs = list(replay_outputs(run, replay_cfg))
+    segments, transitions = state_timeline(outputs)
+    results: List[SweepResult] = []
+    for candidate in candidates:
+        cfg, report_cfg = apply_params(base_cfg, base_report_cfg, candidate.params)
+        summary = finalize_summary(
+            segments,
+            transitions,
+            short_jitter_s=cfg.test.short_jitter_s,
+            close_open_warn=cfg.test.close_open_warn,
+            close_open_fail=cfg.test.close_open_fail,
+            short_jitter_warn=cfg.test.short_jitter_warn,
+            short_jitter_fail=cfg.test.short_jitter_fail,
+            max_transitions_per_sec=cfg.test.max_transitions_per_sec,
+        )
+        report = build_report(outputs, report_cfg, source_path)
+        results.append(
+            SweepResult(
+                candidate_id=candidate.candidate_id,
+                params=dict(candidate.params),
+                summary=summary,
+                overall_result=report.summary.overall_result,
+                alarm_counts=dict(report.summary.alarm_counts),
+                session_count=report.summary.session_count,
+                segments=list(segments),
+            )
+        )
+    return results
+
+
+def _init_worker(run_log_path: str) -> None:
+    global _RUN
+    _RUN = load_recorded_run(run_log_path)
+
+
+def _evaluate_in_worker(
+    base_cfg: AppConfig,
+    base_report_cfg: ReportConfig,
+    candidates: List[SweepCandidate],
+    source_path: str,
+) -> List[SweepResult]:
+    return evaluate_group(_RUN, base_cfg, base_report_cfg, candidates, source_path)
+
+
+def run_sweep(
+    run_log_path: str,
+    candidates: Sequence[SweepCandidate],
+    *,
+    base_cfg: Optional[AppConfig] = None,
+    base_report_cfg: Optional[ReportConfig] = None,
+    workers: Optional[int] = None,
+    source_path: str = "",
+    progress_cb=None,
+) -> List[SweepResult]:
+    base_cfg = base_cfg or AppConfig()
+    base_report_cfg = base_report_cfg or ReportConfig()
+    groups = group_candidates(candidates)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(groups) or 1))
+    results: List[SweepResult] = []
+    if workers == 1:
+        run = load_recorded_run(run_log_path)
+        for group in groups:
+            results.extend(evaluate_group(run, base_cfg, base_report_cfg, group, source_path))
+            if progress_cb is not None:
+                progress_cb(len(results), len(candidates))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(run_log_path,),
+        ) as pool:
+            futures = [
+                pool.submit(_evaluate_in_worker, base_cfg, base_report_cfg, group, source_path)
+                for group in groups
+            ]
+            for future in futures:
+                results.extend(future.result())
+                if progress_cb is not None:
+                    progress_cb(len(results), len(candidates))
+    results.sort(key=lambda r: r.candidate_id)
+    return results
+
+
+_STATUS_RANK = {"PASS": 0, "WARN": 1, "FAIL": 2}
+
+
+def score_key(result: SweepResult) -> Tuple[int, int, int, int]:
+    summary = result.summary
+    return (
+        _STATUS_RANK.get(summary.get("status"), 3),
+        int(summary.get("short_jitter_count", 0)),
+        int(summary.get("close_open_switches", 0)),
+        int(summary.get("transition_count", 0)),
+    )
@@ -21,6 +21,12 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--save-fps", type=float, default=None)
     parser.add_argument("--save-size", default=None)
     parser.add_argument("--infer-every", type=int, default=1, help="Run inference every N frames")
+    parser.add_argument("--propagate", action="store_true", help="Propagate boxes between detector runs (Kalman + optical flow); low confidence forces a detection")
+    parser.add_argument("--prefetch", type=int, default=4, help="Decoded frames buffered ahead of inference")
+    parser.add_argument("--work-side", type=int, default=None, help="Inference frame long side (default: max imgsz, 0 = off)")
+    parser.add_argument("--lookahead", type=int, default=250, help="Frames inferred ahead of the playhead while paused (0 = off)")
+    parser.add_argument("--infer-process", action="store_true", help="Run the realtime pipeline in a child process (shared-memory frames)")
+    parser.add_argument("--degrade", action="store_true", help="Step down overlay/display fps/cadence/imgsz/people tracker when falling behind real time")
     parser.add_argument("--max-fps", type=float, default=0.0, help="Max UI FPS (0 = unlimited)")
     parser.add_argument("--no-overlay", action="store_true", help="Disable overlay drawing")
     parser.add_argument("--dynamic-skip", dest="dynamic_skip", action="store_true", help="Enable dynamic frame skipping")
@@ -36,6 +42,10 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--display-fps", type=float, default=15.0, help="UI display refresh FPS (QTimer)")
     parser.add_argument("--rt-smooth", type=float, default=0.2, help="EMA smoothing for RealTime Ratio (0-1)")
     parser.add_argument("--target-ratio", type=float, default=1.0, help="Target real-time ratio for FrameScheduler")
+    parser.add_argument("--policy", choices=("ratio", "cost"), default="ratio", help="Dynamic skip step policy (ratio = FrameScheduler, cost = per-stage cost model + PI lag control)")
+    parser.add_argument("--target-lag-ms", type=float, default=200.0, help="Target playback lag for --policy cost")
+    parser.add_argument("--transition-aware", action="store_true", help="Step 1 frame while a tag smoother is mid-transition, at least --stable-step frames otherwise")
+    parser.add_argument("--stable-step", type=int, default=4, help="Minimum step while all tag smoothers are stable and agree with the raw tags")
     parser.add_argument("--enable-b", dest="enable_b", action="store_true")
     parser.add_argument("--disable-b", dest="enable_b", action="store_false")
     parser.add_argument("--enable-c", dest="enable_c", action="store_true")
@@ -50,6 +60,7 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--inject-people-count", type=int)
     parser.add_argument("--inject-tags-c", default="")
     parser.add_argument("--inject-tags-d", default="")
+    parser.add_argument("--people-tracker", choices=("ultralytics", "builtin"), default=None, help="People tracker: ultralytics model.track or the built-in NumPy ByteTrack-style tracker")
     parser.add_argument("--c-imgsz", type=int)
     parser.add_argument("--c-iou", type=float)
     parser.add_argument("--c-conf-close", type=float)
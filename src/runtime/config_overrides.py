@@ -39,3 +39,7 @@ def apply_cli_overrides(cfg: AppConfig, args: argparse.Namespace) -> None:
         cfg.sampling_close.conf_sampling = args.c_conf_sampling
     if args.c_max_det is not None:
         cfg.sampling_close.max_det = args.c_max_det
+    if getattr(args, "people_tracker", None):
+        cfg.people_tracker.backend = args.people_tracker
+    if getattr(args, "propagate", False):
+        cfg.propagator.enabled = True
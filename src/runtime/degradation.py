@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from src.core.types import FrameOutput
+from src.runtime.frame_processor import FrameProcessor
+from src.runtime.logger import log_kv
+
+
+@dataclass
+class DegradationStep:
+    name: str
+    enter: Callable[[], None]
+    leave: Callable[[], None]
+
+
+def degradation_ladder(
+    processor: FrameProcessor,
+    view: Optional[Any] = None,
+    *,
+    display_fps_scale: float = 0.5,
+    cadence: int = 2,
+    imgsz_scale: float = 0.75,
+) -> List[DegradationStep]:
+    steps: List[DegradationStep] = []
+    if view is not None:
+        overlay = view.no_overlay
+        display_fps = view.display_fps
+        steps.append(
+            DegradationStep(
+                "no_overlay",
+                lambda: setattr(view, "no_overlay", True),
+                lambda: setattr(view, "no_overlay", overlay),
+            )
+        )
+        steps.append(
+            DegradationStep(
+                "display_fps",
+                lambda: setattr(view, "display_fps", display_fps * display_fps_scale),
+                lambda: setattr(view, "display_fps", display_fps),
+            )
+        )
+    infer_every = processor.infer_every
+    steps.append(
+        DegradationStep(
+            "cadence",
+            lambda: setattr(processor, "infer_every", infer_every * max(2, int(cadence))),
+            lambda: setattr(processor, "infer_every", infer_every),
+        )
+    )
+    steps.append(
+        DegradationStep(
+            "imgsz",
+            lambda: processor.set_imgsz_scale(imgsz_scale),
+            lambda: processor.set_imgsz_scale(1.0),
+        )
+    )
+    if processor.cfg.enable_b:
+        steps.append(
+            DegradationStep(
+                "people_paused",
+                lambda: processor.set_people_paused(True),
+                lambda: processor.set_people_paused(False),
+            )
+        )
+    return steps
+
+
+class DegradationController:
+    def __init__(
+        self,
+        steps: List[DegradationStep],
+        *,
+        queue_size: int = 4,
+        degrade_ratio: float = 0.9,
+        recover_ratio: float = 1.05,
+        high_fill: float = 0.5,
+        degrade_hold_s: float = 1.5,
+        recover_hold_s: float = 5.0,
+        max_recover_hold_s: float = 60.0,
+        rt_smooth: float = 0.2,
+        max_gap_s: float = 1.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.steps = steps
+        self.queue_size = max(1, int(queue_size))
+        self.degrade_ratio = degrade_ratio
+        self.recover_ratio = recover_ratio
+        self.high_fill = high_fill
+        self.degrade_hold_s = degrade_hold_s
+        self.base_recover_hold_s = recover_hold_s
+        self.recover_hold_s = recover_hold_s
+        self.max_recover_hold_s = max_recover_hold_s
+        self.rt_smooth = min(max(float(rt_smooth), 0.0), 1.0)
+        self.max_gap_s = max_gap_s
+        self._logger = logger
+        self.level = 0
+        self.rt_ratio: Optional[float] = None
+        self.queue_fill = 0.0
+        self._last_wall: Optional[float] = None
+        self._last_video: Optional[float] = None
+        self._over_since: Optional[float] = None
+        self._under_since: Optional[float] = None
+        self._last_recover: Optional[float] = None
+
+    @property
+    def rung(self) -> str:
+        return self.steps[self.level - 1].name if self.level else "normal"
+
+    def update(self, output: FrameOutput, now: Optional[float] = None) -> int:
+        metrics = output.metrics
+        if metrics.get("cached"):
+            return self.level
+        now = time.perf_counter() if now is None else now
+        self._measure(metrics.get("video_t_s"), now)
+        fill = metrics.get("prefetch_fill")
+        if fill is not None:
+            fill = min(1.0, float(fill) / self.queue_size)
+            self.queue_fill = self.rt_smooth * fill + (1.0 - self.rt_smooth) * self.queue_fill
+        metrics["degrade_level"] = self.level
+        if self.rt_ratio is None:
+            return self.level
+        overloaded = self.rt_ratio < self.degrade_ratio and self.queue_fill >= self.high_fill
+        headroom = self.rt_ratio >= self.recover_ratio
+        self._over_since = (self._over_since or now) if overloaded else None
+        self._under_since = (self._under_since or now) if headroom else None
+        if self._over_since is not None and now - self._over_since >= self.degrade_hold_s:
+            if self.level < len(self.steps):
+                if self._last_recover is not None and now - self._last_recover < self.recover_hold_s * 2:
+                    self.recover_hold_s = min(self.max_recover_hold_s, self.recover_hold_s * 2)
+                self._transition(self.level + 1, output.frame_index)
+        elif self._under_since is not None and now - self._under_since >= self.recover_hold_s:
+            if self.level > 0:
+                self._last_recover = now
+                self._transition(self.level - 1, output.frame_index)
+            else:
+                self.recover_hold_s = self.base_recover_hold_s
+        metrics["degrade_level"] = self.level
+        return self.level
+
+    def reset(self) -> None:
+        while self.level > 0:
+            self.steps[self.level - 1].leave()
+            self.level -= 1
+
+    def _measure(self, video_t_s: Optional[float], now: float) -> None:
+        if video_t_s is None:
+            return
+        if self._last_wall is not None and self._last_video is not None:
+            d_wall = now - self._last_wall
+            d_video = video_t_s - self._last_video
+            if d_video < 0.0 or d_video > self.max_gap_s or d_wall > self.max_gap_s:
+                self._last_wall = now
+                self._last_video = video_t_s
+                return
+            if d_wall <= 0.05:
+                return
+            ratio = d_video / d_wall
+            if self.rt_ratio is None:
+                self.rt_ratio = ratio
+            else:
+                self.rt_ratio = self.rt_smooth * ratio + (1.0 - self.rt_smooth) * self.rt_ratio
+        self._last_wall = now
+        self._last_video = video_t_s
+
+    def _transition(self, level: int, frame_index: int) -> None:
+        previous = self.rung
+        if level > self.level:
+            self.steps[level - 1].enter()
+            direction = "down"
+        else:
+            self.steps[self.level - 1].leave()
+            direction = "up"
+        self.level = level
+        self._over_since = None
+        self._under_since = None
+        log_kv(
+            "DEGRADE",
+            logger=self._logger,
+            frame=frame_index,
+            direction=direction,
+            level=level,
+            rung=self.rung,
+            from_rung=previous,
+            rt_ratio=self.rt_ratio,
+            prefetch_fill=self.queue_fill,
+            recover_hold_s=self.recover_hold_s,
+        )
+
+
+def degradation_from_args(args, processor: FrameProcessor, view: Optional[Any] = None) -> Optional[DegradationController]:
+    if not getattr(args, "degrade", False):
+        return None
+    return DegradationController(
+        degradation_ladder(processor, view),
+        queue_size=int(getattr(args, "prefetch", 4) or 4),
+        rt_smooth=float(getattr(args, "rt_smooth", 0.2)),
+    )
@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import copy
+import json
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Set, Tuple
+
+import torch
+
+from src.core.config import AppConfig, OffMode
+from src.core.tags import TAGS
+from src.core.types import Detections, FrameOutput, PeopleRaw, PeopleStable, StateResult, TagsRaw, TagsStable
+from src.detectors.blocking_raw import BlockingRaw
+from src.detectors.people_tracker_raw import PeopleTrackerRaw
+from src.detectors.sampling_close_raw import SamplingCloseRaw
+from src.engine.state_engine_5 import StateEngine5
+from src.filters.box_propagator import BoxPropagator
+from src.filters.blocking_smoother import BlockingSmoother
+from src.filters.people_smoother import PeopleSmoother
+from src.filters.sampling_close_smoother import SamplingCloseSmoother
+
+RawDetections = Tuple[Optional[PeopleRaw], Optional[TagsRaw], Optional[TagsRaw]]
+
+
+@dataclass
+class ProcessorSnapshot:
+    frame_index: int
+    people_smoother: Optional[PeopleSmoother]
+    sampling_smoother: SamplingCloseSmoother
+    blocking_smoother: BlockingSmoother
+    engine: StateEngine5
+    tracker: Optional[Any]
+    last_people: Optional[PeopleStable]
+    last_tags_c: Optional[TagsStable]
+    last_tags_d: Optional[TagsStable]
+    last_raw: RawDetections
+    last_state: Optional[str]
+    state_start_video_t: Optional[float]
+
+
+def compact_raw(raw: RawDetections) -> RawDetections:
+    return tuple(  # type: ignore[return-value]
+        replace(item, yolo_result=None) if item is not None and item.yolo_result is not None else item
+        for item in raw
+    )
+
+
+def _off_people(cfg: AppConfig, last: Optional[PeopleStable]) -> PeopleStable:
+    if cfg.off_mode_b == OffMode.EMPTY:
+        return PeopleStable(people_count_stable=0, people_ok=False)
+    if cfg.off_mode_b == OffMode.HOLD_LAST and last is not None:
+        return last
+    if cfg.off_mode_b == OffMode.INJECT:
+        return PeopleStable(
+            people_count_stable=cfg.inject_people_count,
+            people_ok=cfg.inject_people_count == cfg.people_smoother.expected_people,
+        )
+    return PeopleStable(people_count_stable=0, people_ok=False)
+
+
+def _off_tags(cfg: AppConfig, last: Optional[TagsStable], inject: Set[str], off_mode: OffMode) -> TagsStable:
+    if off_mode == OffMode.EMPTY:
+        return TagsStable()
+    if off_mode == OffMode.HOLD_LAST and last is not None:
+        return last
+    if off_mode == OffMode.INJECT:
+        return TagsStable(mask=TAGS.mask(inject))
+    return TagsStable()
+
+
+def _boxes_from_raw(raw) -> Detections:
+    if raw is None:
+        return Detections.empty()
+    return raw.boxes
+
+
+def _device_str(model) -> str:
+    dev = getattr(model, "device", None)
+    if dev is None and getattr(model, "model", None) is not None:
+        try:
+            dev = next(model.model.parameters()).device
+        except StopIteration:
+            dev = None
+    return str(dev) if dev is not None else "unknown"
+
+
+def _half_flag(model) -> Optional[bool]:
+    if getattr(model, "model", None) is None:
+        return None
+    try:
+        dtype = next(model.model.parameters()).dtype
+    except StopIteration:
+        return None
+    return dtype == torch.float16
+
+
+def _print_info(tag: str, detector, imgsz: Optional[int]) -> None:
+    if detector is None:
+        return
+    model = detector.model
+    model_path = getattr(detector.cfg, "model_path", "unknown")
+    model_name = model_path.split("\\")[-1]
+    print(
+        json.dumps(
+            {
+                "model_tag": tag,
+                "model_name": model_name,
+                "model_path": model_path,
+                "device": _device_str(model),
+                "half": _half_flag(model),
+                "imgsz": imgsz,
+            },
+            ensure_ascii=True,
+        )
+    )
+
+
+class FrameProcessor:
+    def __init__(self, cfg: AppConfig, *, infer_every: int = 1) -> None:
+        self._cfg = cfg
+        self.infer_every = max(1, int(infer_every))
+        self._people_detector = PeopleTrackerRaw(cfg.people_detector, cfg.people_tracker) if cfg.enable_b else None
+        self._sampling_detector = SamplingCloseRaw(cfg.sampling_close)
+        self._blocking_detector = BlockingRaw(cfg.blocking_detector)
+        self._propagator = BoxPropagator(cfg.propagator) if cfg.propagator.enabled else None
+        self._base_imgsz = (cfg.people_detector.imgsz, cfg.sampling_close.imgsz, cfg.blocking_detector.imgsz)
+        self._people_paused = False
+        self.reset()
+
+    @property
+    def cfg(self) -> AppConfig:
+        return self._cfg
+
+    def reset(self) -> None:
+        cfg = self._cfg
+        self._people_smoother = PeopleSmoother(cfg.people_smoother) if cfg.enable_b else None
+        self._sampling_smoother = SamplingCloseSmoother(cfg.tags_c_smoother)
+        self._blocking_smoother = BlockingSmoother(cfg.tags_d_smoother)
+        self._engine = StateEngine5(cfg.state_engine)
+        if self._people_detector is not None:
+            self._people_detector.reset()
+        if self._propagator is not None:
+            self._propagator.reset()
+        self._last_people: Optional[PeopleStable] = None
+        self._last_tags_c: Optional[TagsStable] = None
+        self._last_tags_d: Optional[TagsStable] = None
+        self._last_raw: RawDetections = (None, None, None)
+        self._propagated_people: Optional[PeopleRaw] = None
+        self._last_state: Optional[str] = None
+        self._state_start_video_t: Optional[float] = None
+        self._state_start_perf: Optional[float] = None
+        self._last_tick = time.perf_counter()
+        self._fps_ema: Optional[float] = None
+
+    @property
+    def work_side(self) -> Optional[int]:
+        cfg = self._cfg
+        sides = [
+            cfg.people_detector.imgsz if cfg.enable_b else None,
+            cfg.sampling_close.imgsz if cfg.enable_c else None,
+            cfg.blocking_detector.imgsz if cfg.enable_d else None,
+        ]
+        sides = [int(side) for side in sides if side]
+        return max(sides) if sides else None
+
+    def print_model_info(self) -> None:
+        cfg = self._cfg
+        _print_info("people", self._people_detector, cfg.people_detector.imgsz if cfg.enable_b else None)
+        _print_info("sampling_close", self._sampling_detector, cfg.sampling_close.imgsz if cfg.enable_c else None)
+        _print_info("blocking", self._blocking_detector, cfg.blocking_detector.imgsz if cfg.enable_d else None)
+
+    @property
+    def propagates(self) -> bool:
+        return self._propagator is not None
+
+    @property
+    def people_paused(self) -> bool:
+        return self._people_paused
+
+    def set_people_paused(self, paused: bool) -> None:
+        self._people_paused = bool(paused)
+
+    def set_imgsz_scale(self, scale: float) -> None:
+        cfg = self._cfg
+        people_imgsz, sampling_imgsz, blocking_imgsz = self._base_imgsz
+        cfg.people_detector.imgsz = max(32, int(round(people_imgsz * scale / 32.0)) * 32)
+        cfg.sampling_close.imgsz = max(32, int(round(sampling_imgsz * scale / 32.0)) * 32)
+        cfg.blocking_detector.imgsz = max(32, int(round(blocking_imgsz * scale / 32.0)) * 32)
+
+    def transition_pressure(self) -> float:
+        cfg = self._cfg
+        pressure = 0.0
+        if cfg.enable_c:
+            pressure = self._sampling_smoother.transition_pressure()
+        if cfg.enable_d:
+            pressure = max(pressure, self._blocking_smoother.transition_pressure())
+        return pressure
+
+    @property
+    def last_raw(self) -> RawDetections:
+        return self._last_raw
+
+    @property
+    def propagated_people(self) -> Optional[PeopleRaw]:
+        return self._propagated_people
+
+    def snapshot(self, frame_index: int) -> ProcessorSnapshot:
+        return ProcessorSnapshot(
+            frame_index=frame_index,
+            people_smoother=copy.deepcopy(self._people_smoother),
+            sampling_smoother=copy.deepcopy(self._sampling_smoother),
+            blocking_smoother=copy.deepcopy(self._blocking_smoother),
+            engine=copy.deepcopy(self._engine),
+            tracker=self._people_detector.snapshot() if self._people_detector is not None else None,
+            last_people=self._last_people,
+            last_tags_c=self._last_tags_c,
+            last_tags_d=self._last_tags_d,
+            last_raw=compact_raw(self._last_raw),
+            last_state=self._last_state,
+            state_start_video_t=self._state_start_video_t,
+        )
+
+    def restore(self, snap: ProcessorSnapshot) -> None:
+        self._people_smoother = copy.deepcopy(snap.people_smoother)
+        self._sampling_smoother = copy.deepcopy(snap.sampling_smoother)
+        self._blocking_smoother = copy.deepcopy(snap.blocking_smoother)
+        self._engine = copy.deepcopy(snap.engine)
+        if self._people_detector is not None:
+            self._people_detector.restore(snap.tracker)
+        if self._propagator is not None:
+            self._propagator.reset()
+        self._last_people = snap.last_people
+        self._last_tags_c = snap.last_tags_c
+        self._last_tags_d = snap.last_tags_d
+        self._last_raw = snap.last_raw
+        self._last_state = snap.last_state
+        self._state_start_video_t = snap.state_start_video_t
+        self._state_start_perf = None
+        self._last_tick = time.perf_counter()
+
+    def replay(
+        self,
+        video_t_s: Optional[float],
+        raw: Optional[RawDetections],
+        box_scale: Tuple[float, float] = (1.0, 1.0),
+        propagated: Optional[PeopleRaw] = None,
+    ) -> None:
+        if raw is not None and raw[0] is not None and self._people_detector is not None:
+            self._people_detector.replay(raw[0].boxes.scaled(1.0 / box_scale[0], 1.0 / box_scale[1]))
+        if raw is None and propagated is not None and self._people_smoother is not None:
+            self._last_people = self._people_smoother.update(propagated)
+        _, _, _, _, state = self._advance(raw is not None, raw, None, None, (1.0, 1.0))
+        self._track_state(state, video_t_s, time.perf_counter())
+
+    def wants_inference(self, frame_index: int) -> bool:
+        if (frame_index % self.infer_every) == 0 or self._last_people is None:
+            return True
+        return self._propagator is not None and self._propagator.needs_detection()
+
+    def detect(self, frame_bgr, box_scale: Tuple[float, float] = (1.0, 1.0)) -> RawDetections:
+        cfg = self._cfg
+        raw_people = None
+        if cfg.enable_b and self._people_detector is not None and not self._people_paused:
+            raw_people = self._people_detector.process(frame_bgr)
+        raw_tags_c = self._sampling_detector.process(frame_bgr) if cfg.enable_c else None
+        raw_tags_d = self._blocking_detector.process(frame_bgr) if cfg.enable_d else None
+        if box_scale != (1.0, 1.0):
+            for raw in (raw_people, raw_tags_c, raw_tags_d):
+                if raw is not None:
+                    raw.boxes = raw.boxes.scaled(*box_scale)
+        return raw_people, raw_tags_c, raw_tags_d
+
+    def _smooth(self, raw: RawDetections) -> Tuple[PeopleStable, TagsStable, TagsStable]:
+        cfg = self._cfg
+        raw_people, raw_tags_c, raw_tags_d = raw
+        if raw_people is not None and self._people_smoother is not None:
+            people = self._people_smoother.update(raw_people)
+        elif self._people_paused and self._last_people is not None:
+            people = self._last_people
+        else:
+            people = _off_people(cfg, self._last_people)
+        if raw_tags_c is not None:
+            tags_c = self._sampling_smoother.update(raw_tags_c)
+        else:
+            tags_c = _off_tags(cfg, self._last_tags_c, cfg.inject_tags_c, cfg.off_mode_c)
+        if raw_tags_d is not None:
+            tags_d = self._blocking_smoother.update(raw_tags_d)
+        else:
+            tags_d = _off_tags(cfg, self._last_tags_d, cfg.inject_tags_d, cfg.off_mode_d)
+        return people, tags_c, tags_d
+
+    def process(
+        self,
+        frame_bgr,
+        frame_index: int,
+        time_ms: float,
+        video_t_s: Optional[float],
+        *,
+        infer: Optional[bool] = None,
+        raw: Optional[RawDetections] = None,
+        read_ms: Optional[float] = None,
+        keep_frame: bool = True,
+        box_scale: Tuple[float, float] = (1.0, 1.0),
+    ) -> FrameOutput:
+        if infer is None:
+            infer = raw is not None or self.wants_inference(frame_index)
+        infer_start = time.perf_counter()
+        people, tags_c, tags_d, raw, state = self._advance(infer, raw, frame_bgr, frame_index, box_scale)
+        infer_ms = (time.perf_counter() - infer_start) * 1000.0
+
+        post_start = time.perf_counter()
+        output = self._build_output(
+            frame_bgr if keep_frame else None, frame_index, time_ms, video_t_s, people, tags_c, tags_d, raw, state
+        )
+        output.metrics["inferred"] = infer
+        output.metrics["time_ms"] = time_ms
+        if not infer and frame_bgr is not None and self._propagator is not None and self._propagator.active:
+            output.metrics["propagation"] = self._propagator.confidence
+        stage_ms: Dict[str, Any] = {"infer_ms": infer_ms, "post_ms": (time.perf_counter() - post_start) * 1000.0}
+        if read_ms is not None:
+            stage_ms["read_ms"] = read_ms
+        output.metrics["stage_ms"] = stage_ms
+        return output
+
+    def _advance(
+        self,
+        infer: bool,
+        raw: Optional[RawDetections],
+        frame_bgr,
+        frame_index: Optional[int],
+        box_scale: Tuple[float, float],
+    ) -> Tuple[
+        Optional[PeopleStable], Optional[TagsStable], Optional[TagsStable], RawDetections, Optional[StateResult]
+    ]:
+        state: Optional[StateResult] = None
+        self._propagated_people = None
+        if infer:
+            if raw is None:
+                raw = self.detect(frame_bgr, box_scale)
+            people, tags_c, tags_d = self._smooth(raw)
+            if self._cfg.enable_e:
+                state = self._engine.compute(tags_c.mask | tags_d.mask)
+            self._last_people = people
+            self._last_tags_c = tags_c
+            self._last_tags_d = tags_d
+            self._last_raw = raw
+            if self._propagator is not None:
+                if frame_bgr is None or frame_index is None:
+                    self._propagator.reset()
+                else:
+                    self._propagator.observe(frame_bgr, frame_index, raw, box_scale)
+        else:
+            people = self._last_people
+            tags_c = self._last_tags_c
+            tags_d = self._last_tags_d
+            raw = self._last_raw
+            if self._propagator is not None and frame_bgr is not None and frame_index is not None:
+                raw = self._propagator.propagate(frame_bgr, frame_index, box_scale)
+                people_raw = raw[0]
+                if people_raw is not None and self._people_smoother is not None and not self._people_paused:
+                    people = self._people_smoother.update(people_raw)
+                    self._last_people = people
+                    self._propagated_people = PeopleRaw(set(people_raw.active_ids), people_raw.count_raw)
+            if self._cfg.enable_e and tags_c is not None and tags_d is not None:
+                state = self._engine.compute(tags_c.mask | tags_d.mask)
+        return people, tags_c, tags_d, raw, state
+
+    def _track_state(self, state: Optional[StateResult], video_t_s: Optional[float], now: float) -> str:
+        current_state = state.state_5class if state is not None else "N/A"
+        if current_state != self._last_state:
+            self._last_state = current_state
+            self._state_start_video_t = video_t_s
+            self._state_start_perf = now if video_t_s is None else None
+        return current_state
+
+    def process_frame(
+        self,
+        frame_bgr,
+        frame_index: int,
+        timestamp_ms: float,
+        video_t_s: Optional[float],
+    ) -> FrameOutput:
+        return self.process(frame_bgr, frame_index, timestamp_ms, video_t_s, infer=True)
+
+    def _build_output(
+        self,
+        frame_bgr,
+        frame_index: int,
+        time_ms: float,
+        video_t_s: Optional[float],
+        people: Optional[PeopleStable],
+        tags_c: Optional[TagsStable],
+        tags_d: Optional[TagsStable],
+        raw: RawDetections,
+        state: Optional[StateResult],
+    ) -> FrameOutput:
+        now = time.perf_counter()
+        dt = now - self._last_tick
+        self._last_tick = now
+        if dt > 0:
+            fps = 1.0 / dt
+            self._fps_ema = fps if self._fps_ema is None else self._fps_ema * 0.9 + fps * 0.1
+        else:
+            self._fps_ema = self._fps_ema or 0.0
+
+        current_state = self._track_state(state, video_t_s, now)
+
+        state_duration = None
+        if self._state_start_video_t is not None and video_t_s is not None:
+            state_duration = max(0.0, video_t_s - self._state_start_video_t)
+        elif self._state_start_perf is not None:
+            state_duration = max(0.0, now - self._state_start_perf)
+
+        raw_people, raw_tags_c, raw_tags_d = raw
+        detections = {
+            "people": _boxes_from_raw(raw_people),
+            "sampling_close": _boxes_from_raw(raw_tags_c),
+            "blocking": _boxes_from_raw(raw_tags_d),
+        }
+        metrics = {
+            "people_count": people.people_count_stable if people is not None else None,
+            "people_ok": people.people_ok if people is not None else None,
+            "tags_c_mask": tags_c.mask if tags_c is not None else 0,
+            "tags_d_mask": tags_d.mask if tags_d is not None else 0,
+            "state_reason": state.reason if state is not None else None,
+            "video_t_s": video_t_s,
+            "transition": self.transition_pressure(),
+        }
+        return FrameOutput(
+            frame_index=frame_index,
+            timestamp_ms=time_ms,
+            frame_bgr=frame_bgr,
+            fps=self._fps_ema,
+            detections=detections,
+            state=current_state,
+            state_duration_sec=state_duration,
+            metrics=metrics,
+        )
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import time
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from src.core.types import FrameOutput
 
 
 class FrameScheduler:
@@ -28,7 +31,10 @@ class FrameScheduler:
         return time.perf_counter()
 
     def end(self, t0: float) -> float:
-        dt = max(0.0, time.perf_counter() - t0)
+        return self.record(time.perf_counter() - t0)
+
+    def record(self, dt: float) -> float:
+        dt = max(0.0, dt)
         self._dt_window.append(dt)
         if len(self._dt_window) > 3:
             self._dt_window.pop(0)
@@ -59,3 +65,319 @@ class FrameScheduler:
             next_index = min(next_index, total_frames - 1)
         self.count += 1
         return next_index, step, raw_step, raw_step_smooth, capped
+
+
+def scheduler_from_args(args, video_fps: float) -> FrameScheduler:
+    return FrameScheduler(
+        video_fps=video_fps,
+        warmup_frames=int(getattr(args, "warmup_frames", 5)),
+        target_ratio=float(getattr(args, "target_ratio", 1.0)),
+        max_allowed_step=int(getattr(args, "max_allowed_step", 10)),
+        min_step=int(getattr(args, "min_step", 1)),
+        use_round=True,
+    )
+
+
+class SchedulerStepPolicy:
+    def __init__(
+        self,
+        scheduler: FrameScheduler,
+        *,
+        total_frames: Optional[int] = None,
+        auto_target: bool = False,
+        rt_smooth: float = 0.2,
+        target_min: float = 0.5,
+        target_max: float = 2.0,
+        target_step: float = 0.05,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.scheduler = scheduler
+        self.total_frames = total_frames
+        self.auto_target = auto_target
+        self.rt_smooth = min(max(float(rt_smooth), 0.0), 1.0)
+        self.target_min = target_min
+        self.target_max = target_max
+        self.target_step = target_step
+        self.clock = clock
+        self._rt_last_wall: Optional[float] = None
+        self._rt_last_video: Optional[float] = None
+        self._rt_ratio_ema: Optional[float] = None
+
+    def __call__(self, output: FrameOutput, dt: float) -> int:
+        scheduler = self.scheduler
+        dt = scheduler.record(dt)
+        next_idx, step, raw_step, raw_step_smooth, capped = scheduler.next_index(
+            output.frame_index, dt, total_frames=self.total_frames
+        )
+        if self.auto_target:
+            self._adapt_target(output)
+        schedule: Dict[str, Any] = {
+            "dt_ms": dt * 1000.0,
+            "step": step,
+            "raw_step": raw_step,
+            "raw_step_smooth": raw_step_smooth,
+            "capped": capped,
+            "next_idx": next_idx,
+        }
+        output.metrics["schedule"] = schedule
+        output.metrics["target_ratio"] = scheduler.target_ratio
+        return max(1, next_idx - output.frame_index)
+
+    def _adapt_target(self, output: FrameOutput) -> None:
+        video_out = output.metrics.get("video_t_s")
+        if video_out is None and output.timestamp_ms and output.timestamp_ms > 0:
+            video_out = output.timestamp_ms / 1000.0
+        if video_out is None:
+            return
+        wall_now = self.clock()
+        if self._rt_last_wall is not None and self._rt_last_video is not None:
+            d_wall = wall_now - self._rt_last_wall
+            d_video = video_out - self._rt_last_video
+            if d_wall > 0.05 and d_video >= 0.0:
+                ratio = d_video / d_wall
+                if self._rt_ratio_ema is None:
+                    self._rt_ratio_ema = ratio
+                else:
+                    self._rt_ratio_ema = self.rt_smooth * ratio + (1.0 - self.rt_smooth) * self._rt_ratio_ema
+                scheduler = self.scheduler
+                if self._rt_ratio_ema < 0.9:
+                    scheduler.target_ratio = min(self.target_max, scheduler.target_ratio + self.target_step)
+                elif self._rt_ratio_ema > 1.1:
+                    scheduler.target_ratio = max(self.target_min, scheduler.target_ratio - self.target_step)
+        self._rt_last_wall = wall_now
+        self._rt_last_video = video_out
+
+
+class _Ewma:
+    def __init__(self, alpha: float) -> None:
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, sample: float) -> float:
+        self.value = sample if self.value is None else self.alpha * sample + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def get(self, default: float = 0.0) -> float:
+        return self.value if self.value is not None else default
+
+
+class _WindowQuantile:
+    def __init__(self, q: float, window: int) -> None:
+        self.q = min(max(float(q), 0.0), 1.0)
+        self._samples: Deque[float] = deque(maxlen=max(1, int(window)))
+
+    def update(self, sample: float) -> None:
+        self._samples.append(sample)
+
+    def get(self, default: float = 0.0) -> float:
+        if not self._samples:
+            return default
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(self.q * len(ordered)))]
+
+
+class CostModelStepPolicy:
+    def __init__(
+        self,
+        *,
+        video_fps: float,
+        total_frames: Optional[int] = None,
+        target_ratio: float = 1.0,
+        target_lag_s: float = 0.2,
+        max_allowed_step: int = 10,
+        min_step: int = 1,
+        warmup_frames: int = 5,
+        alpha: float = 0.2,
+        infer_quantile: float = 0.8,
+        window: int = 32,
+        kp: float = 0.1,
+        ki: float = 0.1,
+        max_integral_s: float = 2.0,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.video_fps = max(0.1, float(video_fps))
+        self.total_frames = total_frames
+        self.target_ratio = max(0.01, float(target_ratio))
+        self.target_lag_s = float(target_lag_s)
+        self.max_allowed_step = max(1, int(max_allowed_step))
+        self.min_step = max(1, int(min_step))
+        self.warmup_frames = max(0, int(warmup_frames))
+        self.kp = kp
+        self.ki = ki
+        self.max_integral_s = max_integral_s
+        self.clock = clock
+        self._infer = _WindowQuantile(infer_quantile, window)
+        self._infer_ewma = _Ewma(alpha)
+        self._post = _Ewma(alpha)
+        self._decode = _Ewma(alpha)
+        self._grab = _Ewma(alpha)
+        self._stall = _Ewma(alpha)
+        self._integral = 0.0
+        self._step = 1
+        self._pred_s: Optional[float] = None
+        self._last_wall: Optional[float] = None
+        self._origin: Optional[Tuple[float, int]] = None
+        self._last_index: Optional[int] = None
+        self.count = 0
+
+    def predict(self, step: Optional[int] = None) -> float:
+        step = self._step if step is None else step
+        service = max(self._infer.get(), self._infer_ewma.get()) + self._post.get()
+        source = self._decode.get() + max(0, step - 1) * self._grab.get()
+        return max(service, source) + self._stall.get()
+
+    def __call__(self, output: FrameOutput, dt: float) -> int:
+        now = self.clock()
+        index = output.frame_index
+        if self._last_index is None or index < self._last_index or self._last_wall is None:
+            self._origin = (now - dt, index)
+            self._integral = 0.0
+            self._pred_s = None
+            period = dt
+        else:
+            period = now - self._last_wall
+        self._last_wall = now
+        self._last_index = index
+
+        stage_ms = output.metrics.get("stage_ms") or {}
+        infer_s = float(stage_ms.get("infer_ms") or 0.0) / 1000.0
+        post_s = float(stage_ms.get("post_ms") or 0.0) / 1000.0
+        decode_s = float(stage_ms.get("decode_ms") or 0.0) / 1000.0
+        read_s = float(stage_ms.get("read_ms") or 0.0) / 1000.0
+        self._infer.update(infer_s)
+        self._infer_ewma.update(infer_s)
+        self._post.update(post_s)
+        self._decode.update(decode_s)
+        self._grab.update(read_s)
+        work_s = max(infer_s + post_s, decode_s + max(0, self._step - 1) * read_s)
+        self._stall.update(max(0.0, period - work_s))
+
+        wall0, index0 = self._origin  # type: ignore[misc]
+        video_s = (index - index0) / self.video_fps
+        lag_s = (now - wall0) * self.target_ratio - video_s
+        if lag_s < 0.0:
+            self._origin = (now - video_s / self.target_ratio, index0)
+            lag_s = 0.0
+        error_s = lag_s - self.target_lag_s
+        saturated = (self._step <= self.min_step and error_s < 0.0) or (
+            self._step >= self.max_allowed_step and error_s > 0.0
+        )
+        if not saturated:
+            self._integral = min(self.max_integral_s, max(-self.max_integral_s, self._integral + error_s * period))
+        control_s = self.kp * error_s + self.ki * self._integral
+
+        pred_s = self.predict()
+        raw_step = pred_s * self.video_fps * self.target_ratio
+        step_f = raw_step + control_s * self.video_fps
+        if self.count < self.warmup_frames:
+            step = 1
+        else:
+            step = int(round(step_f))
+        step = max(self.min_step, step)
+        capped = 1 if step > self.max_allowed_step else 0
+        step = max(1, min(step, self.max_allowed_step))
+        next_idx = index + step
+        if self.total_frames is not None and self.total_frames > 0:
+            next_idx = min(next_idx, self.total_frames - 1)
+        step = max(1, next_idx - index)
+
+        schedule: Dict[str, Any] = {
+            "policy": "cost",
+            "dt_ms": dt * 1000.0,
+            "step": step,
+            "raw_step": raw_step,
+            "raw_step_smooth": step_f,
+            "capped": capped,
+            "next_idx": next_idx,
+            "pred_ms": self._pred_s * 1000.0 if self._pred_s is not None else None,
+            "cost_ms": period * 1000.0,
+            "next_pred_ms": self.predict(step) * 1000.0,
+            "lag_ms": lag_s * 1000.0,
+            "pi_ms": control_s * 1000.0,
+        }
+        output.metrics["schedule"] = schedule
+        output.metrics["target_ratio"] = self.target_ratio
+        self._pred_s = self.predict(step)
+        self._step = step
+        self.count += 1
+        return step
+
+
+class TransitionStepPolicy:
+    def __init__(
+        self,
+        base: Optional[Callable[[FrameOutput, float], int]] = None,
+        *,
+        stable_step: int = 4,
+        transition_step: int = 1,
+        total_frames: Optional[int] = None,
+    ) -> None:
+        self.base = base
+        self.stable_step = max(1, int(stable_step))
+        self.transition_step = max(1, int(transition_step))
+        self.total_frames = total_frames
+        self.dense = 0
+        self.sparse = 0
+
+    def __call__(self, output: FrameOutput, dt: float) -> int:
+        base_step = max(1, int(self.base(output, dt))) if self.base is not None else 1
+        pressure = float(output.metrics.get("transition") or 0.0)
+        if pressure > 0.0:
+            step = min(base_step, self.transition_step)
+            self.dense += 1
+        else:
+            step = max(base_step, self.stable_step)
+            self.sparse += 1
+        next_idx = output.frame_index + step
+        if self.total_frames is not None and self.total_frames > 0:
+            next_idx = min(next_idx, self.total_frames - 1)
+        step = max(1, next_idx - output.frame_index)
+        schedule = output.metrics.get("schedule")
+        if schedule is None:
+            schedule = {"dt_ms": dt * 1000.0, "raw_step": 1.0, "raw_step_smooth": 1.0, "capped": 0}
+            output.metrics["schedule"] = schedule
+        schedule["base_step"] = base_step
+        schedule["transition"] = pressure
+        schedule["step"] = step
+        schedule["next_idx"] = next_idx
+        return step
+
+
+StepPolicyType = Union[SchedulerStepPolicy, CostModelStepPolicy, TransitionStepPolicy]
+
+
+def step_policy_from_args(
+    args,
+    video_fps: float,
+    *,
+    total_frames: Optional[int] = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> Optional[StepPolicyType]:
+    base: Optional[StepPolicyType] = None
+    if getattr(args, "dynamic_skip", False):
+        if getattr(args, "policy", "ratio") == "cost":
+            base = CostModelStepPolicy(
+                video_fps=video_fps,
+                total_frames=total_frames,
+                target_ratio=float(getattr(args, "target_ratio", 1.0)),
+                target_lag_s=float(getattr(args, "target_lag_ms", 200.0)) / 1000.0,
+                max_allowed_step=int(getattr(args, "max_allowed_step", 10)),
+                min_step=int(getattr(args, "min_step", 1)),
+                warmup_frames=int(getattr(args, "warmup_frames", 5)),
+                clock=clock,
+            )
+        else:
+            base = SchedulerStepPolicy(
+                scheduler_from_args(args, video_fps),
+                total_frames=total_frames,
+                auto_target=bool(getattr(args, "auto_target", False)),
+                rt_smooth=float(getattr(args, "rt_smooth", 0.2)),
+                clock=clock,
+            )
+    if getattr(args, "transition_aware", False):
+        return TransitionStepPolicy(
+            base,
+            stable_step=int(getattr(args, "stable_step", 4)),
+            total_frames=total_frames,
+        )
+    return base
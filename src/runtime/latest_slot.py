@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Optional, Tuple
+
+
+class LatestSlot:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value: Optional[Any] = None
+        self._seq = 0
+
+    @property
+    def seq(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def put(self, value: Any) -> int:
+        with self._lock:
+            self._value = value
+            self._seq += 1
+            return self._seq
+
+    def get(self) -> Tuple[int, Optional[Any]]:
+        with self._lock:
+            return self._seq, self._value
+
+    def get_if_newer(self, seq: int) -> Tuple[int, Optional[Any]]:
+        with self._lock:
+            if self._seq == seq:
+                return seq, None
+            return self._seq, self._value
@@ -1,342 +1,376 @@
 from __future__ import annotations
 
-import json
+import queue
+import threading
 import time
-from typing import Iterator, Optional, Set
-
-import torch
-
-from src.core.config import AppConfig, OffMode
-from src.core.types import Box, FrameOutput, PeopleStable, TagsStable
-from src.detectors.blocking_raw import BlockingRaw
-from src.detectors.people_tracker_raw import PeopleTrackerRaw
-from src.detectors.sampling_close_raw import SamplingCloseRaw
-from src.engine.state_engine_5 import StateEngine5
-from src.filters.blocking_smoother import BlockingSmoother
-from src.filters.people_smoother import PeopleSmoother
-from src.filters.sampling_close_smoother import SamplingCloseSmoother
-from src.io.video_source import VideoSource
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import cv2
+
+from src.core.config import AppConfig
+from src.core.types import FrameHandle, FrameOutput
+from src.io.keyframe_index import keyframe_index
+from src.io.video_source import FrameRing, VideoSource, working_size
+from src.runtime.frame_processor import FrameProcessor
+from src.runtime.result_cache import ResultCache
+from src.runtime.snapshots import SnapshotStore
 from src.runtime.source_utils import derive_time_ms, should_process_frame
 
+PipelineRunner = FrameProcessor
 
-def _off_people(cfg: AppConfig, last: Optional[PeopleStable]) -> PeopleStable:
-    if cfg.off_mode_b == OffMode.EMPTY:
-        return PeopleStable(people_count_stable=0, people_ok=False)
-    if cfg.off_mode_b == OffMode.HOLD_LAST and last is not None:
-        return last
-    if cfg.off_mode_b == OffMode.INJECT:
-        return PeopleStable(
-            people_count_stable=cfg.inject_people_count,
-            people_ok=cfg.inject_people_count == cfg.people_smoother.expected_people,
-        )
-    return PeopleStable(people_count_stable=0, people_ok=False)
+DEFAULT_QUEUE_SIZE = 4
 
+StepPolicy = Callable[[FrameOutput, float], int]
 
-def _off_tags(cfg: AppConfig, last: Optional[TagsStable], inject: Set[str], off_mode: OffMode) -> TagsStable:
-    if off_mode == OffMode.EMPTY:
-        return TagsStable(tags=set())
-    if off_mode == OffMode.HOLD_LAST and last is not None:
-        return last
-    if off_mode == OffMode.INJECT:
-        return TagsStable(tags=set(inject))
-    return TagsStable(tags=set())
+_END = object()
+_POLL_S = 0.1
 
 
-def _boxes_from_raw(raw) -> list[Box]:
-    if raw is None:
-        return []
-    return list(raw.boxes)
+@dataclass
+class SourceItem:
+    frame_index: int
+    timestamp_ms: float
+    video_t_s: Optional[float]
+    time_ms: float
+    frame_bgr: Any
+    work_bgr: Any
+    box_scale: Tuple[float, float]
+    read_ms: float
+    decode_ms: float
 
 
-class PipelineRunner:
-    def __init__(self, cfg: AppConfig) -> None:
-        self._cfg = cfg
-        self._people_detector = PeopleTrackerRaw(cfg.people_detector) if cfg.enable_b else None
-        self._sampling_detector = SamplingCloseRaw(cfg.sampling_close)
-        self._blocking_detector = BlockingRaw(cfg.blocking_detector)
-        self._people_smoother = PeopleSmoother(cfg.people_smoother) if cfg.enable_b else None
-        self._sampling_smoother = SamplingCloseSmoother(cfg.tags_c_smoother)
-        self._blocking_smoother = BlockingSmoother(cfg.tags_d_smoother)
-        self._engine = StateEngine5(cfg.state_engine)
-        self._last_people: Optional[PeopleStable] = None
-        self._last_tags_c: Optional[TagsStable] = None
-        self._last_tags_d: Optional[TagsStable] = None
-        self._last_state: Optional[str] = None
-        self._state_start_video_t: Optional[float] = None
-        self._state_start_perf: Optional[float] = None
-        self._last_tick = time.perf_counter()
-        self._fps_ema: Optional[float] = None
-
-    def process_frame(
-        self,
-        frame_bgr,
-        frame_index: int,
-        timestamp_ms: float,
-        video_t_s: Optional[float],
-    ) -> FrameOutput:
-        if self._cfg.enable_b and self._people_detector is not None and self._people_smoother is not None:
-            raw_people = self._people_detector.process(frame_bgr)
-            people = self._people_smoother.update(raw_people)
-        else:
-            people = _off_people(self._cfg, self._last_people)
-            raw_people = None
-        self._last_people = people
+class _StageError:
+    __slots__ = ("exc",)
 
-        if self._cfg.enable_c:
-            raw_tags_c = self._sampling_detector.process(frame_bgr)
-            tags_c = self._sampling_smoother.update(raw_tags_c)
-        else:
-            tags_c = _off_tags(self._cfg, self._last_tags_c, self._cfg.inject_tags_c, self._cfg.off_mode_c)
-            raw_tags_c = None
-        self._last_tags_c = tags_c
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
 
-        if self._cfg.enable_d:
-            raw_tags_d = self._blocking_detector.process(frame_bgr)
-            tags_d = self._blocking_smoother.update(raw_tags_d)
-        else:
-            tags_d = _off_tags(self._cfg, self._last_tags_d, self._cfg.inject_tags_d, self._cfg.off_mode_d)
-            raw_tags_d = None
-        self._last_tags_d = tags_d
-
-        state = None
-        if self._cfg.enable_e:
-            tags = set()
-            tags.update(tags_c.tags)
-            tags.update(tags_d.tags)
-            state = self._engine.compute(tags)
-
-        now = time.perf_counter()
-        dt = now - self._last_tick
-        self._last_tick = now
-        if dt > 0:
-            fps = 1.0 / dt
-            self._fps_ema = fps if self._fps_ema is None else self._fps_ema * 0.9 + fps * 0.1
-        else:
-            self._fps_ema = self._fps_ema or 0.0
-
-        current_state = state.state_5class if state is not None else "N/A"
-        if current_state != self._last_state:
-            self._last_state = current_state
-            self._state_start_video_t = video_t_s
-            self._state_start_perf = now if video_t_s is None else None
-
-        state_duration = None
-        if self._state_start_video_t is not None and video_t_s is not None:
-            state_duration = max(0.0, video_t_s - self._state_start_video_t)
-        elif self._state_start_perf is not None:
-            state_duration = max(0.0, now - self._state_start_perf)
-
-        detections = {
-            "people": _boxes_from_raw(raw_people),
-            "sampling_close": _boxes_from_raw(raw_tags_c),
-            "blocking": _boxes_from_raw(raw_tags_d),
-        }
-        metrics = {
-            "people_count": people.people_count_stable if people is not None else None,
-            "people_ok": people.people_ok if people is not None else None,
-            "tags_c": sorted(tags_c.tags) if tags_c is not None else [],
-            "tags_d": sorted(tags_d.tags) if tags_d is not None else [],
-            "state_reason": state.reason if state is not None else None,
-            "video_t_s": video_t_s,
-        }
-
-        return FrameOutput(
-            frame_index=frame_index,
-            timestamp_ms=timestamp_ms,
-            frame_bgr=frame_bgr,
-            fps=self._fps_ema,
-            detections=detections,
-            state=current_state,
-            state_duration_sec=state_duration,
-            metrics=metrics,
-        )
-
-
-def iter_frame_outputs(args, cfg: AppConfig, source: str, *, start_frame: int = 0) -> Iterator[FrameOutput]:
-    people_detector = PeopleTrackerRaw(cfg.people_detector) if cfg.enable_b else None
-    sampling_detector = SamplingCloseRaw(cfg.sampling_close)
-    blocking_detector = BlockingRaw(cfg.blocking_detector)
 
-    people_smoother = PeopleSmoother(cfg.people_smoother) if cfg.enable_b else None
-    sampling_smoother = SamplingCloseSmoother(cfg.tags_c_smoother)
-    blocking_smoother = BlockingSmoother(cfg.tags_d_smoother)
-
-    engine = StateEngine5(cfg.state_engine)
-
-    last_people: Optional[PeopleStable] = None
-    last_tags_c: Optional[TagsStable] = None
-    last_tags_d: Optional[TagsStable] = None
-    last_raw_people = None
-    last_raw_tags_c = None
-    last_raw_tags_d = None
+class StagedPipeline:
+    def __init__(
+        self,
+        cfg: AppConfig,
+        source: str,
+        *,
+        processor: Optional[FrameProcessor] = None,
+        start_frame: int = 0,
+        fps_assume: float = 25.0,
+        start_sec: Optional[float] = None,
+        end_sec: Optional[float] = None,
+        infer_every: int = 1,
+        keep_frames: bool = True,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        step_policy: Optional[StepPolicy] = None,
+        print_model_info: bool = False,
+        work_side: Optional[int] = None,
+        snapshots: Optional[SnapshotStore] = None,
+        results: Optional[ResultCache] = None,
+    ) -> None:
+        self._cfg = cfg
+        self._source = source
+        self._processor = processor
+        self._start_frame = max(0, int(start_frame))
+        self._fps_assume = fps_assume
+        self._start_sec = start_sec
+        self._end_sec = end_sec
+        self._infer_every = max(1, int(infer_every))
+        self._keep_frames = keep_frames
+        self._step_policy = step_policy
+        self._print_model_info = print_model_info
+        self._work_side = work_side
+        self._snapshots = snapshots
+        self._results = results
+        size = max(1, int(queue_size))
+        self._decoded: "queue.Queue[Any]" = queue.Queue(maxsize=size)
+        self._outputs: "queue.Queue[Any]" = queue.Queue(maxsize=size)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._skip_until = self._start_frame
+        self._primed = False
+        self._progress = threading.Condition()
+        self._fed = 0
+        self._done = 0
+        self._video = VideoSource(
+            source,
+            start_frame=self._start_frame,
+            ring_size=2 * size + 3,
+            want=self._wants_frame,
+            index=keyframe_index(source),
+        )
+        self._work_ring = FrameRing(2 * size + 3)
 
-    last_state: Optional[str] = None
-    state_start_video_t: Optional[float] = None
-    state_start_perf: Optional[float] = None
-    last_timestamp_ms: Optional[float] = None
-    last_tick = time.perf_counter()
-    fps_ema: Optional[float] = None
+    @property
+    def processor(self) -> Optional[FrameProcessor]:
+        return self._processor
 
-    def _device_str(model) -> str:
-        dev = getattr(model, "device", None)
-        if dev is None and getattr(model, "model", None) is not None:
+    def start(self) -> None:
+        if self._threads:
+            return
+        if self._processor is None:
+            self._processor = FrameProcessor(self._cfg, infer_every=self._infer_every)
+        else:
+            self._processor.reset()
+        if self._snapshots is not None:
+            self._snapshots.restore(self._processor, self._start_frame)
+            self._snapshots.begin()
+        if self._work_side is None:
+            self._work_side = self._processor.work_side
+        for name, target in (("PipelineSource", self._source_stage), ("PipelineInfer", self._infer_stage)):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        for q in (self._decoded, self._outputs):
+            _drain(q)
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+
+    def __iter__(self) -> Iterator[FrameOutput]:
+        self.start()
+        try:
+            while True:
+                item = self._get(self._outputs)
+                if item is _END or item is None:
+                    return
+                if isinstance(item, _StageError):
+                    raise item.exc
+                yield item
+        finally:
+            self.close()
+
+    def _put(self, q: "queue.Queue[Any]", item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_S)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue[Any]") -> Any:
+        while not self._stop.is_set():
             try:
-                dev = next(model.model.parameters()).device
-            except StopIteration:
-                dev = None
-        return str(dev) if dev is not None else "unknown"
-
-    def _half_flag(model) -> Optional[bool]:
-        if getattr(model, "model", None) is None:
-            return None
+                return q.get(timeout=_POLL_S)
+            except queue.Empty:
+                continue
+        return None
+
+    def _wants_frame(self, frame_index: int) -> bool:
+        if frame_index < self._skip_until:
+            return False
+        if self._results is not None and frame_index in self._results:
+            return True
+        if self._step_policy is not None:
+            if frame_index > self._skip_until:
+                self._await_schedule(frame_index)
+            return frame_index >= self._skip_until
+        if self._keep_frames or not self._primed:
+            return True
+        if self._processor is not None and self._processor.propagates:
+            return True
+        infer_every = self._processor.infer_every if self._processor is not None else self._infer_every
+        return frame_index % infer_every == 0
+
+    def _await_schedule(self, frame_index: int) -> None:
+        with self._progress:
+            while not self._stop.is_set():
+                if frame_index <= self._skip_until or self._done >= self._fed:
+                    return
+                self._progress.wait(_POLL_S)
+
+    def _mark_done(self) -> None:
+        with self._progress:
+            self._done += 1
+            self._progress.notify_all()
+
+    def _working_frame(self, frame_bgr: Any) -> Tuple[Any, Tuple[float, float]]:
+        size = working_size(frame_bgr.shape, self._work_side)
+        if size is None:
+            return frame_bgr, (1.0, 1.0)
+        height, width = frame_bgr.shape[:2]
+        dst = self._work_ring.acquire((size[1], size[0]) + frame_bgr.shape[2:])
+        work = cv2.resize(frame_bgr, size, dst=dst, interpolation=cv2.INTER_AREA)
+        return work, (width / size[0], height / size[1])
+
+    def _release_item(self, item: SourceItem) -> None:
+        if item.work_bgr is not item.frame_bgr:
+            self._work_ring.release(item.work_bgr)
+        self._video.release(item.frame_bgr)
+
+    def _resume(self, frame_index: int) -> None:
+        snapshots = self._snapshots
+        if snapshots is None or not snapshots.restore(self._processor, frame_index):
+            self._processor.reset()
+        if snapshots is not None:
+            snapshots.begin()
+
+    def _source_stage(self) -> None:
         try:
-            dtype = next(model.model.parameters()).dtype
-        except StopIteration:
-            return None
-        return dtype == torch.float16
-
-    def _print_info(tag: str, detector, imgsz: Optional[int]) -> None:
-        model = detector.model
-        model_path = getattr(detector.cfg, "model_path", "unknown")
-        model_name = model_path.split("\\")[-1]
-        print(
-            json.dumps(
-                {
-                    "model_tag": tag,
-                    "model_name": model_name,
-                    "model_path": model_path,
-                    "device": _device_str(model),
-                    "half": _half_flag(model),
-                    "imgsz": imgsz,
-                },
-                ensure_ascii=True,
-            )
-        )
-
-    infer_every = max(1, int(getattr(args, "infer_every", 1)))
-
-    video_iter = iter(VideoSource(source, start_frame=start_frame))
+            video = self._video
+            frames = iter(video)
+            last_time_ms: Optional[float] = None
+            while not self._stop.is_set():
+                read_start = time.perf_counter()
+                try:
+                    frame_index, timestamp_ms, video_t_s, frame_bgr = next(frames)
+                except StopIteration:
+                    break
+                read_ms = (time.perf_counter() - read_start) * 1000.0
+                time_ms = derive_time_ms(timestamp_ms, last_time_ms, self._fps_assume, frame_index)
+                last_time_ms = time_ms
+                if not should_process_frame(time_ms, self._start_sec, self._end_sec):
+                    video.release(frame_bgr)
+                    if self._end_sec is not None and time_ms > self._end_sec * 1000.0:
+                        break
+                    continue
+                work_bgr, box_scale = frame_bgr, (1.0, 1.0)
+                if frame_bgr is not None:
+                    self._primed = True
+                    work_bgr, box_scale = self._working_frame(frame_bgr)
+                    if work_bgr is not frame_bgr and not self._keep_frames:
+                        video.release(frame_bgr)
+                        frame_bgr = None
+                item = SourceItem(
+                    frame_index,
+                    timestamp_ms,
+                    video_t_s,
+                    time_ms,
+                    frame_bgr,
+                    work_bgr,
+                    box_scale,
+                    read_ms,
+                    video.last_decode_ms,
+                )
+                with self._progress:
+                    self._fed += 1
+                if not self._put(self._decoded, item):
+                    return
+            self._put(self._decoded, _END)
+        except BaseException as exc:
+            self._put(self._decoded, _StageError(exc))
+
+    def _infer_stage(self) -> None:
+        processor = self._processor
+        snapshots = self._snapshots
+        results = self._results
+        from_cache = False
+        dropped = 0
+        printed = not self._print_model_info
+        try:
+            while True:
+                item = self._get(self._decoded)
+                if item is None:
+                    return
+                if item is _END or isinstance(item, _StageError):
+                    self._put(self._outputs, item)
+                    return
+                if item.frame_index < self._skip_until or (self._step_policy is not None and item.work_bgr is None):
+                    self._release_item(item)
+                    dropped += 1
+                    self._mark_done()
+                    continue
+                fill = self._decoded.qsize()
+                t0 = time.perf_counter()
+                output = results.get(item.frame_index) if results is not None else None
+                if output is not None:
+                    from_cache = True
+                    output.metrics["cached"] = True
+                    output.metrics["stage_ms"] = {"read_ms": item.read_ms, "infer_ms": 0.0, "post_ms": 0.0}
+                else:
+                    if from_cache:
+                        self._resume(item.frame_index)
+                        from_cache = False
+                    if snapshots is not None and snapshots.due(item.frame_index):
+                        snapshots.add_snapshot(processor.snapshot(item.frame_index))
+                    output = processor.process(
+                        item.work_bgr,
+                        item.frame_index,
+                        item.time_ms,
+                        item.video_t_s,
+                        infer=False if item.work_bgr is None else None,
+                        read_ms=item.read_ms,
+                        keep_frame=False,
+                        box_scale=item.box_scale,
+                    )
+                    if snapshots is not None:
+                        snapshots.record(
+                            item.frame_index,
+                            item.video_t_s,
+                            processor.last_raw if output.metrics["inferred"] else None,
+                            item.box_scale,
+                            processor.propagated_people,
+                        )
+                    if results is not None:
+                        results.put(output)
+                output.metrics["stage_ms"]["decode_ms"] = item.decode_ms
+                output.metrics["prefetch_fill"] = fill
+                if self._keep_frames and item.frame_bgr is not None:
+                    output.frame = FrameHandle(item.frame_bgr, self._video.release)
+                    item.frame_bgr = None
+                self._release_item(item)
+                if not printed:
+                    processor.print_model_info()
+                    printed = True
+                if self._step_policy is not None:
+                    output.metrics["dropped"] = dropped
+                    dropped = 0
+                if from_cache:
+                    step = 1
+                    if self._step_policy is not None:
+                        step = max(1, int((output.metrics.get("schedule") or {}).get("step") or 1))
+                    self._skip_until = item.frame_index + step
+                elif self._step_policy is not None:
+                    step = max(1, int(self._step_policy(output, time.perf_counter() - t0)))
+                    self._skip_until = item.frame_index + step
+                self._mark_done()
+                if not self._put(self._outputs, output):
+                    return
+        except BaseException as exc:
+            self._put(self._outputs, _StageError(exc))
+
+
+def _drain(q: "queue.Queue[Any]") -> None:
     while True:
-        read_start = time.perf_counter()
         try:
-            frame_index, timestamp_ms, video_t_s, frame_bgr = next(video_iter)
-        except StopIteration:
-            break
-        read_end = time.perf_counter()
-        read_ms = (read_end - read_start) * 1000.0
-
-        time_ms = derive_time_ms(timestamp_ms, last_timestamp_ms, args.fps_assume, frame_index)
-        if not should_process_frame(time_ms, args.start_sec, args.end_sec):
-            last_timestamp_ms = time_ms
-            if args.end_sec is not None and time_ms > args.end_sec * 1000.0:
-                break
-            continue
-        last_timestamp_ms = time_ms
-
-        infer_start = time.perf_counter()
-        should_infer = (frame_index % infer_every) == 0 or last_people is None
-        if should_infer:
-            if cfg.enable_b and people_detector is not None and people_smoother is not None:
-                raw_people = people_detector.process(frame_bgr)
-                people = people_smoother.update(raw_people)
-            else:
-                people = _off_people(cfg, last_people)
-                raw_people = None
-            if cfg.enable_c:
-                raw_tags_c = sampling_detector.process(frame_bgr)
-                tags_c = sampling_smoother.update(raw_tags_c)
-            else:
-                tags_c = _off_tags(cfg, last_tags_c, cfg.inject_tags_c, cfg.off_mode_c)
-                raw_tags_c = None
-            if cfg.enable_d:
-                raw_tags_d = blocking_detector.process(frame_bgr)
-                tags_d = blocking_smoother.update(raw_tags_d)
-            else:
-                tags_d = _off_tags(cfg, last_tags_d, cfg.inject_tags_d, cfg.off_mode_d)
-                raw_tags_d = None
-            state = None
-            if cfg.enable_e:
-                tags = set()
-                tags.update(tags_c.tags)
-                tags.update(tags_d.tags)
-                state = engine.compute(tags)
-            last_people = people
-            last_tags_c = tags_c
-            last_tags_d = tags_d
-            last_raw_people = raw_people
-            last_raw_tags_c = raw_tags_c
-            last_raw_tags_d = raw_tags_d
-        else:
-            people = last_people
-            tags_c = last_tags_c
-            tags_d = last_tags_d
-            raw_people = last_raw_people
-            raw_tags_c = last_raw_tags_c
-            raw_tags_d = last_raw_tags_d
-            state = None
-            if cfg.enable_e and tags_c is not None and tags_d is not None:
-                tags = set()
-                tags.update(tags_c.tags)
-                tags.update(tags_d.tags)
-                state = engine.compute(tags)
-        infer_end = time.perf_counter()
-        infer_ms = (infer_end - infer_start) * 1000.0
-
-        if not getattr(args, "_model_info_printed", False):
-            _print_info("people", people_detector, cfg.people_detector.imgsz if cfg.enable_b else None)
-            _print_info("sampling_close", sampling_detector, cfg.sampling_close.imgsz if cfg.enable_c else None)
-            _print_info("blocking", blocking_detector, cfg.blocking_detector.imgsz if cfg.enable_d else None)
-            setattr(args, "_model_info_printed", True)
-
-        post_start = time.perf_counter()
-        now = time.perf_counter()
-        dt = now - last_tick
-        last_tick = now
-        if dt > 0:
-            fps = 1.0 / dt
-            fps_ema = fps if fps_ema is None else fps_ema * 0.9 + fps * 0.1
-        else:
-            fps_ema = fps_ema or 0.0
-
-        current_state = state.state_5class if state is not None else "N/A"
-        if current_state != last_state:
-            last_state = current_state
-            state_start_video_t = video_t_s
-            state_start_perf = now if video_t_s is None else None
-
-        state_duration = None
-        if state_start_video_t is not None and video_t_s is not None:
-            state_duration = max(0.0, video_t_s - state_start_video_t)
-        elif state_start_perf is not None:
-            state_duration = max(0.0, now - state_start_perf)
-
-        detections = {
-            "people": _boxes_from_raw(raw_people),
-            "sampling_close": _boxes_from_raw(raw_tags_c),
-            "blocking": _boxes_from_raw(raw_tags_d),
-        }
-        metrics = {
-            "people_count": people.people_count_stable if people is not None else None,
-            "people_ok": people.people_ok if people is not None else None,
-            "tags_c": sorted(tags_c.tags) if tags_c is not None else [],
-            "tags_d": sorted(tags_d.tags) if tags_d is not None else [],
-            "state_reason": state.reason if state is not None else None,
-            "video_t_s": video_t_s,
-            "time_ms": time_ms,
-            "stage_ms": {
-                "read_ms": read_ms,
-                "infer_ms": infer_ms,
-                "post_ms": (time.perf_counter() - post_start) * 1000.0,
-            },
-        }
-
-        yield FrameOutput(
-            frame_index=frame_index,
-            timestamp_ms=time_ms,
-            frame_bgr=frame_bgr,
-            fps=fps_ema,
-            detections=detections,
-            state=current_state,
-            state_duration_sec=state_duration,
-            metrics=metrics,
-        )
+            q.get_nowait()
+        except queue.Empty:
+            return
+
+
+def iter_frame_outputs(
+    args,
+    cfg: AppConfig,
+    source: str,
+    *,
+    start_frame: int = 0,
+    keep_frames: bool = True,
+    processor: Optional[FrameProcessor] = None,
+    step_policy: Optional[StepPolicy] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    results: Optional[ResultCache] = None,
+) -> Iterator[FrameOutput]:
+    print_info = not getattr(args, "_model_info_printed", False)
+    if print_info:
+        setattr(args, "_model_info_printed", True)
+    pipeline = StagedPipeline(
+        cfg,
+        source,
+        processor=processor,
+        start_frame=start_frame,
+        fps_assume=getattr(args, "fps_assume", 25.0),
+        start_sec=getattr(args, "start_sec", None),
+        end_sec=getattr(args, "end_sec", None),
+        infer_every=getattr(args, "infer_every", 1),
+        keep_frames=keep_frames,
+        queue_size=getattr(args, "prefetch", DEFAULT_QUEUE_SIZE),
+        work_side=getattr(args, "work_side", None),
+        step_policy=step_policy,
+        print_model_info=print_info,
+        snapshots=snapshots,
+        results=results,
+    )
+    return iter(pipeline)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import queue
+import time
+from typing import Any, Optional
+
+from src.core.config import AppConfig
+from src.io.video_writer import VideoWriterManager
+from src.runtime.degradation import degradation_from_args
+from src.runtime.frame_processor import FrameProcessor
+from src.runtime.frame_scheduler import step_policy_from_args
+from src.runtime.pipeline import iter_frame_outputs
+from src.runtime.result_cache import ResultCache
+from src.runtime.shm_ring import RingSpec, SharedFrameRing
+from src.runtime.snapshots import SnapshotStore
+from src.runtime.source_utils import parse_save_size
+
+META_QUEUE_SIZE = 64
+FINAL_PUT_TIMEOUT_S = 2.0
+
+
+def _writer(args) -> Optional[VideoWriterManager]:
+    if not args.save_video:
+        return None
+    return VideoWriterManager(
+        args.save_video,
+        args.save_fps,
+        parse_save_size(args.save_size),
+        args.fps_assume,
+        None,
+        None,
+    )
+
+
+def _send_final(meta_queue: Any, message: tuple) -> None:
+    try:
+        meta_queue.put(message, timeout=FINAL_PUT_TIMEOUT_S)
+    except queue.Full:
+        pass
+
+
+def run_pipeline_process(
+    args,
+    cfg: AppConfig,
+    source: str,
+    video_fps: float,
+    ring_spec: RingSpec,
+    lock: Any,
+    meta_queue: Any,
+    control_queue: Any,
+    stop: Any,
+) -> None:
+    ring = SharedFrameRing.attach(ring_spec, lock)
+    writer: Optional[VideoWriterManager] = None
+    try:
+        writer = _writer(args)
+        processor = FrameProcessor(cfg, infer_every=getattr(args, "infer_every", 1))
+        degradation = degradation_from_args(args, processor)
+        snapshots = SnapshotStore()
+        results = ResultCache()
+        lookahead_budget = max(0, int(getattr(args, "lookahead", 0) or 0))
+        max_fps = float(getattr(args, "max_fps", 0.0) or 0.0)
+        paused = False
+        seq = 0
+        generation = 0
+        current_start = 0
+        while current_start >= 0:
+            playhead = current_start
+            lookahead = 0
+            lookahead_done = False
+            iterator = iter_frame_outputs(
+                args,
+                cfg,
+                source,
+                start_frame=current_start,
+                processor=processor,
+                step_policy=step_policy_from_args(args, video_fps),
+                snapshots=snapshots,
+                results=results,
+            )
+            current_start = -1
+            try:
+                while not stop.is_set():
+                    seek_target = None
+                    while True:
+                        try:
+                            command, value = control_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if command == "pause":
+                            paused = bool(value)
+                        elif command == "seek":
+                            generation, seek_target = int(value[0]), int(value[1])
+                    if seek_target is not None:
+                        current_start = seek_target
+                        break
+                    if paused:
+                        if lookahead_done or lookahead >= lookahead_budget:
+                            time.sleep(0.03)
+                            continue
+                        try:
+                            next(iterator).release_frame()
+                            lookahead += 1
+                        except StopIteration:
+                            lookahead_done = True
+                        continue
+                    if lookahead:
+                        current_start = playhead
+                        break
+                    try:
+                        output = next(iterator)
+                    except StopIteration:
+                        break
+                    playhead = output.frame_index + 1
+                    if degradation is not None:
+                        degradation.update(output)
+                    frame = output.frame_bgr
+                    if writer is not None:
+                        writer.write(frame)
+                    seq += 1
+                    slot = ring.write(frame, seq) if frame is not None else None
+                    shape = tuple(frame.shape) if frame is not None else None
+                    output.release_frame()
+                    output.frame = None
+                    try:
+                        meta_queue.put_nowait(("frame", generation, seq, slot, shape, ring.dropped, output))
+                    except queue.Full:
+                        if slot is not None:
+                            ring.discard(slot, seq)
+                    if max_fps > 0:
+                        time.sleep(1.0 / max_fps)
+            finally:
+                iterator.close()
+        if not stop.is_set():
+            _send_final(meta_queue, ("eof",))
+    except Exception as exc:
+        _send_final(meta_queue, ("error", str(exc)))
+    finally:
+        if stop.is_set():
+            meta_queue.cancel_join_thread()
+        if writer is not None:
+            message = writer.close()
+            if message:
+                print(message)
+        ring.close()
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import threading
+import time
+from typing import Mapping, Optional, Tuple
 
 import cv2
 import numpy as np
 from PyQt6.QtGui import QImage
 
-from src.core.types import Box, FrameOutput
+from src.core.detections import NO_TRACK, Detections, as_detections
+from src.core.tags import metric_tag_mask
+from src.core.types import FrameOutput
+from src.runtime.latest_slot import LatestSlot
 from src.ui_qt.state_view_spec import StatusDTO, normalize_state, to_state_cn, to_state_color_rgb
 
 _COLOR_MAP = {
@@ -16,36 +21,88 @@ _COLOR_MAP = {
 }
 
 
-def _draw_box(img: np.ndarray, box: Box, color: Tuple[int, int, int], prefix: str) -> None:
-    x1, y1, x2, y2 = [int(v) for v in box.xyxy]
-    cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
-    label = f"{prefix}:{box.label} {box.conf:.2f}"
-    if box.track_id is not None:
-        label += f" id:{box.track_id}"
-    cv2.putText(img, label, (x1, max(0, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+def _draw_detections(img: np.ndarray, dets: Detections, color: Tuple[int, int, int], prefix: str) -> None:
+    if not len(dets):
+        return
+    corners = dets.xyxy.astype(np.int32).tolist()
+    tracks = dets.track_id.tolist()
+    for (x1, y1, x2, y2), name, conf, track_id in zip(corners, dets.label_names(), dets.conf.tolist(), tracks):
+        cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        label = f"{prefix}:{name} {conf:.2f}"
+        if track_id != NO_TRACK:
+            label += f" id:{track_id}"
+        cv2.putText(img, label, (x1, max(0, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
 
 def render_to_qimage(
     frame_bgr: np.ndarray,
-    detections: Dict[str, List[Box]],
+    detections: Mapping[str, Detections],
     *,
     no_overlay: bool = False,
 ) -> QImage:
     frame = frame_bgr if no_overlay else frame_bgr.copy()
     if not no_overlay:
-        for key, boxes in detections.items():
+        for key, dets in detections.items():
             color = _COLOR_MAP.get(key, (160, 160, 160))
-            for box in boxes:
-                _draw_box(frame, box, color, key)
+            _draw_detections(frame, as_detections(dets), color, key)
     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     h, w = frame_rgb.shape[:2]
     bytes_per_line = w * 3
     return QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format.Format_RGB888).copy()
 
 
-def frame_output_to_view(output: FrameOutput, *, no_overlay: bool = False) -> Tuple[QImage, StatusDTO]:
-    tags_c = set(output.metrics.get("tags_c") or [])
-    tags_d = set(output.metrics.get("tags_d") or [])
+def display_size(shape: Tuple[int, ...], target: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+    height, width = shape[:2]
+    if target is None or target[0] <= 0 or target[1] <= 0:
+        return width, height
+    scale = max(target[0] / width, target[1] / height)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def _qimage_array(image: QImage) -> np.ndarray:
+    ptr = image.bits()
+    ptr.setsize(image.sizeInBytes())
+    return np.ndarray(
+        (image.height(), image.width(), 3), dtype=np.uint8, buffer=ptr, strides=(image.bytesPerLine(), 3, 1)
+    )
+
+
+class FrameRenderer:
+    def __init__(self) -> None:
+        self._target: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def set_target_size(self, width: int, height: int) -> None:
+        with self._lock:
+            self._target = (int(width), int(height)) if width > 0 and height > 0 else None
+
+    def render(
+        self,
+        frame_bgr: np.ndarray,
+        detections: Mapping[str, Detections],
+        *,
+        no_overlay: bool = False,
+    ) -> QImage:
+        with self._lock:
+            target = self._target
+        height, width = frame_bgr.shape[:2]
+        size = display_size(frame_bgr.shape, target)
+        image = QImage(size[0], size[1], QImage.Format.Format_BGR888)
+        buf = _qimage_array(image)
+        if size == (width, height):
+            np.copyto(buf, frame_bgr)
+        else:
+            cv2.resize(frame_bgr, size, dst=buf, interpolation=cv2.INTER_LINEAR)
+        if not no_overlay:
+            sx, sy = size[0] / width, size[1] / height
+            for key, dets in detections.items():
+                _draw_detections(buf, as_detections(dets).scaled(sx, sy), _COLOR_MAP.get(key, (160, 160, 160)), key)
+        return image
+
+
+def output_to_status(output: FrameOutput) -> StatusDTO:
+    tags_c_mask = metric_tag_mask(output.metrics, "tags_c")
+    tags_d_mask = metric_tag_mask(output.metrics, "tags_d")
     people_ok = output.metrics.get("people_ok")
     people_count = output.metrics.get("people_count") or 0
     state_reason = output.metrics.get("state_reason")
@@ -55,8 +112,8 @@ def frame_output_to_view(output: FrameOutput, *, no_overlay: bool = False) -> Tu
         state_reason,
         people_ok,
         people_count,
-        tags_c,
-        tags_d,
+        None,
+        None,
     )
     if not state_5class:
         state_5class = "-"
@@ -65,7 +122,7 @@ def frame_output_to_view(output: FrameOutput, *, no_overlay: bool = False) -> Tu
     if video_t_s is None:
         video_t_s = (output.timestamp_ms / 1000.0) if output.timestamp_ms is not None else None
 
-    status = StatusDTO(
+    return StatusDTO(
         state_raw=output.state,
         state_5class=state_5class,
         state_cn=to_state_cn(state_5class),
@@ -73,8 +130,8 @@ def frame_output_to_view(output: FrameOutput, *, no_overlay: bool = False) -> Tu
         color_rgb=color_rgb,
         duration_s=output.state_duration_sec if output.state_duration_sec is not None else 0.0,
         video_t_s=video_t_s,
-        tags_c_set=tags_c,
-        tags_d_set=tags_d,
+        tags_c_mask=tags_c_mask,
+        tags_d_mask=tags_d_mask,
         people_count=people_count,
         people_ok=bool(people_ok) if people_ok is not None else True,
         people_alarm=(not people_ok) if people_ok is not None else False,
@@ -82,5 +139,92 @@ def frame_output_to_view(output: FrameOutput, *, no_overlay: bool = False) -> Tu
         frame_index=output.frame_index,
         fps=output.fps,
     )
-    qimage = render_to_qimage(output.frame_bgr, output.detections, no_overlay=no_overlay)
+
+
+def frame_signal_args(output: FrameOutput) -> Tuple[Optional[np.ndarray], FrameOutput]:
+    metrics = dict(output.metrics)
+    if isinstance(metrics.get("stage_ms"), dict):
+        metrics["stage_ms"] = dict(metrics["stage_ms"])
+    meta = FrameOutput(
+        frame_index=output.frame_index,
+        timestamp_ms=output.timestamp_ms,
+        fps=output.fps,
+        detections=dict(output.detections),
+        state=output.state,
+        state_duration_sec=output.state_duration_sec,
+        metrics=metrics,
+    )
+    return None, meta
+
+
+def frame_output_to_view(
+    output: FrameOutput,
+    *,
+    no_overlay: bool = False,
+    renderer: Optional[FrameRenderer] = None,
+) -> Tuple[QImage, StatusDTO]:
+    status = output_to_status(output)
+    if renderer is not None:
+        qimage = renderer.render(output.frame_bgr, output.detections, no_overlay=no_overlay)
+    else:
+        qimage = render_to_qimage(output.frame_bgr, output.detections, no_overlay=no_overlay)
     return qimage, status
+
+
+class ViewPublisher:
+    def __init__(self, renderer: FrameRenderer, *, display_fps: float = 15.0, no_overlay: bool = False) -> None:
+        self.renderer = renderer
+        self.slot = LatestSlot()
+        self.no_overlay = no_overlay
+        self._interval = 1.0 / max(1.0, float(display_fps))
+        self._next_t = 0.0
+        self._held: Optional[FrameOutput] = None
+        self._held_status: Optional[StatusDTO] = None
+        self.last_view: Optional[Tuple[QImage, StatusDTO]] = None
+
+    @property
+    def display_fps(self) -> float:
+        return 1.0 / self._interval
+
+    @display_fps.setter
+    def display_fps(self, fps: float) -> None:
+        self._interval = 1.0 / max(1.0, float(fps))
+
+    def hold(self, output: FrameOutput, status: StatusDTO) -> None:
+        if self._held is not None:
+            self._held.release_frame()
+        self._held = output
+        self._held_status = status
+
+    def due(self) -> bool:
+        return self._held is not None and time.perf_counter() >= self._next_t
+
+    def publish(self) -> Optional[Tuple[QImage, StatusDTO]]:
+        output, status = self._held, self._held_status
+        if output is None or status is None:
+            return None
+        self._held = None
+        self._held_status = None
+        now = time.perf_counter()
+        self._next_t = now + self._interval
+        if output.frame_bgr is not None:
+            qimage = self.renderer.render(output.frame_bgr, output.detections, no_overlay=self.no_overlay)
+            output.release_frame()
+        elif self.last_view is not None:
+            qimage = self.last_view[0]
+        else:
+            return None
+        self.last_view = (qimage, status)
+        self.slot.put(self.last_view)
+        return self.last_view
+
+    def republish(self, status: StatusDTO) -> None:
+        if self.last_view is not None:
+            self.last_view = (self.last_view[0], status)
+            self.slot.put(self.last_view)
+
+    def discard(self) -> None:
+        if self._held is not None:
+            self._held.release_frame()
+        self._held = None
+        self._held_status = None
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import polars as pl
+
+from src.core.config import AppConfig, OffMode
+from src.core.tags import TAGS
+from src.core.types import FrameOutput
+from src.engine.state_engine_5 import StateEngine5
+from src.filters.blocking_smoother import BlockingSmoother
+from src.filters.people_smoother import PeopleSmoother
+from src.filters.sampling_close_smoother import SamplingCloseSmoother
+from src.runtime.run_log import scan_run_log
+
+_REPLAY_COLUMNS = (
+    "frame_index",
+    "timestamp_ms",
+    "video_t_s",
+    "time_ms",
+    "inferred",
+    "propagation",
+    "det_people",
+    "det_sampling_close",
+    "det_blocking",
+)
+
+
+@dataclass
+class RecordedRun:
+    frame_index: np.ndarray
+    time_ms: np.ndarray
+    video_t_s: np.ndarray
+    inferred: np.ndarray
+    propagated: np.ndarray
+    people_ids: np.ndarray
+    people_offsets: np.ndarray
+    tags_c: Dict[str, np.ndarray] = field(default_factory=dict)
+    conf_c: Dict[str, np.ndarray] = field(default_factory=dict)
+    tags_d: Dict[str, np.ndarray] = field(default_factory=dict)
+    conf_d: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return int(self.frame_index.shape[0])
+
+
+def _tag_arrays(frame: pl.DataFrame, column: str) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    if column not in frame.columns:
+        return {}, {}
+    labels = (
+        frame.select(pl.col(column).list.eval(pl.element().struct.field("label")).explode().drop_nulls().unique())
+        .to_series()
+        .to_list()
+    )
+    observed: Dict[str, np.ndarray] = {}
+    conf: Dict[str, np.ndarray] = {}
+    for label in labels:
+        hit = pl.element().struct.field("label") == label
+        arrays = frame.select(
+            pl.col(column).list.eval(hit).list.any().fill_null(False).alias("observed"),
+            pl.col(column)
+            .list.eval(pl.when(hit).then(pl.element().struct.field("conf")))
+            .list.max()
+            .fill_null(0.0)
+            .alias("conf"),
+        )
+        observed[label] = arrays["observed"].to_numpy().astype(bool)
+        conf[label] = arrays["conf"].to_numpy().astype(np.float64)
+    return observed, conf
+
+
+def load_recorded_run(run_log_path: str) -> RecordedRun:
+    lazy = scan_run_log(run_log_path)
+    available = set(lazy.collect_schema().names())
+    frame = lazy.select([name for name in _REPLAY_COLUMNS if name in available]).collect()
+    n = frame.height
+
+    time_ms = frame["time_ms"] if "time_ms" in frame.columns else pl.Series([None] * n, dtype=pl.Float64)
+    if "timestamp_ms" in frame.columns:
+        time_ms = time_ms.fill_null(frame["timestamp_ms"])
+    video_t_s = frame["video_t_s"] if "video_t_s" in frame.columns else pl.Series([None] * n, dtype=pl.Float64)
+    inferred = frame["inferred"] if "inferred" in frame.columns else pl.Series([None] * n, dtype=pl.Boolean)
+    propagation = frame["propagation"] if "propagation" in frame.columns else pl.Series([None] * n, dtype=pl.Float64)
+
+    if "det_people" in frame.columns:
+        ids = frame.select(
+            pl.col("det_people")
+            .list.eval(pl.element().struct.field("track_id").drop_nulls().unique(maintain_order=True))
+            .alias("ids")
+        )["ids"]
+        counts = ids.list.len().fill_null(0).to_numpy().astype(np.int64)
+        people_ids = ids.explode().drop_nulls().to_numpy().astype(np.int64)
+    else:
+        counts = np.zeros(n, dtype=np.int64)
+        people_ids = np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    tags_c, conf_c = _tag_arrays(frame, "det_sampling_close")
+    tags_d, conf_d = _tag_arrays(frame, "det_blocking")
+    return RecordedRun(
+        frame_index=frame["frame_index"].to_numpy().astype(np.int64),
+        time_ms=time_ms.fill_null(0.0).to_numpy().astype(np.float64),
+        video_t_s=video_t_s.cast(pl.Float64).to_numpy().astype(np.float64),
+        inferred=inferred.fill_null(True).to_numpy().astype(bool),
+        propagated=propagation.is_not_null().to_numpy().astype(bool),
+        people_ids=people_ids,
+        people_offsets=offsets,
+        tags_c=tags_c,
+        conf_c=conf_c,
+        tags_d=tags_d,
+        conf_d=conf_d,
+    )
+
+
+def _subset(values: Dict[str, np.ndarray], rows: np.ndarray) -> Dict[str, np.ndarray]:
+    return {tag: array[rows] for tag, array in values.items()}
+
+
+def mask_array(tags: Dict[str, np.ndarray], n: int) -> np.ndarray:
+    mask = np.zeros(n, dtype=np.int64)
+    for tag, active in tags.items():
+        mask[active] |= TAGS.bit(tag)
+    return mask
+
+
+@dataclass
+class ReplayArrays:
+    people_count: np.ndarray
+    people_ok: np.ndarray
+    tags_c: np.ndarray
+    tags_d: np.ndarray
+    state: Optional[np.ndarray]
+    state_raw: Optional[np.ndarray]
+
+
+def replay_arrays(run: RecordedRun, cfg: AppConfig) -> ReplayArrays:
+    n = len(run)
+    update_rows = run.inferred.copy()
+    if n:
+        update_rows[0] = True
+    rows = np.flatnonzero(update_rows)
+    hold = np.cumsum(update_rows) - 1
+
+    if cfg.enable_b:
+        people_rows = update_rows | run.propagated
+        prows = np.flatnonzero(people_rows)
+        smoother = PeopleSmoother(cfg.people_smoother)
+        starts = run.people_offsets[prows]
+        ends = run.people_offsets[prows + 1]
+        if prows.shape[0] == n:
+            ids, offsets = run.people_ids, run.people_offsets
+        else:
+            ids = np.concatenate([run.people_ids[s:e] for s, e in zip(starts, ends)]) if n else run.people_ids
+            offsets = np.zeros(prows.shape[0] + 1, dtype=np.int64)
+            np.cumsum(ends - starts, out=offsets[1:])
+        count, _ok = smoother.update_many(ids, offsets)
+        people_count = count[np.cumsum(people_rows) - 1]
+    elif cfg.off_mode_b == OffMode.INJECT:
+        people_count = np.full(n, cfg.inject_people_count, dtype=np.int64)
+    else:
+        people_count = np.zeros(n, dtype=np.int64)
+    if cfg.enable_b or cfg.off_mode_b == OffMode.INJECT:
+        people_ok = people_count == cfg.people_smoother.expected_people
+    else:
+        people_ok = np.zeros(n, dtype=bool)
+
+    if cfg.enable_c:
+        tags = SamplingCloseSmoother(cfg.tags_c_smoother).update_many(
+            _subset(run.tags_c, rows), _subset(run.conf_c, rows)
+        )
+        tags_c = mask_array(tags, rows.shape[0])[hold]
+    else:
+        tags_c = np.full(n, TAGS.mask(cfg.inject_tags_c) if cfg.off_mode_c == OffMode.INJECT else 0, dtype=np.int64)
+    if cfg.enable_d:
+        tags = BlockingSmoother(cfg.tags_d_smoother).update_many(
+            _subset(run.tags_d, rows), _subset(run.conf_d, rows)
+        )
+        tags_d = mask_array(tags, rows.shape[0])[hold]
+    else:
+        tags_d = np.full(n, TAGS.mask(cfg.inject_tags_d) if cfg.off_mode_d == OffMode.INJECT else 0, dtype=np.int64)
+
+    state = None
+    state_raw = None
+    if cfg.enable_e:
+        state_raw, state = StateEngine5(cfg.state_engine).update_many(tags_c | tags_d)
+    return ReplayArrays(
+        people_count=people_count,
+        people_ok=people_ok,
+        tags_c=tags_c,
+        tags_d=tags_d,
+        state=state,
+        state_raw=state_raw,
+    )
+
+
+def replay_outputs(run: RecordedRun, cfg: AppConfig) -> Iterator[FrameOutput]:
+    n = len(run)
+    if n == 0:
+        return
+    arrays = replay_arrays(run, cfg)
+    if arrays.state is not None:
+        names = np.asarray(StateEngine5.STATES, dtype=object)
+        states = names[arrays.state].tolist()
+        reasons = np.asarray(StateEngine5.REASONS, dtype=object)[arrays.state_raw].tolist()
+        codes = arrays.state
+    else:
+        states = ["N/A"] * n
+        reasons = [None] * n
+        codes = np.zeros(n, dtype=np.int8)
+
+    idx = np.arange(n, dtype=np.int64)
+    change = np.ones(n, dtype=bool)
+    change[1:] = codes[1:] != codes[:-1]
+    run_start = np.maximum.accumulate(np.where(change, idx, 0))
+    durations = np.maximum(0.0, run.video_t_s - run.video_t_s[run_start])
+
+    tags_c = arrays.tags_c.tolist()
+    tags_d = arrays.tags_d.tolist()
+    frame_index = run.frame_index.tolist()
+    time_ms = run.time_ms.tolist()
+    video_t_s = [None if np.isnan(v) else v for v in run.video_t_s.tolist()]
+    duration = [None if np.isnan(v) else v for v in durations.tolist()]
+    people_count = arrays.people_count.tolist()
+    people_ok = arrays.people_ok.tolist()
+    inferred = run.inferred.tolist()
+    for i in range(n):
+        yield FrameOutput(
+            frame_index=frame_index[i],
+            timestamp_ms=time_ms[i],
+            frame_bgr=None,
+            state=states[i],
+            state_duration_sec=duration[i],
+            metrics={
+                "people_count": people_count[i],
+                "people_ok": people_ok[i],
+                "tags_c_mask": tags_c[i],
+                "tags_d_mask": tags_d[i],
+                "state_reason": reasons[i],
+                "video_t_s": video_t_s[i],
+                "time_ms": time_ms[i],
+                "inferred": inferred[i],
+            },
+        )
+
+
+def state_timeline(
+    outputs: Iterable[FrameOutput],
+) -> Tuple[List[Tuple[str, float, float]], List[Tuple[str, str, float]]]:
+    segments: List[Tuple[str, float, float]] = []
+    transitions: List[Tuple[str, str, float]] = []
+    current_state: Optional[str] = None
+    current_start: Optional[float] = None
+    end_ms: Optional[float] = None
+    for output in outputs:
+        time_ms = output.metrics.get("time_ms", output.timestamp_ms)
+        if current_state is None:
+            current_state = output.state
+            current_start = time_ms
+        if output.state != current_state:
+            segments.append((current_state, current_start, time_ms))
+            transitions.append((current_state, output.state, time_ms))
+            current_state = output.state
+            current_start = time_ms
+        end_ms = time_ms
+    if current_state is not None and current_start is not None and end_ms is not None:
+        segments.append((current_state, current_start, end_ms))
+    return segments, transitions
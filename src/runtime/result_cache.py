@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from src.core.types import FrameOutput
+
+DEFAULT_MAX_FRAMES = 50_000
+DEFAULT_CHUNK_FRAMES = 1_000
+
+Chunk = Dict[int, FrameOutput]
+
+
+def _strip(output: FrameOutput) -> FrameOutput:
+    metrics = dict(output.metrics)
+    stage_ms = metrics.get("stage_ms")
+    if isinstance(stage_ms, dict):
+        metrics["stage_ms"] = dict(stage_ms)
+    return FrameOutput(
+        frame_index=output.frame_index,
+        timestamp_ms=output.timestamp_ms,
+        fps=output.fps,
+        detections=dict(output.detections),
+        state=output.state,
+        state_duration_sec=output.state_duration_sec,
+        metrics=metrics,
+    )
+
+
+class ResultCache:
+    def __init__(
+        self,
+        *,
+        max_frames: int = DEFAULT_MAX_FRAMES,
+        chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        self.chunk_frames = max(1, int(chunk_frames))
+        self.max_chunks = max(1, int(max_frames) // self.chunk_frames)
+        self._spill_root = spill_dir
+        self._spill_dir: Optional[str] = None
+        self._lock = threading.Lock()
+        self._frames: Set[int] = set()
+        self._chunks: "OrderedDict[int, Chunk]" = OrderedDict()
+        self._spilled: Dict[int, str] = {}
+        self.hits = 0
+        self.spills = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._frames)
+
+    def __contains__(self, frame_index: int) -> bool:
+        with self._lock:
+            return frame_index in self._frames
+
+    def put(self, output: FrameOutput) -> None:
+        entry = _strip(output)
+        key = entry.frame_index // self.chunk_frames
+        with self._lock:
+            chunk = self._chunk(key)
+            chunk[entry.frame_index] = entry
+            self._frames.add(entry.frame_index)
+
+    def get(self, frame_index: int) -> Optional[FrameOutput]:
+        with self._lock:
+            if frame_index not in self._frames:
+                return None
+            entry = self._chunk(frame_index // self.chunk_frames).get(frame_index)
+            if entry is None:
+                return None
+            self.hits += 1
+        return _strip(entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._chunks.clear()
+            self._spilled.clear()
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def _chunk(self, key: int) -> Chunk:
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        path = self._spilled.pop(key, None)
+        chunk = {}
+        if path is not None:
+            try:
+                with open(path, "rb") as handle:
+                    chunk = pickle.load(handle)
+                os.remove(path)
+            except OSError:
+                self._frames.difference_update(range(key * self.chunk_frames, (key + 1) * self.chunk_frames))
+        self._chunks[key] = chunk
+        while len(self._chunks) > self.max_chunks:
+            self._spill(*self._chunks.popitem(last=False))
+        return chunk
+
+    def _spill(self, key: int, chunk: Chunk) -> None:
+        if not chunk:
+            return
+        try:
+            if self._spill_dir is None:
+                if self._spill_root:
+                    os.makedirs(self._spill_root, exist_ok=True)
+                self._spill_dir = tempfile.mkdtemp(prefix="results_", dir=self._spill_root)
+                weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+            path = os.path.join(self._spill_dir, f"{key}.pkl")
+            with open(path, "wb") as handle:
+                pickle.dump(chunk, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            self._frames.difference_update(chunk.keys())
+            return
+        self._spilled[key] = path
+        self.spills += 1
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import polars as pl
+
+from src.core.tags import TAG_METRIC_KEYS, metric_tag_mask, tag_names
+from src.core.detections import as_detections
+from src.core.types import FrameOutput
+
+RUN_LOG_EXT = ".parquet"
+DETECTION_KEYS = ("people", "sampling_close", "blocking")
+
+BOX_DTYPE = pl.Struct(
+    {
+        "label": pl.Utf8,
+        "conf": pl.Float32,
+        "x1": pl.Float32,
+        "y1": pl.Float32,
+        "x2": pl.Float32,
+        "y2": pl.Float32,
+        "track_id": pl.Int64,
+    }
+)
+
+_METRIC_COLUMNS: Dict[str, pl.DataType] = {
+    "people_count": pl.Int32,
+    "people_ok": pl.Boolean,
+    "tags_c": pl.List(pl.Utf8),
+    "tags_d": pl.List(pl.Utf8),
+    "state_reason": pl.Utf8,
+    "video_t_s": pl.Float64,
+    "time_ms": pl.Float64,
+    "target_ratio": pl.Float64,
+    "inferred": pl.Boolean,
+    "propagation": pl.Float64,
+}
+
+_STAGE_COLUMNS = ("read_ms", "decode_ms", "infer_ms", "post_ms", "emit_ms")
+_EXCLUDED_EXTRA = ("stage_ms",) + tuple(f"{key}_mask" for key in TAG_METRIC_KEYS)
+
+_PERF_COLUMNS = ("display_fps", "rt_ratio", "perf_ms")
+
+FRAME_SCHEMA: Dict[str, pl.DataType] = {
+    "frame_index": pl.Int64,
+    "timestamp_ms": pl.Float64,
+    "fps": pl.Float64,
+    "state": pl.Utf8,
+    "state_duration_sec": pl.Float64,
+    **_METRIC_COLUMNS,
+    **{name: pl.Float64 for name in _STAGE_COLUMNS},
+    **{name: pl.Float64 for name in _PERF_COLUMNS},
+    **{f"det_{key}": pl.List(BOX_DTYPE) for key in DETECTION_KEYS},
+    "metrics_extra": pl.Utf8,
+}
+
+
+def frame_row(output: FrameOutput, **perf: Any) -> Dict[str, Any]:
+    metrics = output.metrics or {}
+    row: Dict[str, Any] = {
+        "frame_index": output.frame_index,
+        "timestamp_ms": output.timestamp_ms,
+        "fps": output.fps,
+        "state": output.state,
+        "state_duration_sec": output.state_duration_sec,
+    }
+    for name in _METRIC_COLUMNS:
+        value = metrics.get(name)
+        if name in TAG_METRIC_KEYS:
+            value = list(tag_names(metric_tag_mask(metrics, name)))
+        elif isinstance(value, set):
+            value = sorted(value)
+        row[name] = value
+    stage_ms = metrics.get("stage_ms") or {}
+    for name in _STAGE_COLUMNS:
+        row[name] = stage_ms.get(name)
+    for name in _PERF_COLUMNS:
+        row[name] = None
+    for key in DETECTION_KEYS:
+        row[f"det_{key}"] = as_detections(output.detections.get(key)).to_records()
+    extra = {k: v for k, v in metrics.items() if k not in _METRIC_COLUMNS and k not in _EXCLUDED_EXTRA}
+    row["metrics_extra"] = json.dumps(extra, ensure_ascii=True, default=str) if extra else None
+    row.update({k: v for k, v in perf.items() if k in FRAME_SCHEMA})
+    return row
+
+
+class RunLogWriter:
+    def __init__(self, path: str, *, row_group_rows: int = 2048, compression: str = "zstd") -> None:
+        self._path = path
+        self._row_group_rows = max(1, int(row_group_rows))
+        self._compression = compression
+        self._parts_dir = f"{path}.parts"
+        self._columns: Dict[str, List[Any]] = {name: [] for name in FRAME_SCHEMA}
+        self._buffered = 0
+        self._parts: List[str] = []
+        self._rows = 0
+        self._closed = False
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        if os.path.isdir(self._parts_dir):
+            shutil.rmtree(self._parts_dir)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    def write(self, output: FrameOutput, **perf: Any) -> None:
+        self.write_row(frame_row(output, **perf))
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        for name, values in self._columns.items():
+            values.append(row.get(name))
+        self._buffered += 1
+        self._rows += 1
+        if self._buffered >= self._row_group_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buffered == 0:
+            return
+        os.makedirs(self._parts_dir, exist_ok=True)
+        part_path = os.path.join(self._parts_dir, f"part-{len(self._parts):05d}{RUN_LOG_EXT}")
+        frame = pl.DataFrame(self._columns, schema=FRAME_SCHEMA)
+        frame.write_parquet(part_path, compression=self._compression)
+        self._parts.append(part_path)
+        self._columns = {name: [] for name in FRAME_SCHEMA}
+        self._buffered = 0
+
+    def close(self) -> str:
+        if self._closed:
+            return self._path
+        self._closed = True
+        self._flush()
+        if not self._parts:
+            pl.DataFrame(self._columns, schema=FRAME_SCHEMA).write_parquet(
+                self._path, compression=self._compression
+            )
+        elif len(self._parts) == 1:
+            os.replace(self._parts[0], self._path)
+        else:
+            pl.scan_parquet(self._parts).sink_parquet(
+                self._path,
+                compression=self._compression,
+                row_group_size=self._row_group_rows,
+            )
+        shutil.rmtree(self._parts_dir, ignore_errors=True)
+        return self._path
+
+    def __enter__(self) -> "RunLogWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def write_run_log(frame_outputs: Iterable[FrameOutput], path: str, *, row_group_rows: int = 2048) -> str:
+    with RunLogWriter(path, row_group_rows=row_group_rows) as writer:
+        for output in frame_outputs:
+            writer.write(output)
+    return path
+
+
+def is_run_log(path: str) -> bool:
+    return path.lower().endswith(RUN_LOG_EXT)
+
+
+def scan_run_log(path: str, columns: Optional[Sequence[str]] = None) -> pl.LazyFrame:
+    sources: Any = path
+    if not os.path.exists(path) and os.path.isdir(f"{path}.parts"):
+        sources = sorted(glob.glob(os.path.join(f"{path}.parts", f"*{RUN_LOG_EXT}")))
+    lazy = pl.scan_parquet(sources)
+    if columns is not None:
+        lazy = lazy.select(list(columns))
+    return lazy
+
+
+def read_run_log(path: str, columns: Optional[Sequence[str]] = None) -> pl.DataFrame:
+    return scan_run_log(path, columns).collect()
+
+
+def _payload_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {}
+    for name in _METRIC_COLUMNS:
+        if name in row:
+            metrics[name] = row[name]
+    stage_ms = {name: row[name] for name in _STAGE_COLUMNS if row.get(name) is not None}
+    if stage_ms:
+        metrics["stage_ms"] = stage_ms
+    for name in _PERF_COLUMNS:
+        if row.get(name) is not None:
+            metrics[name] = row[name]
+    if row.get("metrics_extra"):
+        metrics.update(json.loads(row["metrics_extra"]))
+    detections = {}
+    for key in DETECTION_KEYS:
+        boxes = row.get(f"det_{key}") or []
+        detections[key] = [
+            {
+                "label": box["label"],
+                "conf": box["conf"],
+                "xyxy": [box["x1"], box["y1"], box["x2"], box["y2"]],
+                "track_id": box["track_id"],
+            }
+            for box in boxes
+        ]
+    return {
+        "frame_index": row.get("frame_index"),
+        "timestamp_ms": row.get("timestamp_ms"),
+        "fps": row.get("fps"),
+        "state": row.get("state"),
+        "state_duration_sec": row.get("state_duration_sec"),
+        "detections": detections,
+        "metrics": metrics,
+    }
+
+
+def iter_run_log_payloads(path: str, *, batch_rows: int = 4096) -> Iterator[Dict[str, Any]]:
+    lazy = scan_run_log(path)
+    batch_rows = max(1, int(batch_rows))
+    offset = 0
+    while True:
+        chunk = lazy.slice(offset, batch_rows).collect()
+        for row in chunk.iter_rows(named=True):
+            yield _payload_from_row(row)
+        if chunk.height < batch_rows:
+            break
+        offset += batch_rows
+
+
+def run_log_to_jsonl(path: str, out_path: Optional[str] = None) -> str:
+    if out_path is None:
+        out_path = os.path.splitext(path)[0] + ".jsonl"
+    with open(out_path, "w", encoding="utf-8") as f:
+        for payload in iter_run_log_payloads(path):
+            f.write(json.dumps(payload, ensure_ascii=True) + "\n")
+    return out_path
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Tuple
+
+import numpy as np
+import polars as pl
+
+from src.core.config import AppConfig, OffMode
+from src.core.tags import TAGS
+from src.core.types import FrameOutput, TagsRaw
+from src.engine.state_engine_5 import StateEngine5
+from src.filters.blocking_smoother import BlockingSmoother
+from src.filters.sampling_close_smoother import SamplingCloseSmoother
+from src.runtime.frame_scheduler import StepPolicyType
+from src.runtime.replay import RecordedRun, mask_array
+from src.runtime.run_log import scan_run_log
+
+DEFAULT_QUEUE_SIZE = 4
+DEFAULT_GRAB_FRACTION = 0.8
+
+PolicyFactory = Callable[[Callable[[], float], int], Optional[StepPolicyType]]
+
+
+class VirtualClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class StageCosts:
+    read_s: np.ndarray
+    decode_s: np.ndarray
+    grab_s: np.ndarray
+    infer_s: np.ndarray
+    post_s: np.ndarray
+    emit_s: np.ndarray
+
+
+@dataclass
+class SimResult:
+    policy: str
+    frames: int
+    dropped: int
+    wall_s: float
+    rt_ratio: float
+    step_mean: float
+    step_changes: int
+    agreement: Optional[float]
+    transitions: int
+    missed: int
+    latency_ms_mean: Optional[float]
+    latency_ms_max: Optional[float]
+    processed: np.ndarray
+    states: np.ndarray
+
+
+def _column(frame: pl.DataFrame, name: str, n: int) -> np.ndarray:
+    if name not in frame.columns:
+        return np.full(n, np.nan)
+    return frame[name].cast(pl.Float64).fill_null(float("nan")).to_numpy().astype(np.float64)
+
+
+def load_stage_costs(
+    run_log_path: str,
+    run: RecordedRun,
+    *,
+    grab_fraction: float = DEFAULT_GRAB_FRACTION,
+) -> StageCosts:
+    lazy = scan_run_log(run_log_path)
+    available = set(lazy.collect_schema().names())
+    names = [name for name in ("read_ms", "decode_ms", "infer_ms", "post_ms", "emit_ms") if name in available]
+    frame = lazy.select(names).collect()
+    n = len(run)
+    read = _column(frame, "read_ms", n)
+    decode = _column(frame, "decode_ms", n)
+    infer = _column(frame, "infer_ms", n)
+    read = np.where(np.isnan(read), decode, np.fmax(read, decode))
+    decode = np.where(np.isnan(decode), read, decode)
+    inferred = run.inferred & ~np.isnan(infer)
+    fallback = float(np.median(infer[inferred])) if inferred.any() else 0.0
+    infer = np.where(inferred, infer, fallback)
+    return StageCosts(
+        read_s=np.nan_to_num(read) / 1000.0,
+        decode_s=np.nan_to_num(decode) / 1000.0,
+        grab_s=np.nan_to_num(decode) * grab_fraction / 1000.0,
+        infer_s=infer / 1000.0,
+        post_s=np.nan_to_num(_column(frame, "post_ms", n)) / 1000.0,
+        emit_s=np.nan_to_num(_column(frame, "emit_ms", n)) / 1000.0,
+    )
+
+
+def estimate_video_fps(run: RecordedRun, default: float = 25.0) -> float:
+    if len(run) < 2:
+        return default
+    frames = np.diff(run.frame_index).astype(np.float64)
+    times = np.diff(run.time_ms)
+    valid = (frames > 0) & (times > 0)
+    if not valid.any():
+        return default
+    return float(1000.0 / np.median(times[valid] / frames[valid]))
+
+
+class _OnlineState:
+    def __init__(self, run: RecordedRun, cfg: AppConfig) -> None:
+        n = len(run)
+        self._cfg = cfg
+        self._raw_c = mask_array(run.tags_c, n)
+        self._raw_d = mask_array(run.tags_d, n)
+        self._sampling = SamplingCloseSmoother(cfg.tags_c_smoother)
+        self._blocking = BlockingSmoother(cfg.tags_d_smoother)
+        self._engine = StateEngine5(cfg.state_engine)
+        self._codes = {name: code for code, name in enumerate(StateEngine5.STATES)}
+
+    def _off_mask(self, inject, off_mode: OffMode) -> int:
+        return TAGS.mask(inject) if off_mode == OffMode.INJECT else 0
+
+    def update(self, row: int) -> Tuple[int, float]:
+        cfg = self._cfg
+        pressure = 0.0
+        if cfg.enable_c:
+            tags_c = self._sampling.update(TagsRaw(mask=int(self._raw_c[row]))).mask
+            pressure = self._sampling.transition_pressure()
+        else:
+            tags_c = self._off_mask(cfg.inject_tags_c, cfg.off_mode_c)
+        if cfg.enable_d:
+            tags_d = self._blocking.update(TagsRaw(mask=int(self._raw_d[row]))).mask
+            pressure = max(pressure, self._blocking.transition_pressure())
+        else:
+            tags_d = self._off_mask(cfg.inject_tags_d, cfg.off_mode_d)
+        state = self._engine.compute(tags_c | tags_d)
+        return self._codes[state.state_5class], pressure
+
+
+def _held(codes: np.ndarray, processed: np.ndarray) -> np.ndarray:
+    idx = np.arange(codes.shape[0])
+    return codes[np.maximum.accumulate(np.where(processed, idx, 0))]
+
+
+def _latencies(reference: np.ndarray, held: np.ndarray) -> Tuple[List[int], int]:
+    changes = np.flatnonzero(reference[1:] != reference[:-1]) + 1
+    bounds = np.append(changes, reference.shape[0])
+    latencies: List[int] = []
+    missed = 0
+    for start, end in zip(changes.tolist(), bounds[1:].tolist()):
+        hits = np.flatnonzero(held[start:end] == reference[start])
+        if hits.size:
+            latencies.append(int(hits[0]))
+        else:
+            missed += 1
+    return latencies, missed
+
+
+def simulate(
+    run: RecordedRun,
+    costs: StageCosts,
+    cfg: AppConfig,
+    policy_factory: PolicyFactory,
+    *,
+    name: str,
+    video_fps: float,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    reference: Optional[np.ndarray] = None,
+) -> SimResult:
+    n = len(run)
+    clock = VirtualClock()
+    first = int(run.frame_index[0]) if n else 0
+    policy = policy_factory(clock, first + n)
+    queue_size = max(1, int(queue_size))
+    state = _OnlineState(run, cfg)
+    codes = np.zeros(n, dtype=np.int8)
+    processed = np.zeros(n, dtype=bool)
+    steps: List[int] = []
+
+    decoded: Deque[Tuple[int, float]] = deque()
+    emitted: Deque[float] = deque(maxlen=queue_size)
+    src_row = 0
+    src_t = 0.0
+    infer_t = 0.0
+    emit_t = 0.0
+    skip_until = 0
+    step_hint = 1
+    dropped = 0
+    last_row = 0
+
+    while True:
+        while src_row < n and len(decoded) < queue_size and (src_t <= infer_t or not decoded):
+            row = src_row
+            src_row += 1
+            if row < skip_until or (policy is not None and (row - skip_until) % step_hint):
+                src_t += costs.grab_s[row]
+                continue
+            src_t += costs.read_s[row]
+            decoded.append((row, src_t))
+        if not decoded:
+            break
+        row, ready = decoded.popleft()
+        start = max(infer_t, ready)
+        if len(decoded) == queue_size - 1:
+            src_t = max(src_t, start)
+        if row < skip_until:
+            dropped += 1
+            infer_t = start
+            continue
+        dt = costs.infer_s[row] + costs.post_s[row]
+        done = start + dt
+        codes[row], pressure = state.update(row)
+        processed[row] = True
+        last_row = row
+        output = FrameOutput(
+            frame_index=first + row,
+            timestamp_ms=float(run.time_ms[row]),
+            frame_bgr=None,
+            metrics={
+                "video_t_s": (first + row) / video_fps,
+                "time_ms": float(run.time_ms[row]),
+                "inferred": True,
+                "transition": pressure,
+                "prefetch_fill": len(decoded),
+                "stage_ms": {
+                    "read_ms": costs.read_s[row] * 1000.0,
+                    "decode_ms": costs.decode_s[row] * 1000.0,
+                    "infer_ms": costs.infer_s[row] * 1000.0,
+                    "post_ms": costs.post_s[row] * 1000.0,
+                },
+            },
+        )
+        clock.now = done
+        if policy is not None:
+            step = max(1, int(policy(output, dt)))
+            steps.append(step)
+            step_hint = step
+            skip_until = row + step
+        put = max(done, emitted[0]) if len(emitted) == queue_size else done
+        emit_t = max(emit_t, put) + costs.emit_s[row]
+        emitted.append(emit_t)
+        infer_t = put
+
+    wall_s = emit_t
+    held = _held(codes, processed)
+    if reference is None:
+        reference = held
+    latencies, missed = _latencies(reference, held)
+    frame_ms = 1000.0 / video_fps
+    return SimResult(
+        policy=name,
+        frames=int(processed.sum()),
+        dropped=dropped,
+        wall_s=wall_s,
+        rt_ratio=(last_row / video_fps) / wall_s if wall_s > 0 else 0.0,
+        step_mean=float(np.mean(steps)) if steps else 1.0,
+        step_changes=int(np.count_nonzero(np.diff(steps))) if len(steps) > 1 else 0,
+        agreement=float(np.mean(held == reference)) if n else None,
+        transitions=len(latencies) + missed,
+        missed=missed,
+        latency_ms_mean=float(np.mean(latencies)) * frame_ms if latencies else None,
+        latency_ms_max=float(np.max(latencies)) * frame_ms if latencies else None,
+        processed=processed,
+        states=held,
+    )
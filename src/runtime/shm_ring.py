@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+FREE = 0
+WRITING = 1
+READY = 2
+READING = 3
+
+RingSpec = Dict[str, Any]
+
+
+class SharedFrameRing:
+    def __init__(
+        self,
+        slots: int,
+        slot_bytes: int,
+        lock: Any,
+        *,
+        frames: shared_memory.SharedMemory,
+        control: shared_memory.SharedMemory,
+        owner: bool,
+    ) -> None:
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._lock = lock
+        self._frames = frames
+        self._control = control
+        self._owner = owner
+        self._table = np.ndarray((slots, 2), dtype=np.int64, buffer=control.buf)
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, slots: int, shape: Tuple[int, ...], lock: Any) -> "SharedFrameRing":
+        slots = max(2, int(slots))
+        slot_bytes = int(np.prod(shape)) or 1
+        frames = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        control = shared_memory.SharedMemory(create=True, size=slots * 2 * 8)
+        ring = cls(slots, slot_bytes, lock, frames=frames, control=control, owner=True)
+        ring._table[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec: RingSpec, lock: Any) -> "SharedFrameRing":
+        frames = shared_memory.SharedMemory(name=spec["frames"])
+        control = shared_memory.SharedMemory(name=spec["control"])
+        return cls(spec["slots"], spec["slot_bytes"], lock, frames=frames, control=control, owner=False)
+
+    def spec(self) -> RingSpec:
+        return {
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "frames": self._frames.name,
+            "control": self._control.name,
+        }
+
+    def _view(self, slot: int, shape: Tuple[int, ...]) -> np.ndarray:
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._frames.buf, offset=slot * self.slot_bytes)
+
+    def write(self, frame: np.ndarray, seq: int) -> Optional[int]:
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            self.dropped += 1
+            return None
+        table = self._table
+        with self._lock:
+            free = np.flatnonzero(table[:, 0] == FREE)
+            if free.size:
+                slot = int(free[0])
+            else:
+                ready = np.flatnonzero(table[:, 0] == READY)
+                if not ready.size:
+                    self.dropped += 1
+                    return None
+                slot = int(ready[np.argmin(table[ready, 1])])
+                self.dropped += 1
+            table[slot, 0] = WRITING
+        np.copyto(self._view(slot, frame.shape), frame)
+        with self._lock:
+            table[slot, 1] = seq
+            table[slot, 0] = READY
+        return slot
+
+    def acquire(self, slot: int, seq: int, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        table = self._table
+        with self._lock:
+            if table[slot, 0] != READY or table[slot, 1] != seq:
+                return None
+            table[slot, 0] = READING
+        return self._view(slot, shape)
+
+    def release(self, slot: int) -> None:
+        with self._lock:
+            self._table[slot, 0] = FREE
+
+    def discard(self, slot: int, seq: int) -> None:
+        table = self._table
+        with self._lock:
+            if table[slot, 0] == READY and table[slot, 1] == seq:
+                table[slot, 0] = FREE
+
+    def close(self) -> None:
+        self._table = None
+        for block in (self._frames, self._control):
+            try:
+                block.close()
+            except BufferError:
+                pass
+            if self._owner:
+                try:
+                    block.unlink()
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from src.core.types import PeopleRaw
+from src.runtime.frame_processor import FrameProcessor, ProcessorSnapshot, RawDetections, compact_raw
+
+DEFAULT_SNAPSHOT_EVERY = 50
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+@dataclass
+class ReplayEntry:
+    frame_index: int
+    video_t_s: Optional[float]
+    raw: Optional[RawDetections]
+    box_scale: Tuple[float, float] = (1.0, 1.0)
+    propagated: Optional[PeopleRaw] = None
+
+
+@dataclass
+class _Segment:
+    frames: List[int] = field(default_factory=list)
+    entries: List[ReplayEntry] = field(default_factory=list)
+    snapshots: List[ProcessorSnapshot] = field(default_factory=list)
+
+
+class SnapshotStore:
+    def __init__(self, *, every: int = DEFAULT_SNAPSHOT_EVERY, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.every = max(1, int(every))
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._segments: Dict[int, _Segment] = {}
+        self._segment_id = -1
+        self._entries = 0
+        self._last_snapshot: Optional[int] = None
+        self.last_restore: Optional[Dict[str, int]] = None
+
+    def begin(self) -> None:
+        with self._lock:
+            self._segment_id += 1
+            self._segments[self._segment_id] = _Segment()
+            self._last_snapshot = None
+
+    def due(self, frame_index: int) -> bool:
+        return self._last_snapshot is None or frame_index - self._last_snapshot >= self.every
+
+    def add_snapshot(self, snap: ProcessorSnapshot) -> None:
+        with self._lock:
+            segment = self._segments.get(self._segment_id)
+            if segment is None:
+                return
+            segment.snapshots.append(snap)
+            self._last_snapshot = snap.frame_index
+
+    def record(
+        self,
+        frame_index: int,
+        video_t_s: Optional[float],
+        raw: Optional[RawDetections],
+        box_scale: Tuple[float, float] = (1.0, 1.0),
+        propagated: Optional[PeopleRaw] = None,
+    ) -> None:
+        entry = ReplayEntry(
+            frame_index, video_t_s, compact_raw(raw) if raw is not None else None, box_scale, propagated
+        )
+        with self._lock:
+            segment = self._segments.get(self._segment_id)
+            if segment is None:
+                return
+            segment.frames.append(frame_index)
+            segment.entries.append(entry)
+            self._entries += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._entries > self.max_entries and len(self._segments) > 1:
+            oldest = min(self._segments)
+            self._entries -= len(self._segments.pop(oldest).entries)
+        if self._entries <= self.max_entries:
+            return
+        segment = self._segments[min(self._segments)]
+        keep_from = segment.frames[self._entries - self.max_entries]
+        segment.snapshots = [snap for snap in segment.snapshots if snap.frame_index >= keep_from]
+        start = segment.snapshots[0].frame_index if segment.snapshots else segment.frames[-1] + 1
+        cut = bisect.bisect_left(segment.frames, start)
+        del segment.frames[:cut]
+        del segment.entries[:cut]
+        self._entries -= cut
+
+    def _find(self, frame_index: int) -> Optional[Tuple[_Segment, ProcessorSnapshot]]:
+        best: Optional[Tuple[_Segment, ProcessorSnapshot]] = None
+        for segment in self._segments.values():
+            if not segment.frames or not segment.frames[0] <= frame_index <= segment.frames[-1] + 1:
+                continue
+            for snap in reversed(segment.snapshots):
+                if snap.frame_index <= frame_index:
+                    if best is None or snap.frame_index > best[1].frame_index:
+                        best = (segment, snap)
+                    break
+        return best
+
+    def restore(self, processor: FrameProcessor, frame_index: int) -> bool:
+        with self._lock:
+            found = self._find(frame_index)
+            if found is None:
+                self.last_restore = None
+                return False
+            segment, snap = found
+            lo = bisect.bisect_left(segment.frames, snap.frame_index)
+            hi = bisect.bisect_left(segment.frames, frame_index)
+            entries = segment.entries[lo:hi]
+        processor.restore(snap)
+        for entry in entries:
+            processor.replay(entry.video_t_s, entry.raw, entry.box_scale, entry.propagated)
+        self.last_restore = {"snapshot": snap.frame_index, "replayed": len(entries)}
+        return True
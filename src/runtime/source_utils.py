@@ -4,7 +4,7 @@ import argparse
 import os
 from typing import Optional, Tuple
 
-import cv2
+from src.io.source_info import probe_source
 
 _LAST_SOURCE_PATH = ".last_source"
 
@@ -25,12 +25,8 @@ def resolve_source(args: argparse.Namespace) -> str:
 def validate_source(path: str) -> None:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Video source not found: {path}")
-    cap = cv2.VideoCapture(path)
-    try:
-        if not cap.isOpened():
-            raise RuntimeError(f"Failed to open video (permissions/codec?): {path}")
-    finally:
-        cap.release()
+    if not probe_source(path).opened:
+        raise RuntimeError(f"Failed to open video (permissions/codec?): {path}")
 
 
 def write_last_source(path: str) -> None:
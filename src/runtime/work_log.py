@@ -3,15 +3,17 @@ from __future__ import annotations
 import csv
 import os
 import time
-from typing import Optional, Set
+from typing import Optional
 
+from src.core.tags import BLOCKING, NO_BLOCKING
 
-def _blocking_status(tags_d: Optional[Set[str]]) -> str:
-    if not tags_d:
+
+def _blocking_status(tags_d_mask: Optional[int]) -> str:
+    if not tags_d_mask:
         return "unknown"
-    if "blocking" in tags_d:
+    if tags_d_mask & BLOCKING:
         return "blocking"
-    if "no_blocking" in tags_d:
+    if tags_d_mask & NO_BLOCKING:
         return "no_blocking"
     return "unknown"
 
@@ -32,11 +34,11 @@ class WorkLogWriter:
     def path(self) -> str:
         return self._path
 
-    def update(self, duration_s: Optional[float], tags_d: Optional[Set[str]], people_count: Optional[int]) -> None:
+    def update(self, duration_s: Optional[float], tags_d_mask: Optional[int], people_count: Optional[int]) -> None:
         if duration_s is None:
             return
         while duration_s >= self._next_t:
-            status = _blocking_status(tags_d)
+            status = _blocking_status(tags_d_mask)
             people_val = "" if people_count is None else people_count
             self._writer.writerow([f"{self._next_t:.2f}", status, people_val])
             self._next_t += self._interval_s
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+from dataclasses import replace
+from typing import Any, Optional
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from src.core.config import AppConfig
+from src.core.types import FrameHandle, FrameOutput
+from src.io.keyframe_index import keyframe_index
+from src.io.source_info import probe_source
+from src.runtime.pipeline_process import META_QUEUE_SIZE, run_pipeline_process
+from src.runtime.qt_adapter import FrameRenderer, ViewPublisher, frame_signal_args, output_to_status
+from src.runtime.shm_ring import SharedFrameRing
+
+RING_EXTRA_SLOTS = 4
+JOIN_TIMEOUT_S = 2.0
+
+
+class ProcessVideoWorker(QThread):
+    frame_ready = pyqtSignal(object, object)
+    error = pyqtSignal(str)
+    finished = pyqtSignal(str)
+    source_ready = pyqtSignal(int, float)
+
+    def __init__(self, args, cfg: Optional[AppConfig] = None) -> None:
+        super().__init__()
+        self._args = args
+        self._cfg = cfg or AppConfig()
+        self._paused = False
+        self._total_frames: Optional[int] = None
+        self._video_fps: Optional[float] = None
+        self._ctx = mp.get_context("spawn")
+        self._control: Any = self._ctx.Queue()
+        self._seek_pending = False
+        self._seek_generation = 0
+        self.dropped = 0
+        self._view = ViewPublisher(
+            FrameRenderer(),
+            display_fps=getattr(args, "display_fps", 15.0),
+            no_overlay=bool(getattr(args, "no_overlay", False)),
+        )
+        self.view_slot = self._view.slot
+        self.setPriority(QThread.Priority.HighPriority)
+
+    def set_paused(self, paused: bool) -> None:
+        self._paused = paused
+        self._control.put(("pause", paused))
+        self._republish_state(paused)
+
+    def _republish_state(self, paused: bool) -> None:
+        if self._view.last_view is not None:
+            self._view.republish(replace(self._view.last_view[1], run_state_cn="Paused" if paused else "Running"))
+
+    def set_display_size(self, width: int, height: int) -> None:
+        self._view.renderer.set_target_size(width, height)
+
+    def request_seek(self, frame_index: int) -> None:
+        self._seek_generation += 1
+        self._seek_pending = True
+        self._control.put(("seek", (self._seek_generation, max(0, int(frame_index)))))
+
+    def get_total_frames(self) -> Optional[int]:
+        return self._total_frames
+
+    def get_video_fps(self) -> Optional[float]:
+        return self._video_fps
+
+    def _emit_source_ready(self, total_frames: Optional[int], video_fps: Optional[float]) -> None:
+        self._total_frames = total_frames if total_frames and total_frames > 0 else None
+        self._video_fps = video_fps if video_fps and video_fps > 0 else None
+        self.source_ready.emit(self._total_frames or 0, self._video_fps or 0.0)
+
+    def _attach_frame(self, ring: SharedFrameRing, output: FrameOutput, seq: int, slot, shape) -> bool:
+        if slot is None:
+            return False
+        frame = ring.acquire(slot, seq, shape)
+        if frame is None:
+            return False
+        output.frame = FrameHandle(frame, lambda _frame, slot=slot: ring.release(slot))
+        return True
+
+    def _show(self, output: FrameOutput) -> None:
+        self._view.hold(output, output_to_status(output))
+        if self._paused or self._view.due():
+            if self._view.publish() is not None and self._paused:
+                self._republish_state(True)
+
+    def run(self) -> None:
+        had_error = False
+        ring: Optional[SharedFrameRing] = None
+        process = None
+        stop = self._ctx.Event()
+        try:
+            source = self._args.source or self._args.video
+            info = probe_source(source)
+            if info.opened:
+                keyframe_index(source, build=True)
+            self._emit_source_ready(info.frame_count, info.fps)
+            if not info.opened or info.size is None:
+                self.error.emit(f"Failed to open video source: {source}")
+                had_error = True
+                return
+            lock = self._ctx.Lock()
+            slots = int(getattr(self._args, "prefetch", 4) or 4) + RING_EXTRA_SLOTS
+            ring = SharedFrameRing.create(slots, (info.height, info.width, 3), lock)
+            meta_queue = self._ctx.Queue(maxsize=META_QUEUE_SIZE)
+            process = self._ctx.Process(
+                target=run_pipeline_process,
+                args=(self._args, self._cfg, source, info.fps_or(25.0), ring.spec(), lock, meta_queue, self._control, stop),
+                name="RealtimePipeline",
+                daemon=True,
+            )
+            process.start()
+            while not self.isInterruptionRequested():
+                try:
+                    message = meta_queue.get(timeout=0.05)
+                except queue.Empty:
+                    if not process.is_alive():
+                        self.error.emit(f"Pipeline process exited (code {process.exitcode})")
+                        had_error = True
+                        break
+                    if self._view.due():
+                        self._view.publish()
+                    continue
+                batch = [message]
+                while batch[-1][0] == "frame":
+                    try:
+                        batch.append(meta_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                done = False
+                for position, message in enumerate(batch):
+                    kind = message[0]
+                    if kind == "error":
+                        self.error.emit(message[1])
+                        had_error = True
+                        done = True
+                        break
+                    if kind == "eof":
+                        self._view.publish()
+                        done = True
+                        break
+                    _kind, generation, seq, slot, shape, self.dropped, output = message
+                    if generation != self._seek_generation:
+                        if slot is not None:
+                            ring.discard(slot, seq)
+                        continue
+                    if self._seek_pending:
+                        self._seek_pending = False
+                        self._view.discard()
+                    if position == len(batch) - 1 and self._attach_frame(ring, output, seq, slot, shape):
+                        self.frame_ready.emit(*frame_signal_args(output))
+                        self._show(output)
+                        continue
+                    if slot is not None:
+                        ring.discard(slot, seq)
+                    self.frame_ready.emit(*frame_signal_args(output))
+                if done:
+                    break
+        except Exception as exc:
+            self.error.emit(str(exc))
+            had_error = True
+        finally:
+            self._view.discard()
+            stop.set()
+            if process is not None:
+                process.join(JOIN_TIMEOUT_S)
+                if process.is_alive():
+                    process.terminate()
+                    process.join(JOIN_TIMEOUT_S)
+            if ring is not None:
+                ring.close()
+            if not had_error and not self.isInterruptionRequested():
+                self.finished.emit("eof")
@@ -3,32 +3,31 @@ from __future__ import annotations
 import json
 import os
 import time
-from dataclasses import asdict
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import cv2
-
 from src.core.config import AppConfig
+from src.core.detections import detections_payload
+from src.core.tags import decode_tag_metrics
 from src.core.types import FrameOutput
+from src.io.source_info import probe_source
 from src.io.video_writer import VideoWriterManager
+from src.runtime.frame_processor import FrameProcessor
 from src.runtime.pipeline import iter_frame_outputs
+from src.runtime.run_log import RUN_LOG_EXT, RunLogWriter
 from src.runtime.serialization import to_jsonable
 from src.runtime.source_utils import parse_save_size
 from src.runtime.summary import finalize_summary, print_test_report
 
 
 def _payload_from_output(output: FrameOutput) -> Dict[str, Any]:
-    det_payload = {}
-    for key, boxes in output.detections.items():
-        det_payload[key] = [asdict(box) for box in boxes]
     return {
         "frame_index": output.frame_index,
         "timestamp_ms": output.timestamp_ms,
         "fps": output.fps,
         "state": output.state,
         "state_duration_sec": output.state_duration_sec,
-        "detections": det_payload,
-        "metrics": output.metrics,
+        "detections": detections_payload(output.detections),
+        "metrics": decode_tag_metrics(output.metrics or {}),
     }
 
 
@@ -39,21 +38,12 @@ def run_headless(
     *,
     event_cb: Optional[Callable[[FrameOutput], None]] = None,
 ) -> None:
-    cap_meta = None
     source_fps = None
     source_size = None
     if args.save_video or args.test:
-        cap_meta = cv2.VideoCapture(source)
-        if cap_meta.isOpened():
-            fps_val = cap_meta.get(cv2.CAP_PROP_FPS)
-            width = int(cap_meta.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap_meta.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            if fps_val and fps_val > 0:
-                source_fps = float(fps_val)
-            if width > 0 and height > 0:
-                source_size = (width, height)
-        if cap_meta is not None:
-            cap_meta.release()
+        info = probe_source(source)
+        source_fps = info.fps
+        source_size = info.size
 
     save_size = parse_save_size(args.save_size)
     writer_mgr = VideoWriterManager(
@@ -65,14 +55,14 @@ def run_headless(
         source_size,
     )
 
-    log_file = None
+    log_file: Optional[RunLogWriter] = None
     summary_path = None
     if args.test:
         os.makedirs(args.out, exist_ok=True)
         run_stamp = time.strftime("%Y%m%d_%H%M%S")
-        log_path = os.path.join(args.out, f"run_{run_stamp}.jsonl")
+        log_path = os.path.join(args.out, f"run_{run_stamp}{RUN_LOG_EXT}")
         summary_path = os.path.join(args.out, "summary.json")
-        log_file = open(log_path, "w", encoding="utf-8")
+        log_file = RunLogWriter(log_path)
 
     segments: List[Tuple[str, float, float]] = []
     transitions: List[Tuple[str, str, float]] = []
@@ -85,9 +75,10 @@ def run_headless(
     last_emit_t: Optional[float] = None
     display_tick_count = 0
     start_wall = time.perf_counter()
+    processor = FrameProcessor(cfg, infer_every=getattr(args, "infer_every", 1))
 
     while True:
-        iterator = iter_frame_outputs(args, cfg, source)
+        iterator = iter_frame_outputs(args, cfg, source, keep_frames=bool(args.save_video), processor=processor)
         while True:
             loop_t0 = time.perf_counter()
             try:
@@ -103,6 +94,7 @@ def run_headless(
 
             if args.save_video:
                 writer_mgr.write(output.frame_bgr)
+            output.release_frame()
 
             emit_end = time.perf_counter()
 
@@ -130,29 +122,14 @@ def run_headless(
                 else:
                     perf_ms = (time.perf_counter() - loop_t0) * 1000.0
                     emit_ms = (emit_end - emit_start) * 1000.0
-                    stage_from_output = output.metrics.get("stage_ms") or {}
-                    stage_ms = {
-                        "read_ms": stage_from_output.get("read_ms"),
-                        "infer_ms": stage_from_output.get("infer_ms"),
-                        "post_ms": stage_from_output.get("post_ms"),
-                        "emit_ms": emit_ms,
-                    }
-                    record = {
-                        "frame_index": output.frame_index,
-                        "timestamp_ms": output.timestamp_ms,
-                        "state_5class": output.state,
-                        "state_reason": output.metrics.get("state_reason"),
-                        "current_state_duration_ms": None
-                        if output.state_duration_sec is None
-                        else output.state_duration_sec * 1000.0,
-                        "fps": output.fps or 0.0,
-                        "display_fps": display_fps,
-                        "rt_ratio": rt_ratio,
-                        "target_ratio": target_ratio,
-                        "perf_ms": perf_ms,
-                        "stage_ms": stage_ms,
-                    }
-                    log_file.write(json.dumps(record, ensure_ascii=True) + "\n")
+                    log_file.write(
+                        output,
+                        display_fps=display_fps,
+                        rt_ratio=rt_ratio,
+                        target_ratio=target_ratio,
+                        perf_ms=perf_ms,
+                        emit_ms=emit_ms,
+                    )
 
                 if current_segment_state is None:
                     current_segment_state = output.state
@@ -9,6 +9,7 @@ from typing import Callable, Optional
 from src.core.contracts.config import RealtimeConfig
 from src.core.contracts.events import RealtimeEvent
 from src.core.contracts.state import normalize_state, to_state_cn
+from src.core.tags import decode_tag_metrics
 from src.core.types import FrameOutput
 
 
@@ -119,6 +120,7 @@ class RealtimeService:
         from src.runtime.network_guard import enforce_no_network
         from src.runtime.source_utils import validate_source, write_last_source
         from src.ui_qt.main_window import MainWindow
+        from src.services.realtime_impl.process_worker import ProcessVideoWorker
         from src.services.realtime_impl.worker import VideoWorker
 
         if config.device:
@@ -137,7 +139,8 @@ class RealtimeService:
         validate_source(source)
         write_last_source(source)
 
-        worker = VideoWorker(args, cfg=cfg)
+        worker_cls = ProcessVideoWorker if getattr(args, "infer_process", False) else VideoWorker
+        worker = worker_cls(args, cfg=cfg)
         win = MainWindow(
             debug=args.debug,
             worker=worker,
@@ -147,7 +150,6 @@ class RealtimeService:
             no_overlay=getattr(args, "no_overlay", False),
         )
         win.resize(1280, 720)
-        worker.frame_ready.connect(win.on_frame)
         worker.error.connect(win.on_worker_error)
         if hasattr(worker, "finished"):
             worker.finished.connect(win.notify_finished)
@@ -160,7 +162,7 @@ class RealtimeService:
         source: Optional[str] = None,
         run_id: Optional[str] = None,
     ) -> RealtimeEvent:
-        metrics = output.metrics or {}
+        metrics = decode_tag_metrics(output.metrics or {})
         tags_c = list(metrics.get("tags_c") or [])
         tags_d = list(metrics.get("tags_d") or [])
         people_ok = metrics.get("people_ok")
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import bisect
+import math
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.config import AppConfig, TagHysteresis, TagsSmootherConfig
+from src.core.tags import metric_tag_mask
+from src.core.types import FrameOutput
+from src.report import ReportConfig, build_report
+from src.report.types import Report, Session
+from src.runtime.frame_processor import FrameProcessor
+from src.runtime.pipeline import iter_frame_outputs
+
+DEFAULT_MARGIN_S = 2.0
+COARSE_MIN_SAMPLES = 2
+VALIDATE_TOLERANCE_S = 1.0
+
+OutputCallback = Callable[[str, int], None]
+
+
+@dataclass
+class CoarseToFinePlan:
+    stride: int
+    margin: int
+    warmup: int
+    windows: List[Tuple[int, int]] = field(default_factory=list)
+    coarse_frames: int = 0
+    dense_frames: int = 0
+
+
+def coarse_stride(video_fps: float, coarse_fps: float) -> int:
+    if coarse_fps <= 0:
+        return 1
+    return max(1, int(round(video_fps / coarse_fps)))
+
+
+def _scaled(count: int, stride: int, floor: int = 1) -> int:
+    return max(min(floor, count), int(math.ceil(count / stride)))
+
+
+def _scaled_tags(smoother: TagsSmootherConfig, stride: int) -> TagsSmootherConfig:
+    return replace(
+        smoother,
+        thresholds={
+            tag: TagHysteresis(
+                _scaled(t.on_count, stride, COARSE_MIN_SAMPLES), _scaled(t.off_count, stride, COARSE_MIN_SAMPLES)
+            )
+            for tag, t in smoother.thresholds.items()
+        },
+    )
+
+
+def coarse_config(cfg: AppConfig, stride: int) -> AppConfig:
+    people = cfg.people_smoother
+    return replace(
+        cfg,
+        people_smoother=replace(
+            people,
+            window_size=_scaled(people.window_size, stride),
+            max_id_age=_scaled(people.max_id_age, stride),
+            active_id_age=_scaled(people.active_id_age, stride),
+            min_stable=_scaled(people.min_stable, stride),
+            hold=_scaled(people.hold, stride),
+            min_track_hits=_scaled(people.min_track_hits, stride),
+            vote_window=_scaled(people.vote_window, stride, COARSE_MIN_SAMPLES),
+            vote_hold_out=_scaled(people.vote_hold_out, stride),
+            vote_hold_back=_scaled(people.vote_hold_back, stride),
+        ),
+        tags_c_smoother=_scaled_tags(cfg.tags_c_smoother, stride),
+        tags_d_smoother=_scaled_tags(cfg.tags_d_smoother, stride),
+        state_engine=replace(cfg.state_engine, debounce_k=_scaled(cfg.state_engine.debounce_k, stride)),
+    )
+
+
+def warmup_frames(cfg: AppConfig) -> int:
+    people = cfg.people_smoother
+    counts = [
+        people.window_size,
+        people.max_id_age,
+        people.vote_window + max(people.vote_hold_out, people.vote_hold_back),
+        cfg.state_engine.debounce_k,
+    ]
+    for smoother in (cfg.tags_c_smoother, cfg.tags_d_smoother):
+        for thresholds in smoother.thresholds.values():
+            counts.extend((thresholds.on_count, thresholds.off_count))
+    return max(counts)
+
+
+def _signal(output: FrameOutput) -> Tuple[int, int, Any]:
+    metrics = output.metrics or {}
+    return metric_tag_mask(metrics, "tags_c"), metric_tag_mask(metrics, "tags_d"), metrics.get("people_count")
+
+
+def dense_windows(
+    coarse: List[FrameOutput],
+    sessions: List[Session],
+    *,
+    margin: int,
+    warmup: int = 0,
+    last_frame: Optional[int] = None,
+) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    for prev, cur in zip(coarse, coarse[1:]):
+        if _signal(prev) != _signal(cur):
+            spans.append((prev.frame_index - margin, cur.frame_index + margin))
+    for session in sessions:
+        for idx in (session.start_frame_idx, session.end_frame_idx):
+            if idx is not None:
+                spans.append((idx - margin, idx + margin))
+    if coarse and last_frame is not None and coarse[-1].frame_index < last_frame:
+        spans.append((coarse[-1].frame_index, last_frame))
+    windows: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        start = max(0, start)
+        if last_frame is not None:
+            end = min(end, last_frame)
+        if end < start:
+            continue
+        if windows and start <= windows[-1][1] + warmup + 1:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def merge_timeline(
+    coarse: List[FrameOutput],
+    dense: List[FrameOutput],
+    windows: List[Tuple[int, int]],
+) -> List[FrameOutput]:
+    starts = [start for start, _end in windows]
+
+    def _covered(frame_index: int) -> bool:
+        pos = bisect.bisect_right(starts, frame_index) - 1
+        return pos >= 0 and frame_index <= windows[pos][1]
+
+    merged = [output for output in coarse if not _covered(output.frame_index)]
+    merged.extend(dense)
+    merged.sort(key=lambda output: output.frame_index)
+    return merged
+
+
+def run_coarse_to_fine(
+    args,
+    cfg: AppConfig,
+    source: str,
+    report_cfg: ReportConfig,
+    *,
+    video_fps: float,
+    coarse_fps: float,
+    total_frames: Optional[int] = None,
+    margin_s: float = DEFAULT_MARGIN_S,
+    on_output: Optional[OutputCallback] = None,
+) -> Tuple[List[FrameOutput], CoarseToFinePlan]:
+    stride = coarse_stride(video_fps, coarse_fps)
+    plan = CoarseToFinePlan(
+        stride=stride,
+        margin=max(COARSE_MIN_SAMPLES * stride, int(round(margin_s * video_fps))),
+        warmup=warmup_frames(cfg),
+    )
+    sparse_cfg = coarse_config(cfg, stride)
+    coarse: List[FrameOutput] = []
+    processor: Optional[FrameProcessor] = FrameProcessor(sparse_cfg)
+    for output in iter_frame_outputs(
+        args,
+        sparse_cfg,
+        source,
+        keep_frames=False,
+        processor=processor,
+        step_policy=lambda _output, _dt: stride,
+    ):
+        coarse.append(output)
+        if on_output is not None:
+            on_output("coarse", stride)
+    processor = None
+    plan.coarse_frames = len(coarse)
+
+    sessions = build_report(coarse, report_cfg, source).sessions
+    last_frame = total_frames - 1 if total_frames else None
+    plan.windows = dense_windows(coarse, sessions, margin=plan.margin, warmup=plan.warmup, last_frame=last_frame)
+
+    dense: List[FrameOutput] = []
+    processor = FrameProcessor(cfg)
+    for start, end in plan.windows:
+        outputs = iter_frame_outputs(
+            args, cfg, source, start_frame=max(0, start - plan.warmup), keep_frames=False, processor=processor
+        )
+        try:
+            for output in outputs:
+                if output.frame_index > end:
+                    break
+                plan.dense_frames += 1
+                if output.frame_index >= start:
+                    dense.append(output)
+                if on_output is not None:
+                    on_output("dense", 1)
+        finally:
+            outputs.close()
+    return merge_timeline(coarse, dense, plan.windows), plan
+
+
+def compare_reports(report: Report, reference: Report, *, tolerance_s: float = VALIDATE_TOLERANCE_S) -> Dict[str, Any]:
+    sessions, ref_sessions = report.sessions, reference.sessions
+    types_match = len(sessions) == len(ref_sessions) and all(
+        a.session_type == b.session_type for a, b in zip(sessions, ref_sessions)
+    )
+    boundary_err = None
+    if len(sessions) == len(ref_sessions):
+        boundary_err = max(
+            (
+                max(abs(a.start_ts_s - b.start_ts_s), abs(a.end_ts_s - b.end_ts_s))
+                for a, b in zip(sessions, ref_sessions)
+            ),
+            default=0.0,
+        )
+    changes, ref_changes = report.people_count_change_events, reference.people_count_change_events
+    changes_match = [(c.from_count, c.to_count) for c in changes] == [(c.from_count, c.to_count) for c in ref_changes]
+    change_err = None
+    if changes_match:
+        change_err = max(
+            (abs(a.change_ts_s - b.change_ts_s) for a, b in zip(changes, ref_changes)),
+            default=0.0,
+        )
+    summary, ref_summary = report.summary, reference.summary
+    result: Dict[str, Any] = {
+        "overall_result": [summary.overall_result, ref_summary.overall_result],
+        "session_count": [len(sessions), len(ref_sessions)],
+        "session_types_match": types_match,
+        "max_session_boundary_err_s": boundary_err,
+        "alarm_counts": [summary.alarm_counts, ref_summary.alarm_counts],
+        "people_change_count": [summary.people_change_count, ref_summary.people_change_count],
+        "people_changes_match": changes_match,
+        "max_people_change_err_s": change_err,
+        "presence_segments": [len(report.presence_segments), len(reference.presence_segments)],
+        "tolerance_s": tolerance_s,
+    }
+    result["match"] = (
+        summary.overall_result == ref_summary.overall_result
+        and types_match
+        and boundary_err is not None
+        and boundary_err <= tolerance_s
+        and summary.alarm_counts == ref_summary.alarm_counts
+        and change_err is not None
+        and change_err <= tolerance_s
+    )
+    return result
@@ -5,21 +5,21 @@ import json
 import os
 import time
 from collections import deque
-from dataclasses import asdict
 from pathlib import Path
-from typing import Callable, Optional, Tuple
-
-import cv2
+from typing import Callable, List, Optional, Tuple
 
 from src.core.config import AppConfig
 from src.core.paths import get_outputs_root
+from src.core.types import FrameOutput
+from src.io.source_info import probe_source
 from src.report import ReportConfig, build_report, write_report_docx, write_report_json, write_report_pdf
-from src.report.video_export import export_overlay_video, write_frames_meta_jsonl
+from src.report.video_export import export_overlay_video
 from src.runtime.config_overrides import apply_cli_overrides
 from src.runtime.network_guard import enforce_no_network
 from src.runtime.pipeline import iter_frame_outputs
-from src.runtime.serialization import to_jsonable
+from src.runtime.run_log import RUN_LOG_EXT, run_log_to_jsonl, write_run_log
 from src.runtime.source_utils import validate_source
+from src.services.report_impl.coarse_to_fine import DEFAULT_MARGIN_S, compare_reports, run_coarse_to_fine
 try:
     from tqdm import tqdm
 except Exception:
@@ -60,35 +60,21 @@ def ensure_outdir(path: str) -> None:
 
 
 def get_total_frames(source: str) -> int:
-    cap = cv2.VideoCapture(source)
-    try:
-        if not cap.isOpened():
-            return 0
-        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
-        return total if total > 0 else 0
-    finally:
-        cap.release()
-
-
-def _payload_from_output(output) -> dict:
-    det_payload = {k: [asdict(b) for b in v] for k, v in output.detections.items()}
-    return {
-        "frame_index": output.frame_index,
-        "timestamp_ms": output.timestamp_ms,
-        "fps": output.fps,
-        "state": output.state,
-        "state_duration_sec": output.state_duration_sec,
-        "detections": det_payload,
-        "metrics": output.metrics,
-    }
+    return probe_source(source).frame_count or 0
 
 
-def _write_run_jsonl(frame_outputs: list, path: str) -> str:
-    with open(path, "w", encoding="utf-8") as f:
-        for output in frame_outputs:
-            payload = to_jsonable(_payload_from_output(output))
-            f.write(json.dumps(payload, ensure_ascii=True) + "\n")
-    return path
+def _full_rate_outputs(
+    pipeline_args: argparse.Namespace,
+    app_cfg: AppConfig,
+    source: str,
+    on_output: Optional[Callable[[str, int], None]],
+) -> List[FrameOutput]:
+    frame_outputs = []
+    for output in iter_frame_outputs(pipeline_args, app_cfg, source, keep_frames=False):
+        frame_outputs.append(output)
+        if on_output is not None:
+            on_output("full", 1)
+    return frame_outputs
 
 
 class _ProgressTracker:
@@ -209,11 +195,16 @@ def run_export(
     json_path = os.path.join(report_dir, f"report_{stem}.json")
     docx_path = os.path.join(reports_dir, f"report_{stem}.docx")
     pdf_path = os.path.join(reports_dir, f"report_{stem}.pdf")
-    run_path = os.path.join(report_dir, f"run_{stem}.jsonl")
-    meta_path = os.path.join(report_dir, f"frames_meta_{stem}.jsonl")
+    run_path = os.path.join(report_dir, f"run_{stem}{RUN_LOG_EXT}")
+    jsonl_path = os.path.join(report_dir, f"run_{stem}.jsonl") if getattr(args, "run_jsonl", False) else None
     video_out = args.video_out or os.path.join(reports_dir, f"overlay_{stem}.mp4")
+    validate_path = os.path.join(report_dir, f"validate_{stem}.json")
+    validate_out: Optional[str] = None
 
-    frame_total = get_total_frames(args.source)
+    source_info = probe_source(args.source)
+    frame_total = source_info.frame_count or 0
+    video_fps = source_info.fps_or(report_cfg.fps_assume)
+    coarse_fps = float(getattr(args, "coarse_fps", 0.0) or 0.0)
     total_frames = frame_total
     if export_overlay and frame_total > 0:
         total_frames = frame_total * 2
@@ -248,17 +239,37 @@ def run_export(
             half=args.half,
         )
         setattr(pipeline_args, "_model_info_printed", True)
-        frame_outputs = []
         pipeline_bar = None
         if use_tqdm and tqdm is not None:
             pipeline_bar = tqdm(total=frame_total or None, desc="Running pipeline", unit="frame", ascii=True)
-        for output in iter_frame_outputs(pipeline_args, app_cfg, args.source):
-            frame_outputs.append(output)
-            if pipeline_bar is not None:
-                pipeline_bar.update(1)
+
+        def _on_output(stage: str, frames: int) -> None:
+            if pipeline_bar is not None and frames:
+                pipeline_bar.update(frames)
             if progress_tracker is not None:
-                progress_tracker.update(1, stage="video")
+                progress_tracker.update(frames, stage="video" if stage == "full" else stage)
                 checkpoint_logger.update(progress_tracker.done)
+
+        t_start = time.perf_counter()
+        if coarse_fps > 0:
+            frame_outputs, plan = run_coarse_to_fine(
+                pipeline_args,
+                app_cfg,
+                args.source,
+                report_cfg,
+                video_fps=video_fps,
+                coarse_fps=coarse_fps,
+                total_frames=frame_total or None,
+                margin_s=float(getattr(args, "dense_margin_s", DEFAULT_MARGIN_S)),
+                on_output=_on_output,
+            )
+            export_s = time.perf_counter() - t_start
+            _log(
+                f"[C2F] stride={plan.stride} windows={len(plan.windows)} coarse_frames={plan.coarse_frames} "
+                f"dense_frames={plan.dense_frames} total_frames={frame_total} elapsed_s={export_s:.1f}"
+            )
+        else:
+            frame_outputs = _full_rate_outputs(pipeline_args, app_cfg, args.source, _on_output)
         if pipeline_bar is not None:
             pipeline_bar.close()
     except Exception as exc:
@@ -267,6 +278,31 @@ def run_export(
 
     report = build_report(frame_outputs, report_cfg, args.source)
 
+    if coarse_fps > 0 and getattr(args, "validate_full", False):
+        try:
+            t_start = time.perf_counter()
+            reference = build_report(
+                _full_rate_outputs(pipeline_args, app_cfg, args.source, None), report_cfg, args.source
+            )
+            full_s = time.perf_counter() - t_start
+        except Exception as exc:
+            _log(f"[PIPELINE] {exc}")
+            return 4, {}
+        validation = compare_reports(report, reference)
+        validation.update({"coarse_to_fine_s": export_s, "full_rate_s": full_s})
+        try:
+            with open(validate_path, "w", encoding="utf-8") as f:
+                json.dump(validation, f, ensure_ascii=True, indent=2)
+        except OSError as exc:
+            _log(f"[PATH] Failed to write validation: {exc}")
+            return 2, {}
+        validate_out = validate_path
+        _log(
+            f"[C2F] validate match={validation['match']} sessions={validation['session_count']} "
+            f"max_boundary_err_s={validation['max_session_boundary_err_s']} "
+            f"speedup={full_s / export_s if export_s > 0 else 0.0:.1f}x"
+        )
+
     if export_pdf and not export_docx:
         export_docx = True
 
@@ -311,13 +347,21 @@ def run_export(
 
     try:
         if stage_cb:
-            stage_cb("write_jsonl", "run_jsonl")
-        _write_run_jsonl(frame_outputs, run_path)
+            stage_cb("write_run_log", "run_log")
+        write_run_log(frame_outputs, run_path)
+        if jsonl_path is not None:
+            if stage_cb:
+                stage_cb("write_jsonl", "run_jsonl")
+            run_log_to_jsonl(run_path, jsonl_path)
     except OSError as exc:
-        _log(f"[PATH] Failed to write run.jsonl: {exc}")
+        _log(f"[PATH] Failed to write run log: {exc}")
         return 2, {}
 
     outputs = [json_path, run_path]
+    if validate_out is not None:
+        outputs.append(validate_out)
+    if jsonl_path is not None:
+        outputs.append(jsonl_path)
     if export_docx:
         outputs.append(docx_path)
     if export_pdf:
@@ -329,7 +373,6 @@ def run_export(
         try:
             if stage_cb:
                 stage_cb("write_video", "overlay_video")
-            write_frames_meta_jsonl(frame_outputs, meta_path, report_cfg.fps_assume)
             video_bar = None
             if use_tqdm and tqdm is not None:
                 video_bar = tqdm(total=frame_total or None, desc="Exporting video", unit="frame", ascii=True)
@@ -342,7 +385,7 @@ def run_export(
             out_path, elapsed = export_overlay_video(
                 args.source,
                 report,
-                meta_path,
+                run_path,
                 video_out,
                 fps_assume=report_cfg.fps_assume,
                 no_boxes=args.no_boxes,
@@ -353,10 +396,6 @@ def run_export(
                 video_bar.close()
             outputs.append(out_path)
             _log(f"Video export completed in {elapsed:.1f}s")
-            try:
-                os.remove(meta_path)
-            except OSError:
-                pass
         except ImportError as exc:
             _log(f"[DEPENDENCY] {exc}")
             return 5, {}
@@ -368,7 +407,9 @@ def run_export(
     if export_docx:
         _log(f"docx: {os.path.abspath(docx_path)}")
     _log(f"mp4: {os.path.abspath(video_out)}")
-    _log(f"jsonl: {os.path.abspath(run_path)}")
+    _log(f"run_log: {os.path.abspath(run_path)}")
+    if jsonl_path is not None:
+        _log(f"jsonl: {os.path.abspath(jsonl_path)}")
     _log(f"json: {os.path.abspath(json_path)}")
     if export_pdf:
         _log(f"pdf: {os.path.abspath(pdf_path)}")
@@ -381,9 +422,11 @@ def run_export(
         "report_dir": os.path.abspath(report_dir),
         "docx": os.path.abspath(docx_path) if export_docx else None,
         "mp4": os.path.abspath(video_out),
-        "jsonl": os.path.abspath(run_path),
+        "run_log": os.path.abspath(run_path),
+        "jsonl": os.path.abspath(jsonl_path) if jsonl_path is not None else None,
         "json": os.path.abspath(json_path),
         "pdf": os.path.abspath(pdf_path) if export_pdf else None,
+        "validation": os.path.abspath(validate_out) if validate_out is not None else None,
         "last_fps": progress_tracker.last_fps if progress_tracker is not None else None,
         "exit_code": 0,
     }
@@ -124,6 +124,7 @@ class ReportService:
             export_log=None,
             frames_meta_path=None,
             last_fps=info.get("last_fps"),
+            run_log=info.get("run_log"),
         )
 
     @staticmethod
@@ -21,6 +21,7 @@ from PyQt6.QtWidgets import (
     QSplitter,
 )
 
+from src.core.tags import BLOCKING, NO_BLOCKING, SAMPLING
 from src.ui_qt.state_view_spec import StatusDTO
 
 UI_TITLE_CN = "\u5e9f\u6c14AI\u68c0\u6d4b"
@@ -33,6 +34,14 @@ STATE_ROWS = [
 ]
 
 
+def _covers_exactly(width: int, height: int, target_w: int, target_h: int) -> bool:
+    if abs(width - target_w) <= 1:
+        return height >= target_h - 1
+    if abs(height - target_h) <= 1:
+        return width >= target_w - 1
+    return False
+
+
 class MainWindow(QMainWindow):
     export_requested = pyqtSignal()
 
@@ -43,6 +52,7 @@ class MainWindow(QMainWindow):
         display_fps: float = 15.0,
         rt_smooth: float = 0.2,
         target_ratio: float = 1.0,
+        no_overlay: bool = False,
     ) -> None:
         super().__init__()
         self._debug = debug
@@ -53,6 +63,11 @@ class MainWindow(QMainWindow):
         self._latest_status: Optional[StatusDTO] = None
         self._latest_seq = 0
         self._rendered_seq = -1
+        self._no_overlay = no_overlay
+        self._display_size: Optional[Tuple[int, int]] = None
+        self._view_seq = 0
+        self._status_seq = -1
+        self._shown: Dict[str, object] = {}
         self._display_tick_count = 0
         self._display_tick_t0 = time.perf_counter()
         self._display_fps_est = 0.0
@@ -504,19 +519,23 @@ class MainWindow(QMainWindow):
             self._display_tick_t0 = now
             self._display_fps_label.setText(f"Display FPS: {self._display_fps_est:.2f}")
 
-        if self._latest_status is not None:
+        self._poll_view_slot()
+        if self._latest_status is not None and self._status_seq != self._latest_seq:
+            self._status_seq = self._latest_seq
             self._update_status_table(self._latest_status)
             self._update_people(self._latest_status)
             self._update_state_label(self._latest_status)
 
+        target = self._video_label.size()
+        self._sync_display_size(target.width(), target.height())
+
         if self._latest_qimage is None or self._latest_qimage.isNull():
             return
         if self._rendered_seq == self._latest_seq:
             return
 
         pixmap = QPixmap.fromImage(self._latest_qimage)
-        target = self._video_label.size()
-        if not target.isEmpty():
+        if not target.isEmpty() and not _covers_exactly(pixmap.width(), pixmap.height(), target.width(), target.height()):
             pixmap = pixmap.scaled(
                 target,
                 Qt.AspectRatioMode.KeepAspectRatioByExpanding,
@@ -525,39 +544,69 @@ class MainWindow(QMainWindow):
         self._video_label.setPixmap(pixmap)
         self._rendered_seq = self._latest_seq
 
+    def _poll_view_slot(self) -> None:
+        slot = getattr(self._worker, "view_slot", None)
+        if slot is None:
+            return
+        seq, view = slot.get_if_newer(self._view_seq)
+        self._view_seq = seq
+        if view is None:
+            return
+        self._latest_qimage, self._latest_status = view
+        self._latest_seq += 1
+        self._update_rt_ratio(self._latest_status)
+
+    def _changed(self, key: str, value: object) -> bool:
+        if self._shown.get(key, self) == value:
+            return False
+        self._shown[key] = value
+        return True
+
+    def _sync_display_size(self, width: int, height: int) -> None:
+        size = (width, height)
+        if size == self._display_size or width <= 0 or height <= 0:
+            return
+        self._display_size = size
+        if self._worker is not None and hasattr(self._worker, "set_display_size"):
+            self._worker.set_display_size(width, height)
+
     def _update_state_label(self, status: StatusDTO) -> None:
-        state_text = status.state_5class or "-"
+        state_text = f"State: {status.state_5class or '-'}"
         duration = status.duration_s if status.duration_s is not None else 0.0
-        self._state_label.setText(f"State: {state_text}")
-        self._duration_label.setText(f"Duration: {duration:.2f}s")
-        if status.fps is None:
-            self._fps_label.setText("Infer FPS: -")
-        else:
-            self._fps_label.setText(f"Infer FPS: {status.fps:.2f}")
+        duration_text = f"Duration: {duration:.2f}s"
+        fps_text = "Infer FPS: -" if status.fps is None else f"Infer FPS: {status.fps:.2f}"
+        if self._changed("state", state_text):
+            self._state_label.setText(state_text)
+        if self._changed("duration", duration_text):
+            self._duration_label.setText(duration_text)
+        if self._changed("fps", fps_text):
+            self._fps_label.setText(fps_text)
 
     def _update_people(self, status: StatusDTO) -> None:
         people_count = status.people_count
         people_alarm = bool(status.people_alarm)
-        self._people_value.setText(str(people_count))
-        color = "#FF4D4F" if people_alarm else "#20E3B2"
-        self._people_value.setStyleSheet(f"color: {color};")
+        if self._changed("people_count", people_count):
+            self._people_value.setText(str(people_count))
+        if self._changed("people_alarm", people_alarm):
+            color = "#FF4D4F" if people_alarm else "#20E3B2"
+            self._people_value.setStyleSheet(f"color: {color};")
 
     def _derive_row_label(self, row_key: str, status: StatusDTO) -> str:
         current_state = status.state_5class
-        tags_c = status.tags_c_set or set()
-        tags_d = status.tags_d_set or set()
+        tags_c = status.tags_c_mask
+        tags_d = status.tags_d_mask
         if row_key == "hole":
             return "\u5173\u95ed" if current_state == "CLOSE" else "\u5f00\u542f"
         if row_key == "blocking":
-            return "\u5c01\u5835\u4e2d" if "blocking" in tags_d else "-"
+            return "\u5c01\u5835\u4e2d" if tags_d & BLOCKING else "-"
         if row_key == "no_blocking":
-            return "\u672a\u5c01\u5835\u4e2d" if "no_blocking" in tags_d else "-"
+            return "\u672a\u5c01\u5835\u4e2d" if tags_d & NO_BLOCKING else "-"
         if row_key == "sampling_state":
-            if "sampling" not in tags_c:
+            if not tags_c & SAMPLING:
                 return "-"
-            if "blocking" in tags_d:
+            if tags_d & BLOCKING:
                 return "\u6b63\u5728\u91c7\u6837"
-            if "no_blocking" in tags_d:
+            if tags_d & NO_BLOCKING:
                 return "\u672a\u5c01\u5835\u91c7\u6837"
             return "\u91c7\u6837\u4e2d"
         return "-"
@@ -582,6 +631,15 @@ class MainWindow(QMainWindow):
                     else:
                         timer["start_t"] = None
             is_current = label != "-"
+            if label == "-":
+                time_text = "-"
+            elif video_t is None or (timer is not None and timer.get("start_t") is None):
+                time_text = "N/A"
+            else:
+                start_t = timer.get("start_t") if timer is not None else None
+                time_text = f"{max(0.0, video_t - start_t):.1f}" if start_t is not None else "N/A"
+            if not self._changed(f"row:{row_key}", (label, time_text, is_current and is_bad)):
+                continue
 
             title_item = self._table.item(row, 1)
             if title_item is not None:
@@ -595,13 +653,7 @@ class MainWindow(QMainWindow):
                     judge_item.setForeground(QBrush(QColor(0, 229, 255)))
                     judge_item.setFont(QFont("Consolas", 10, QFont.Weight.Bold))
             if time_item is not None:
-                if label == "-":
-                    time_item.setText("-")
-                elif video_t is None or (timer is not None and timer.get("start_t") is None):
-                    time_item.setText("N/A")
-                else:
-                    start_t = timer.get("start_t") if timer is not None else None
-                    time_item.setText(f"{max(0.0, video_t - start_t):.1f}" if start_t is not None else "N/A")
+                time_item.setText(time_text)
                 if is_current:
                     time_item.setForeground(QBrush(QColor(0, 229, 255)))
                     time_item.setFont(QFont("Consolas", 10, QFont.Weight.Bold))
@@ -13,8 +13,8 @@ class StatusDTO:
     color_rgb: tuple[int, int, int]
     duration_s: Optional[float]
     video_t_s: Optional[float] = None
-    tags_c_set: Optional[Set[str]] = None
-    tags_d_set: Optional[Set[str]] = None
+    tags_c_mask: int = 0
+    tags_d_mask: int = 0
     people_count: int = 0
     people_ok: bool = True
     people_alarm: bool = False
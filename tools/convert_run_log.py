@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.runtime.run_log import run_log_to_jsonl
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--run", required=True, help="run_*.parquet path")
+    parser.add_argument("--out", default=None, help="Output .jsonl path (default: next to run log)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.run) and not os.path.isdir(f"{args.run}.parts"):
+        print(f"Run log not found: {args.run}")
+        return 1
+    out_path = run_log_to_jsonl(args.run, args.out)
+    print(f"Wrote: {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
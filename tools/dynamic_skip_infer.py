@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import os
+import statistics
 import sys
+import time
 import argparse
-from dataclasses import asdict
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 import cv2
 
@@ -13,8 +14,10 @@ if _REPO_ROOT not in sys.path:
     sys.path.insert(0, _REPO_ROOT)
 
 from src.core.config import AppConfig
-from src.runtime.frame_scheduler import FrameScheduler
-from src.runtime.pipeline_runner import PipelineRunner
+from src.core.detections import detections_payload
+from src.io.source_info import probe_source
+from src.runtime.frame_scheduler import CostModelStepPolicy, FrameScheduler, SchedulerStepPolicy
+from src.runtime.pipeline import iter_frame_outputs
 
 
 def _parse_args() -> argparse.Namespace:
@@ -27,32 +30,22 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--max_allowed_step", type=int, default=10, help="Hard cap for step")
     parser.add_argument("--target_ratio", type=float, default=1.0, help="Target real-time ratio (1.0 = real-time)")
     parser.add_argument("--save_dir", default=None, help="Optional directory to save sampled frames")
+    parser.add_argument("--policy", choices=("ratio", "cost", "both"), default="ratio", help="Step policy; both runs ratio then cost and prints a comparison")
+    parser.add_argument("--target_lag_ms", type=float, default=200.0, help="Target playback lag for the cost policy")
     return parser.parse_args()
 
 
-def _read_video_fps(cap: cv2.VideoCapture) -> float:
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if fps is None or fps <= 0:
-        return 25.0
-    return float(fps)
-
-
-def _read_total_frames(cap: cv2.VideoCapture) -> Optional[int]:
-    total = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-    if total is None or total <= 0:
-        return None
-    return int(total)
-
-
-def main() -> None:
-    args = _parse_args()
-    cap = cv2.VideoCapture(args.video)
-    if not cap.isOpened():
-        raise RuntimeError(f"Failed to open video: {args.video}")
-
-    video_fps = _read_video_fps(cap)
-    total_frames = _read_total_frames(cap)
-    runner = PipelineRunner(AppConfig())
+def _build_policy(args: argparse.Namespace, name: str, video_fps: float, total_frames: Optional[int]):
+    if name == "cost":
+        return CostModelStepPolicy(
+            video_fps=video_fps,
+            total_frames=total_frames,
+            target_ratio=args.target_ratio,
+            target_lag_s=args.target_lag_ms / 1000.0,
+            max_allowed_step=args.max_allowed_step,
+            min_step=args.min_step,
+            warmup_frames=args.warmup_frames,
+        )
     scheduler = FrameScheduler(
         video_fps=video_fps,
         warmup_frames=args.warmup_frames,
@@ -61,62 +54,100 @@ def main() -> None:
         min_step=args.min_step,
         use_round=args.use_round,
     )
+    return SchedulerStepPolicy(scheduler, total_frames=total_frames)
 
-    if args.save_dir:
-        os.makedirs(args.save_dir, exist_ok=True)
 
-    frame_index = 0
+def _run(args: argparse.Namespace, name: str, video_fps: float, total_frames: Optional[int]) -> Dict[str, Any]:
+    policy = _build_policy(args, name, video_fps, total_frames)
+    pipeline_args = argparse.Namespace(fps_assume=video_fps, start_sec=None, end_sec=None, infer_every=1)
+    prefix = f"policy={name} " if args.policy == "both" else ""
     processed = 0
-    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
-
+    steps: List[int] = []
+    pred_errors: List[float] = []
+    last_index = 0
+    t_start = time.perf_counter()
+    outputs = iter_frame_outputs(
+        pipeline_args, AppConfig(), args.video, keep_frames=bool(args.save_dir), step_policy=policy
+    )
     try:
-        while True:
-            ok, frame_bgr = cap.read()
-            if not ok:
-                break
-
-            t0 = scheduler.begin()
-            frame_output = runner.process_frame(
-                frame_bgr,
-                frame_index=frame_index,
-                timestamp_ms=cap.get(cv2.CAP_PROP_POS_MSEC),
-                video_t_s=(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0),
-            )
-            _ = asdict(frame_output)
-            dt = scheduler.end(t0)
-
-            next_idx, step, raw_step, raw_step_smooth, capped = scheduler.next_index(
-                frame_index,
-                dt,
-                total_frames=total_frames,
-            )
+        for frame_output in outputs:
+            _ = detections_payload(frame_output.detections)
+            schedule = frame_output.metrics["schedule"]
+            frame_index = frame_output.frame_index
+            dt = schedule["dt_ms"] / 1000.0
+            raw_step = schedule["raw_step"]
+            raw_step_smooth = schedule["raw_step_smooth"]
+            next_idx = schedule["next_idx"]
 
             throughput_fps = 1.0 / dt if dt > 0 else 0.0
 
             dt_smooth_ms = (raw_step_smooth / video_fps) * 1000.0 if video_fps > 0 else 0.0
+            cost = ""
+            if schedule.get("pred_ms") is not None:
+                pred_errors.append(abs(schedule["pred_ms"] - schedule["cost_ms"]))
+                cost = (
+                    f" pred_ms={schedule['pred_ms']:.2f} cost_ms={schedule['cost_ms']:.2f}"
+                    f" lag_ms={schedule['lag_ms']:.2f} pi_ms={schedule['pi_ms']:.2f}"
+                )
             print(
-                "frame_index="
+                f"{prefix}frame_index="
                 f"{frame_index} dt_ms={dt*1000.0:.2f} "
                 f"dt_smooth_ms={dt_smooth_ms:.2f} "
                 f"throughput_fps={throughput_fps:.2f} video_fps={video_fps:.2f} "
                 f"raw_step={raw_step:.2f} raw_step_smooth={raw_step_smooth:.2f} "
-                f"step={step} capped={capped} next_frame_index={next_idx}"
+                f"step={schedule['step']} capped={schedule['capped']} next_frame_index={next_idx}"
+                f"{cost}"
             )
 
             if args.save_dir:
-                out_path = os.path.join(args.save_dir, f"frame_{frame_index:06d}.jpg")
-                cv2.imwrite(out_path, frame_bgr)
+                out_path = os.path.join(args.save_dir, f"{name}_frame_{frame_index:06d}.jpg")
+                cv2.imwrite(out_path, frame_output.frame_bgr)
+                frame_output.release_frame()
 
+            steps.append(int(schedule["step"]))
+            last_index = frame_index
             processed += 1
             if args.max_frames is not None and processed >= args.max_frames:
                 break
-
-            frame_index = next_idx
-            if total_frames is not None and frame_index >= total_frames - 1:
+            if total_frames is not None and next_idx >= total_frames - 1:
                 break
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
     finally:
-        cap.release()
+        outputs.close()
+    wall_s = time.perf_counter() - t_start
+    step_changes = sum(1 for prev, cur in zip(steps, steps[1:]) if prev != cur)
+    return {
+        "policy": name,
+        "frames": processed,
+        "wall_s": wall_s,
+        "rt_ratio": (last_index / video_fps) / wall_s if wall_s > 0 else 0.0,
+        "step_mean": statistics.fmean(steps) if steps else 0.0,
+        "step_stdev": statistics.pstdev(steps) if steps else 0.0,
+        "step_changes": step_changes,
+        "pred_err_ms": statistics.fmean(pred_errors) if pred_errors else None,
+    }
+
+
+def main() -> None:
+    args = _parse_args()
+    info = probe_source(args.video)
+    if not info.opened:
+        raise RuntimeError(f"Failed to open video: {args.video}")
+    video_fps = info.fps_or(25.0)
+    total_frames = info.frame_count
+
+    if args.save_dir:
+        os.makedirs(args.save_dir, exist_ok=True)
+
+    names = ["ratio", "cost"] if args.policy == "both" else [args.policy]
+    summaries = [_run(args, name, video_fps, total_frames) for name in names]
+    for summary in summaries:
+        pred_err = summary["pred_err_ms"]
+        print(
+            f"SUMMARY policy={summary['policy']} frames={summary['frames']} wall_s={summary['wall_s']:.2f} "
+            f"rt_ratio={summary['rt_ratio']:.2f} step_mean={summary['step_mean']:.2f} "
+            f"step_stdev={summary['step_stdev']:.2f} step_changes={summary['step_changes']} "
+            f"pred_err_ms={'-' if pred_err is None else f'{pred_err:.2f}'}"
+        )
 
 
 if __name__ == "__main__":
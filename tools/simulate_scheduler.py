@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import polars as pl
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.core.config import AppConfig
+from src.runtime.frame_scheduler import step_policy_from_args
+from src.runtime.replay import load_recorded_run
+from src.runtime.scheduler_sim import (
+    DEFAULT_GRAB_FRACTION,
+    DEFAULT_QUEUE_SIZE,
+    SimResult,
+    estimate_video_fps,
+    load_stage_costs,
+    simulate,
+)
+
+POLICY_BASES = ("full", "ratio", "cost")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded per-frame costs and detections through step policies in virtual time."
+    )
+    parser.add_argument("--run", action="append", required=True, help="Run log (run_*.parquet); repeat for several")
+    parser.add_argument(
+        "--policy",
+        action="append",
+        default=None,
+        help="full | ratio | cost, optionally +transition (e.g. cost+transition); repeat for several",
+    )
+    parser.add_argument("--fps", type=float, default=None, help="Video fps (default: estimated from time_ms)")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_QUEUE_SIZE, help="Decoded/output queue size")
+    parser.add_argument("--grab-fraction", type=float, default=DEFAULT_GRAB_FRACTION, help="Grab-only cost as a fraction of decode_ms")
+    parser.add_argument("--target-ratio", type=float, default=1.0)
+    parser.add_argument("--target-lag-ms", type=float, default=200.0)
+    parser.add_argument("--max-step", dest="max_allowed_step", type=int, default=10)
+    parser.add_argument("--min-step", type=int, default=1)
+    parser.add_argument("--warmup-frames", type=int, default=5)
+    parser.add_argument("--stable-step", type=int, default=4)
+    parser.add_argument("--out", default=None, help="Optional parquet with one row per run/policy")
+    return parser.parse_args()
+
+
+def _policy_args(args: argparse.Namespace, spec: str) -> argparse.Namespace:
+    parts = spec.split("+")
+    base = parts[0]
+    if base not in POLICY_BASES or any(part != "transition" for part in parts[1:]):
+        raise ValueError(f"Unknown policy {spec!r}")
+    return argparse.Namespace(
+        dynamic_skip=base != "full",
+        policy=base,
+        transition_aware="transition" in parts[1:],
+        target_ratio=args.target_ratio,
+        target_lag_ms=args.target_lag_ms,
+        max_allowed_step=args.max_allowed_step,
+        min_step=args.min_step,
+        warmup_frames=args.warmup_frames,
+        stable_step=args.stable_step,
+    )
+
+
+def _row(run_path: str, result: SimResult) -> Dict[str, Any]:
+    return {
+        "run": os.path.basename(run_path),
+        "policy": result.policy,
+        "frames": result.frames,
+        "dropped": result.dropped,
+        "wall_s": result.wall_s,
+        "rt_ratio": result.rt_ratio,
+        "step_mean": result.step_mean,
+        "step_changes": result.step_changes,
+        "agreement": result.agreement,
+        "transitions": result.transitions,
+        "missed": result.missed,
+        "latency_ms_mean": result.latency_ms_mean,
+        "latency_ms_max": result.latency_ms_max,
+    }
+
+
+def _fmt(value: Any, spec: str = ".2f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def _table(rows: List[Dict[str, Any]]) -> str:
+    headers = ["run", "policy", "frames", "rt_ratio", "step_mean", "agreement", "missed", "latency_ms_mean", "latency_ms_max"]
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join(["---"] * len(headers)) + " |",
+    ]
+    for row in rows:
+        values = [
+            row["run"],
+            row["policy"],
+            str(row["frames"]),
+            _fmt(row["rt_ratio"]),
+            _fmt(row["step_mean"]),
+            _fmt(row["agreement"], ".3f"),
+            f"{row['missed']}/{row['transitions']}",
+            _fmt(row["latency_ms_mean"], ".0f"),
+            _fmt(row["latency_ms_max"], ".0f"),
+        ]
+        lines.append("| " + " | ".join(values) + " |")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    args = _parse_args()
+    specs = args.policy or ["full", "ratio", "cost"]
+    if "full" in specs:
+        specs = ["full"] + [spec for spec in specs if spec != "full"]
+    try:
+        policies = [(spec, _policy_args(args, spec)) for spec in specs]
+    except ValueError as exc:
+        print(f"Invalid --policy: {exc}")
+        return 2
+    cfg = AppConfig()
+    rows: List[Dict[str, Any]] = []
+    start = time.perf_counter()
+    for run_path in args.run:
+        if not os.path.exists(run_path) and not os.path.isdir(f"{run_path}.parts"):
+            print(f"Run log not found: {run_path}")
+            return 1
+        run = load_recorded_run(run_path)
+        costs = load_stage_costs(run_path, run, grab_fraction=args.grab_fraction)
+        video_fps = args.fps or estimate_video_fps(run)
+        gaps = int((run.frame_index[1:] - run.frame_index[:-1] != 1).sum()) if len(run) > 1 else 0
+        if gaps:
+            print(f"[sim] {os.path.basename(run_path)}: {gaps} frame index gaps, rows are treated as consecutive frames")
+        full = simulate(
+            run, costs, cfg, lambda _clock, _total: None, name="full", video_fps=video_fps, queue_size=args.prefetch
+        )
+        for spec, policy_args in policies:
+            if spec == "full":
+                result = full
+            else:
+                result = simulate(
+                    run,
+                    costs,
+                    cfg,
+                    lambda clock, total, policy_args=policy_args: step_policy_from_args(
+                        policy_args, video_fps, total_frames=total, clock=clock
+                    ),
+                    name=spec,
+                    video_fps=video_fps,
+                    queue_size=args.prefetch,
+                    reference=full.states,
+                )
+            rows.append(_row(run_path, result))
+    elapsed = time.perf_counter() - start
+    print(f"[sim] runs={len(args.run)} policies={len(policies)} elapsed_s={elapsed:.2f}")
+    print(_table(rows))
+    if args.out:
+        pl.DataFrame(rows, infer_schema_length=None).write_parquet(args.out)
+        print(f"Wrote: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
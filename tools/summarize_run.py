@@ -2,12 +2,22 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sys
 from pathlib import Path
 from typing import Iterable, Optional, Tuple
 
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.runtime.run_log import RUN_LOG_EXT, is_run_log, scan_run_log
+
+_SUMMARY_COLUMNS = ("timestamp_ms", "fps", "display_fps", "rt_ratio", "target_ratio")
+
 
 def _find_latest_run(root: Path) -> Optional[Path]:
-    candidates = list(root.rglob("run_*.jsonl"))
+    candidates = list(root.rglob(f"run_*{RUN_LOG_EXT}")) + list(root.rglob("run_*.jsonl"))
     if not candidates:
         return None
     return max(candidates, key=lambda p: p.stat().st_mtime)
@@ -36,6 +46,8 @@ def _format(val: Optional[float]) -> str:
 
 
 def _load_records(path: Path) -> list[dict]:
+    if is_run_log(str(path)):
+        return scan_run_log(str(path), _SUMMARY_COLUMNS).collect().to_dicts()
     records = []
     with path.open("r", encoding="utf-8") as f:
         for line in f:
@@ -107,15 +119,15 @@ def summarize(path: Path, warmup_s: float) -> Tuple[str, dict]:
 
 def main() -> int:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--root", default=".", help="Root to search for run_*.jsonl")
-    parser.add_argument("--run", default=None, help="Explicit run_*.jsonl path")
+    parser.add_argument("--root", default=".", help="Root to search for run_*.parquet / run_*.jsonl")
+    parser.add_argument("--run", default=None, help="Explicit run log path (.parquet or legacy .jsonl)")
     parser.add_argument("--write-results", action="store_true", help="Write results.md next to run file")
     parser.add_argument("--warmup-s", type=float, default=0.5, help="Warmup seconds to skip")
     args = parser.parse_args()
 
     run_path = Path(args.run) if args.run else _find_latest_run(Path(args.root))
     if run_path is None or not run_path.exists():
-        print("No run_*.jsonl found.")
+        print("No run log found.")
         return 1
 
     table, _ = summarize(run_path, args.warmup_s)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+import polars as pl
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.report.config import ReportConfig
+from src.report.sweep import SweepResult, iter_candidates, parse_param_specs, run_sweep, score_key
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded detections under many smoother/engine/report parameter sets."
+    )
+    parser.add_argument("--run", required=True, help="Run log (run_*.parquet) with recorded detections")
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        help=(
+            "Swept parameter, e.g. tags_c.close.on=8,12,16 | tags_d.blocking.off=2:6:1 | "
+            "people.max_id_age=10,20 | engine.debounce_k=1:4:1 | test.short_jitter_s=0.5,1.0 | "
+            "report.gap_allow_sampling_s=5:15:2.5"
+        ),
+    )
+    parser.add_argument("--mode", choices=("grid", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=200, help="Candidates for random mode")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--fps-assume", type=float, default=25.0)
+    parser.add_argument("--out", default=None, help="Output parquet (default: sweep_<run stem>.parquet)")
+    parser.add_argument("--top", type=int, default=10, help="Print the best N candidates")
+    return parser.parse_args()
+
+
+def _result_rows(results: List[SweepResult]) -> List[dict]:
+    rows = []
+    for result in results:
+        summary = result.summary
+        row = {"candidate_id": result.candidate_id}
+        row.update(result.params)
+        row.update(
+            {
+                "status": summary.get("status"),
+                "transition_count": summary.get("transition_count"),
+                "short_jitter_count": summary.get("short_jitter_count"),
+                "close_open_switches": summary.get("close_open_switches"),
+                "max_switches_per_sec": summary.get("max_switches_per_sec"),
+                "overall_result": result.overall_result,
+                "alarm_total": sum(result.alarm_counts.values()),
+                "session_count": result.session_count,
+                "alarm_counts": json.dumps(result.alarm_counts, ensure_ascii=True),
+                "timeline": json.dumps(result.segments, ensure_ascii=True),
+            }
+        )
+        rows.append(row)
+    return rows
+
+
+def _top_table(results: List[SweepResult], top: int) -> str:
+    best = sorted(results, key=score_key)[:top]
+    headers = ["candidate_id", "status", "short_jitter", "close_open", "transitions", "alarms", "params"]
+    lines = [
+        "| " + " | ".join(headers) + " |",
+        "| " + " | ".join(["---"] * len(headers)) + " |",
+    ]
+    for result in best:
+        params = " ".join(f"{k}={v}" for k, v in sorted(result.params.items()))
+        values = [
+            str(result.candidate_id),
+            str(result.summary.get("status")),
+            str(result.summary.get("short_jitter_count")),
+            str(result.summary.get("close_open_switches")),
+            str(result.summary.get("transition_count")),
+            str(sum(result.alarm_counts.values())),
+            params or "-",
+        ]
+        lines.append("| " + " | ".join(values) + " |")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    args = _parse_args()
+    if not os.path.exists(args.run) and not os.path.isdir(f"{args.run}.parts"):
+        print(f"Run log not found: {args.run}")
+        return 1
+    try:
+        space = parse_param_specs(args.param)
+    except ValueError as exc:
+        print(f"Invalid --param: {exc}")
+        return 2
+    candidates = list(iter_candidates(space, mode=args.mode, samples=args.samples, seed=args.seed))
+    report_cfg = ReportConfig(fps_assume=args.fps_assume)
+
+    def _progress(done: int, total: int) -> None:
+        print(f"\r[sweep] {done}/{total}", end="", flush=True)
+
+    start = time.perf_counter()
+    results = run_sweep(
+        args.run,
+        candidates,
+        base_report_cfg=report_cfg,
+        workers=args.workers,
+        source_path=args.run,
+        progress_cb=_progress,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"\n[sweep] candidates={len(results)} elapsed_s={elapsed:.1f}")
+
+    out_path = args.out
+    if out_path is None:
+        stem = os.path.splitext(os.path.basename(args.run))[0]
+        out_path = os.path.join(os.path.dirname(os.path.abspath(args.run)), f"sweep_{stem}.parquet")
+    pl.DataFrame(_result_rows(results), infer_schema_length=None).write_parquet(out_path)
+    print(f"Wrote: {out_path}")
+    print(_top_table(results, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())